@@ -0,0 +1,211 @@
+"""JSON API только для чтения: ленты, посты, комментарии, группы.
+
+Списки листаются теми же курсорами ?after=/?before=, что и HTML-страницы,
+а параметр ?fields=id,text оставляет в ответе только нужные поля.
+Каждый ответ несёт ETag и Last-Modified; клиент, приславший их
+в If-None-Match/If-Modified-Since, получает пустой 304 без сериализации.
+"""
+import hashlib
+
+from django.http import JsonResponse
+from django.shortcuts import get_object_or_404
+from django.utils.cache import get_conditional_response
+from django.utils.http import http_date, quote_etag
+from django.views.decorators.http import require_GET
+
+from yatube.routers import replica_reads
+from yatube.settings import PAGE_SIZE
+
+from .feed import FeedPaginator
+from .models import Group, Post, User
+from .paginator import KeysetPaginator
+from .stats import get_stats
+
+POST_FIELDS = {
+    'id': lambda post: post.id,
+    'text': lambda post: post.text,
+    'pub_date': lambda post: post.pub_date.isoformat(),
+    'updated': lambda post: post.updated.isoformat(),
+    'author': lambda post: post.author.username,
+    'group': lambda post: post.group.slug if post.group_id else None,
+    'image': lambda post: post.image.url if post.image else None,
+    'comments_count': lambda post: post.comments_count,
+}
+
+COMMENT_FIELDS = {
+    'id': lambda comment: comment.id,
+    'text': lambda comment: comment.text,
+    'author': lambda comment: comment.author.username,
+    'created': lambda comment: comment.created.isoformat(),
+}
+
+GROUP_FIELDS = {
+    'slug': lambda group: group.slug,
+    'title': lambda group: group.title,
+    'description': lambda group: group.description,
+}
+
+
+class FieldError(ValueError):
+    pass
+
+
+def select_fields(request, available):
+    """Поля из ?fields= в порядке запроса; по умолчанию все."""
+    fields = request.GET.get('fields')
+    if not fields:
+        return list(available)
+    names = [name.strip() for name in fields.split(',') if name.strip()]
+    unknown = [name for name in names if name not in available]
+    if unknown:
+        raise FieldError('Неизвестные поля: %s' % ', '.join(unknown))
+    return names
+
+
+def serialize(obj, fields, available):
+    return {name: available[name](obj) for name in fields}
+
+
+def conditional_json(request, payload_func, validator, last_modified):
+    """Ответить 304, если клиент уже видел эту версию данных.
+
+    validator — строка, меняющаяся вместе с содержимым ответа; из неё
+    и параметров запроса строится ETag.
+    """
+    digest = hashlib.md5(
+        ('%s|%s' % (request.get_full_path(), validator)).encode()
+    ).hexdigest()
+    etag = quote_etag(digest)
+    timestamp = int(last_modified.timestamp()) if last_modified else None
+    response = get_conditional_response(
+        request, etag=etag, last_modified=timestamp)
+    if response is None:
+        response = JsonResponse(
+            payload_func(), json_dumps_params={'ensure_ascii': False})
+    response['ETag'] = etag
+    if timestamp is not None:
+        response['Last-Modified'] = http_date(timestamp)
+    return response
+
+
+def error(message, status=400):
+    return JsonResponse({'error': message}, status=status,
+                        json_dumps_params={'ensure_ascii': False})
+
+
+def paginated(request, paginator, available, version_field):
+    try:
+        fields = select_fields(request, available)
+    except FieldError as exc:
+        return error(str(exc))
+    page = paginator.get_page(request.GET)
+    versions = [getattr(obj, version_field) for obj in page]
+    validator = ','.join(
+        '%s:%s' % (obj.pk, version.isoformat())
+        for obj, version in zip(page, versions)
+    )
+    return conditional_json(
+        request,
+        lambda: {
+            'results': [serialize(obj, fields, available) for obj in page],
+            'next': page.next_cursor,
+            'previous': page.previous_cursor,
+        },
+        validator,
+        max(versions) if versions else None,
+    )
+
+
+@require_GET
+@replica_reads
+def posts(request):
+    paginator = KeysetPaginator(Post.objects.for_feed(), PAGE_SIZE)
+    return paginated(request, paginator, POST_FIELDS, 'updated')
+
+
+@require_GET
+@replica_reads
+def group_posts(request, slug):
+    group = get_object_or_404(Group, slug=slug)
+    paginator = KeysetPaginator(group.group_posts.for_feed(), PAGE_SIZE)
+    return paginated(request, paginator, POST_FIELDS, 'updated')
+
+
+@require_GET
+@replica_reads
+def author_posts(request, username):
+    author = get_object_or_404(User, username=username)
+    paginator = KeysetPaginator(author.posts.for_feed(), PAGE_SIZE)
+    return paginated(request, paginator, POST_FIELDS, 'updated')
+
+
+@require_GET
+@replica_reads
+def follow_posts(request):
+    if not request.user.is_authenticated:
+        return error('Требуется авторизация', status=401)
+    paginator = FeedPaginator(request.user, Post.objects.for_feed(),
+                              PAGE_SIZE)
+    return paginated(request, paginator, POST_FIELDS, 'updated')
+
+
+@require_GET
+@replica_reads
+def post_detail(request, post_id):
+    post = get_object_or_404(Post.objects.for_feed(), pk=post_id)
+    try:
+        fields = select_fields(request, POST_FIELDS)
+    except FieldError as exc:
+        return error(str(exc))
+    return conditional_json(
+        request,
+        lambda: serialize(post, fields, POST_FIELDS),
+        post.updated.isoformat(),
+        post.updated,
+    )
+
+
+@require_GET
+@replica_reads
+def post_comments(request, post_id):
+    post = get_object_or_404(Post, pk=post_id)
+    paginator = KeysetPaginator(
+        post.comments.select_related('author'), PAGE_SIZE,
+        ordering=('created', 'id'))
+    return paginated(request, paginator, COMMENT_FIELDS, 'created')
+
+
+@require_GET
+def groups(request):
+    try:
+        fields = select_fields(request, GROUP_FIELDS)
+    except FieldError as exc:
+        return error(str(exc))
+    group_list = list(Group.objects.order_by('slug'))
+    validator = ','.join(
+        '%s:%s:%s' % (group.pk, group.title, group.description)
+        for group in group_list
+    )
+    return conditional_json(
+        request,
+        lambda: {'results': [serialize(group, fields, GROUP_FIELDS)
+                             for group in group_list]},
+        validator,
+        None,
+    )
+
+
+@require_GET
+def user_detail(request, username):
+    author = get_object_or_404(
+        User.objects.select_related('stats'), username=username)
+    stats = get_stats(author)
+    payload = {
+        'username': author.username,
+        'full_name': author.get_full_name(),
+        'posts_count': stats.posts_count,
+        'followers_count': stats.followers_count,
+        'following_count': stats.following_count,
+    }
+    return conditional_json(
+        request, lambda: payload, repr(sorted(payload.items())), None)
@@ -0,0 +1,340 @@
+"""Нагрузочный прогон сайта внутри процесса.
+
+seed() наполняет базу синтетическими данными: подписки распределены по
+степенному закону, как в настоящих соцсетях — несколько авторов собирают
+большую часть подписчиков. generate() строит смесь запросов ко всем
+страницам из posts/urls.py, run() прогоняет её через
+yatube.wsgi.application в нескольких потоках и считает перцентили
+времени ответа и число SQL-запросов для каждого имени URL.
+
+Запрос описывается словарём {"method", "path", "user", "data"}; в таком
+же виде читается и записывается журнал запросов в формате JSON Lines.
+"""
+import io
+import json
+import math
+import random
+import time
+from collections import defaultdict
+from concurrent.futures import ThreadPoolExecutor
+from datetime import timedelta
+from urllib.parse import urlencode, urlsplit
+
+from django.conf import settings
+from django.db import connection
+from django.middleware.csrf import _get_new_csrf_token
+from django.test import Client
+from django.urls import Resolver404, resolve, reverse
+from django.utils import timezone
+
+from . import feed, graph, search, stats
+from .feed import BATCH_SIZE
+from .models import Comment, Follow, Group, Post, User
+
+USER_PREFIX = 'bench_'
+
+# Относительная частота страниц в сгенерированной смеси
+MIX = {
+    'index': 25,
+    'group': 8,
+    'profile': 12,
+    'post': 15,
+    'post_comments': 2,
+    'follow_index': 10,
+    'search': 4,
+    'api_posts': 4,
+    'api_post': 2,
+    'api_post_comments': 2,
+    'api_groups': 1,
+    'api_group_posts': 2,
+    'api_user': 1,
+    'api_author_posts': 2,
+    'api_follow': 2,
+    'new_post': 2,
+    'post_edit': 1,
+    'add_comment': 3,
+    'profile_follow': 1,
+    'profile_unfollow': 1,
+}
+
+WORDS = ('кот', 'москва', 'поезд', 'море', 'книга', 'python', 'django',
+         'утро', 'город', 'музыка', 'дорога', 'погода', 'лес', 'друзья')
+
+
+def _text(rng, words=12):
+    return ' '.join(rng.choice(WORDS) for _ in range(words)).capitalize()
+
+
+def _power_law_choices(rng, population, k, alpha):
+    """k разных элементов; вероятность i-го убывает как 1 / (i + 1) ** alpha."""
+    weights = [1 / (rank + 1) ** alpha for rank in range(len(population))]
+    chosen = set()
+    for _ in range(k * 3):
+        if len(chosen) >= k:
+            break
+        chosen.add(rng.choices(population, weights)[0])
+    return chosen
+
+
+def seed(users=200, groups=10, posts=2000, comments=4000, follows=20,
+         alpha=1.2, rng=None):
+    """Создать синтетический набор данных и пересчитать производные."""
+    rng = rng or random.Random(0)
+    now = timezone.now()
+    start = User.objects.filter(username__startswith=USER_PREFIX).count()
+    User.objects.bulk_create(
+        [User(username=f'{USER_PREFIX}{start + i}') for i in range(users)],
+        batch_size=BATCH_SIZE)
+    user_ids = list(User.objects.filter(
+        username__startswith=USER_PREFIX).values_list('id', flat=True))
+    start = Group.objects.filter(slug__startswith=USER_PREFIX).count()
+    Group.objects.bulk_create(
+        [Group(title=f'Группа {start + i}', slug=f'{USER_PREFIX}{start + i}',
+               description=_text(rng)) for i in range(groups)])
+    group_ids = list(Group.objects.filter(
+        slug__startswith=USER_PREFIX).values_list('id', flat=True))
+
+    # Пишущие авторы тоже распределены неравномерно
+    authors = rng.choices(
+        user_ids, [1 / (rank + 1) for rank in range(len(user_ids))],
+        k=posts)
+    created = Post.objects.bulk_create(
+        [Post(text=_text(rng), author_id=author_id,
+              group_id=rng.choice(group_ids + [None]))
+         for author_id in authors],
+        batch_size=BATCH_SIZE)
+    # pub_date заполняется auto_now_add, разносим даты отдельным UPDATE
+    post_ids = list(Post.objects.filter(author_id__in=user_ids)
+                    .order_by('id').values_list('id', flat=True))
+    Post.objects.bulk_update(
+        [Post(id=post_id, pub_date=now - timedelta(minutes=len(created) - i))
+         for i, post_id in enumerate(post_ids[-len(created):])],
+        ['pub_date'], batch_size=BATCH_SIZE)
+
+    Comment.objects.bulk_create(
+        [Comment(post_id=rng.choice(post_ids), author_id=rng.choice(user_ids),
+                 text=_text(rng, 5)) for _ in range(comments)],
+        batch_size=BATCH_SIZE)
+
+    follow_objects = []
+    for user_id in user_ids:
+        for author_id in _power_law_choices(
+                rng, user_ids, rng.randint(0, follows * 2), alpha):
+            if author_id != user_id:
+                follow_objects.append(
+                    Follow(user_id=user_id, author_id=author_id))
+    Follow.objects.bulk_create(
+        follow_objects, batch_size=BATCH_SIZE, ignore_conflicts=True)
+
+    # bulk_create не посылает сигналов: счётчики, ленты и поиск — заново
+    stats.recount()
+    feed.rebuild(User.objects.filter(id__in=user_ids))
+    graph.rebuild()
+    search.rebuild()
+
+
+class Dataset:
+    """Ключи существующих объектов для построения запросов."""
+
+    def __init__(self):
+        self.users = list(User.objects.filter(
+            username__startswith=USER_PREFIX).values_list(
+                'username', flat=True))
+        self.groups = list(Group.objects.values_list('slug', flat=True))
+        self.posts = list(Post.objects.values_list(
+            'id', 'author__username')[:5000])
+        if not self.users or not self.posts:
+            raise ValueError('Нет данных: сначала запустите seed_benchmark')
+
+
+def _request(rng, data, name):
+    user = rng.choice(data.users)
+    post_id, author = rng.choice(data.posts)
+    group = rng.choice(data.groups) if data.groups else None
+    method, payload, anonymous = 'GET', None, rng.random() < 0.5
+    if name in ('group', 'api_group_posts'):
+        path = reverse(name, args=[group])
+    elif name in ('profile', 'api_user', 'api_author_posts'):
+        path = reverse(name, args=[author])
+    elif name in ('profile_follow', 'profile_unfollow'):
+        path, anonymous = reverse(name, args=[author]), False
+    elif name in ('post', 'post_comments'):
+        path = reverse(name, args=[author, post_id])
+    elif name in ('api_post', 'api_post_comments'):
+        path = reverse(name, args=[post_id])
+    elif name == 'search':
+        path = reverse(name) + '?' + urlencode({'q': rng.choice(WORDS)})
+    elif name in ('follow_index', 'api_follow'):
+        path, anonymous = reverse(name), False
+    elif name == 'new_post':
+        path, method, anonymous = reverse(name), 'POST', False
+        payload = {'text': _text(rng)}
+    elif name == 'post_edit':
+        # Редактировать может только автор поста
+        path = reverse(name, args=[author, post_id])
+        user, anonymous = author, False
+    elif name == 'add_comment':
+        path = reverse(name, args=[author, post_id])
+        method, anonymous = 'POST', False
+        payload = {'text': _text(rng, 5)}
+    else:
+        path = reverse(name)
+    return {'method': method, 'path': path,
+            'user': None if anonymous else user, 'data': payload}
+
+
+def generate(count, rng=None, mix=MIX):
+    """Случайная смесь из count запросов в пропорциях mix."""
+    rng = rng or random.Random(0)
+    data = Dataset()
+    names = list(mix)
+    weights = [mix[name] for name in names]
+    return [_request(rng, data, rng.choices(names, weights)[0])
+            for _ in range(count)]
+
+
+def read_log(path):
+    with open(path) as f:
+        return [json.loads(line) for line in f if line.strip()]
+
+
+def write_log(path, requests):
+    with open(path, 'w') as f:
+        for request in requests:
+            f.write(json.dumps(request, ensure_ascii=False) + '\n')
+
+
+def url_name(path):
+    try:
+        return resolve(urlsplit(path).path).url_name or 'unnamed'
+    except Resolver404:
+        return 'unresolved'
+
+
+def percentile(values, share):
+    """Перцентиль по методу ближайшего ранга."""
+    values = sorted(values)
+    if not values:
+        return None
+    rank = max(1, math.ceil(len(values) * share))
+    return values[rank - 1]
+
+
+class Runner:
+    """Прогоняет запросы через WSGI-приложение в нескольких потоках."""
+
+    def __init__(self, application, concurrency=4):
+        self.application = application
+        self.concurrency = concurrency
+        self.sessions = {}
+        self.csrf_token = _get_new_csrf_token()
+
+    def _session(self, username):
+        # Сессии готовятся заранее, чтобы вход не попадал в замеры
+        if username not in self.sessions:
+            client = Client()
+            client.force_login(User.objects.get(username=username))
+            self.sessions[username] = client.cookies[
+                settings.SESSION_COOKIE_NAME].value
+        return self.sessions[username]
+
+    def _environ(self, request):
+        parts = urlsplit(request['path'])
+        cookies = {settings.CSRF_COOKIE_NAME: self.csrf_token}
+        if request.get('user'):
+            cookies[settings.SESSION_COOKIE_NAME] = self.sessions[
+                request['user']]
+        body = b''
+        if request['method'] == 'POST':
+            data = dict(request.get('data') or {})
+            data['csrfmiddlewaretoken'] = self.csrf_token
+            body = urlencode(data).encode()
+        return {
+            'REQUEST_METHOD': request['method'],
+            'PATH_INFO': parts.path,
+            'QUERY_STRING': parts.query,
+            'SERVER_NAME': 'localhost',
+            'SERVER_PORT': '80',
+            'REMOTE_ADDR': '127.0.0.1',
+            'HTTP_COOKIE': '; '.join('%s=%s' % item
+                                     for item in cookies.items()),
+            'CONTENT_TYPE': 'application/x-www-form-urlencoded',
+            'CONTENT_LENGTH': str(len(body)),
+            'wsgi.input': io.BytesIO(body),
+            'wsgi.errors': io.StringIO(),
+            'wsgi.url_scheme': 'http',
+            'wsgi.version': (1, 0),
+            'wsgi.multithread': True,
+            'wsgi.multiprocess': False,
+            'wsgi.run_once': False,
+        }
+
+    def _one(self, request):
+        queries = [0]
+
+        def count(execute, sql, params, many, context):
+            queries[0] += 1
+            return execute(sql, params, many, context)
+
+        status = []
+        environ = self._environ(request)
+        with connection.execute_wrapper(count):
+            start = time.perf_counter()
+            result = self.application(
+                environ, lambda code, headers, exc_info=None:
+                status.append(int(code.split()[0])))
+            try:
+                for _ in result:
+                    pass
+            finally:
+                if hasattr(result, 'close'):
+                    result.close()
+            elapsed = time.perf_counter() - start
+        return url_name(request['path']), status[0], elapsed, queries[0]
+
+    def run(self, requests):
+        for request in requests:
+            if request.get('user'):
+                self._session(request['user'])
+        if self.concurrency <= 1:
+            return [self._one(request) for request in requests]
+        with ThreadPoolExecutor(self.concurrency) as executor:
+            return list(executor.map(self._one, requests))
+
+
+def summarize(samples):
+    """Перцентили времени ответа и число запросов к базе по имени URL."""
+    groups = defaultdict(list)
+    for name, status, elapsed, queries in samples:
+        groups[name].append((status, elapsed, queries))
+    groups['__all__'] = [sample[1:] for sample in samples]
+    report = {}
+    for name, rows in sorted(groups.items()):
+        times = [elapsed * 1000 for _, elapsed, _ in rows]
+        queries = [count for _, _, count in rows]
+        statuses = defaultdict(int)
+        for status, _, _ in rows:
+            statuses[str(status)] += 1
+        report[name] = {
+            'count': len(rows),
+            'p50_ms': round(percentile(times, 0.50), 3),
+            'p95_ms': round(percentile(times, 0.95), 3),
+            'p99_ms': round(percentile(times, 0.99), 3),
+            'mean_queries': round(sum(queries) / len(queries), 2),
+            'max_queries': max(queries),
+            'status': dict(statuses),
+        }
+    return report
+
+
+def compare(current, previous):
+    """Изменение p95 и числа запросов относительно прошлого прогона."""
+    lines = []
+    for name, row in current.items():
+        old = previous.get(name)
+        if not old:
+            continue
+        lines.append('%-20s p95 %8.2f -> %8.2f ms   queries %6.2f -> %6.2f'
+                     % (name, old['p95_ms'], row['p95_ms'],
+                        old['mean_queries'], row['mean_queries']))
+    return lines
@@ -0,0 +1,185 @@
+"""Кеш карточек постов и целых страниц для анонимных читателей.
+
+Карточка кешируется тегом {% cache %} в includes/card_post.html под
+ключом из id поста и времени его последнего изменения (Post.updated).
+Изменение поста или его комментариев сдвигает updated, и следующая
+отрисовка попадает в новый ключ; при удалении поста ключ стирается явно.
+
+Страницы для анонимных читателей кешируются целиком под ключом из URL
+и счётчиков поколений. Счётчик поколения не удаляет старые страницы,
+а делает их ключи недостижимыми: изменение постов или комментариев
+сдвигает поколение «posts», подписки и правка группы — поколения
+автора и группы.
+
+Те же поколения служат валидатором ETag для conditional_page: если они
+не сдвинулись, браузер получает 304 без запросов к базе и без шаблонов.
+Промах кеша страниц заполняется с основной базы, а ответ, прочитанный
+с реплики (yatube/routers.py), получает ETag, только если поколения
+сдвинуты раньше, чем за REPLICA_PIN_SECONDS до запроса.
+"""
+import hashlib
+import time
+from functools import wraps
+from urllib.parse import urlencode
+
+from django.conf import settings
+from django.core.cache import cache
+from django.core.cache.utils import make_template_fragment_key
+from django.db import transaction
+from django.utils import timezone
+from django.views.decorators.http import condition
+
+from yatube.routers import primary_reads
+
+from .models import Post
+
+CARD_FRAGMENT = 'post_card'
+POSTS = 'posts'
+
+
+def card_key(post):
+    return make_template_fragment_key(CARD_FRAGMENT, [post.id, post.updated])
+
+
+def touch_posts(**filters):
+    """Сдвинуть версию карточек постов, подходящих под фильтр."""
+    Post.objects.filter(**filters).update(updated=timezone.now())
+
+
+def forget_card(post):
+    cache.delete(card_key(post))
+
+
+def _generation_key(scope):
+    return 'generation:%s' % scope
+
+
+def _bumped_key(scope):
+    return 'generation-bumped:%s' % scope
+
+
+def bump(*scopes):
+    """Сдвинуть поколения: закешированные страницы перестанут читаться."""
+    for scope in scopes:
+        try:
+            cache.incr(_generation_key(scope))
+        except ValueError:
+            # Счётчик вытеснен из кеша: начинаем с метки времени, чтобы не
+            # вернуться к номеру, под которым ещё лежат старые страницы
+            cache.set(_generation_key(scope), time.time_ns(), None)
+        cache.set(_bumped_key(scope), time.time(), None)
+
+
+def bump_after_commit(*scopes):
+    """bump(), отложенный до фиксации текущей транзакции.
+
+    Сдвиг до COMMIT открыл бы окно, в котором параллельный запрос ещё
+    читает старые данные и кладёт их в кеш уже под новым поколением.
+    Вне транзакции поколения сдвигаются сразу.
+    """
+    transaction.on_commit(lambda: bump(*scopes))
+
+
+def generations(scopes):
+    keys = [_generation_key(scope) for scope in scopes]
+    found = cache.get_many(keys)
+    missing = [key for key in keys if key not in found]
+    if missing:
+        for key in missing:
+            cache.add(key, time.time_ns(), None)
+        found.update(cache.get_many(missing))
+    return [str(found.get(key, 0)) for key in keys]
+
+
+def settled(scopes, seconds, now=None):
+    """Все поколения scopes сдвигались не позже, чем seconds секунд назад.
+
+    Поколение, время сдвига которого неизвестно, считается давним.
+    """
+    now = time.time() if now is None else now
+    bumped = cache.get_many([_bumped_key(scope) for scope in scopes])
+    return all(now - at >= seconds for at in bumped.values())
+
+
+# GET-параметры, от которых зависят кешируемые страницы. Остальные
+# в ключ не входят: иначе ?x=<случайное> заводило бы новую запись
+PAGE_PARAMS = ('page', 'after', 'before')
+
+
+def page_key(request, scopes):
+    params = urlencode([(name, request.GET[name]) for name in PAGE_PARAMS
+                        if name in request.GET])
+    path = hashlib.md5(
+        ('%s?%s' % (request.path, params)).encode()).hexdigest()
+    return 'page:%s:%s' % ('.'.join(generations(scopes)), path)
+
+
+def anonymous_page_cache(*scopes):
+    """Кешировать ответ представления для анонимных GET-запросов.
+
+    scopes — имена поколений; в них подставляются аргументы из URL,
+    например 'author:{username}'.
+    """
+    def decorator(view):
+        @wraps(view)
+        def wrapper(request, *args, **kwargs):
+            if request.method != 'GET' or request.user.is_authenticated:
+                return view(request, *args, **kwargs)
+            key = page_key(
+                request, [scope.format(**kwargs) for scope in scopes])
+            response = cache.get(key)
+            if response is None:
+                # Реплика могла отстать от поколений в ключе, а ответ
+                # пролежит в кеше PAGE_CACHE_TIMEOUT
+                with primary_reads():
+                    response = view(request, *args, **kwargs)
+                if response.status_code == 200 and not response.cookies:
+                    cache.set(key, response, settings.PAGE_CACHE_TIMEOUT)
+            return response
+        return wrapper
+    return decorator
+
+
+def conditional_page(*scopes):
+    """Отвечать 304, пока поколения страницы не сдвинулись.
+
+    Валидатор не читает базу: это поколения из scopes, пользователь
+    и адрес страницы. Подстановки в scopes — аргументы из URL и {user},
+    имя текущего пользователя. Пользователь входит в ETag, потому что
+    страница у каждого своя (кнопки подписки, шапка, лента подписок).
+    Для вошедшего пользователя в ETag входит и CSRF-токен: в формах
+    страницы, сохранённой до его смены, токен уже недействителен.
+    """
+    def names(request, kwargs):
+        return [scope.format(user=request.user.get_username(), **kwargs)
+                for scope in scopes]
+
+    def etag(request, *args, **kwargs):
+        if getattr(request, '_messages', None) and len(request._messages):
+            return None
+        user = request.user
+        csrf_token = ''
+        if user.is_authenticated:
+            csrf_token = request.META.get('CSRF_COOKIE', '')
+        validator = '%s:%s:%s:%s' % (
+            user.pk or '', csrf_token,
+            '.'.join(generations(names(request, kwargs))),
+            request.get_full_path())
+        return hashlib.md5(validator.encode()).hexdigest()
+
+    def decorator(view):
+        conditional = condition(etag_func=etag)(view)
+
+        @wraps(view)
+        def wrapper(request, *args, **kwargs):
+            started = time.time()
+            response = conditional(request, *args, **kwargs)
+            lag = getattr(settings, 'REPLICA_PIN_SECONDS', 15)
+            if (getattr(response, 'replica_read', False)
+                    and not settled(names(request, kwargs), lag, started)):
+                # Реплика могла ещё не получить записи, сдвинувшие
+                # поколения, — такой ответ не должен получить их ETag
+                del response['ETag']
+            return response
+        return wrapper
+    return decorator
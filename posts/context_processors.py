@@ -1,8 +1,16 @@
 import datetime as dt
 
+from django.conf import settings
+
 
 def year(request):
     yr = dt.date.today().year
     return {
         'year': yr
     }
+
+
+def post_card_timeout(request):
+    return {
+        'post_card_timeout': settings.POST_CARD_CACHE_TIMEOUT
+    }
@@ -0,0 +1,209 @@
+"""Лента подписок: fan-out on write с чтением «звёздных» авторов на лету.
+
+Посты обычного автора при публикации раскладываются по FeedEntry всех
+его подписчиков. Авторы, у которых подписчиков не меньше
+FEED_CELEBRITY_FOLLOWERS, не раскладываются: их посты подмешиваются
+в ленту при чтении, иначе одна публикация порождала бы огромную вставку.
+
+Режим автора хранится в UserStats.celebrity и меняется заданием подписки.
+Когда подписчиков снова становится меньше порога, посты автора
+раскладываются по лентам всех подписчиков: написанные в «звёздный»
+период иначе пропали бы из лент.
+"""
+from django.conf import settings
+from django.db import transaction
+from django.db.models import BooleanField, Case, Value, When
+
+from . import cache
+from .jobs import job
+from .models import FeedEntry, Follow, Post, User, UserStats
+from .paginator import KeysetPaginator
+
+# SQLite вставляет пачку через INSERT ... SELECT UNION ALL, а в одном
+# составном SELECT допускается не больше 500 частей
+BATCH_SIZE = 500
+
+
+def celebrity_threshold():
+    return getattr(settings, 'FEED_CELEBRITY_FOLLOWERS', 1000)
+
+
+def is_celebrity(author_id):
+    return UserStats.objects.filter(
+        user_id=author_id, celebrity=True).exists()
+
+
+def followed_celebrities(user):
+    """id «звёздных» авторов, на которых подписан пользователь."""
+    authors = Follow.objects.filter(user=user).values('author_id')
+    return list(
+        UserStats.objects.filter(
+            user_id__in=authors, celebrity=True,
+        ).values_list('user_id', flat=True)
+    )
+
+
+def update_celebrity(author_id):
+    """Сменить режим автора, если число подписчиков пересекло порог.
+
+    Возвращает True, если ленты подписчиков пришлось дополнить.
+    """
+    threshold = celebrity_threshold()
+    if UserStats.objects.filter(
+            user_id=author_id, celebrity=False,
+            followers_count__gte=threshold).update(celebrity=True):
+        return False
+    # Смена режима и раскладка в одной транзакции: пост, опубликованный
+    # между ними, не останется ни в лентах, ни среди читаемых на лету
+    with transaction.atomic():
+        if not UserStats.objects.filter(
+                user_id=author_id, celebrity=True,
+                followers_count__lt=threshold).update(celebrity=False):
+            return False
+        _fan_out_author(author_id)
+    return True
+
+
+def mark_celebrities():
+    """Выставить режим всем авторам по followers_count одним UPDATE.
+
+    Нужен после массовых изменений в обход сигналов. Посты авторов,
+    опустившихся ниже порога, раскладываются по лентам подписчиков.
+    """
+    threshold = celebrity_threshold()
+    with transaction.atomic():
+        dropped = list(UserStats.objects.filter(
+            celebrity=True, followers_count__lt=threshold,
+        ).values_list('user_id', flat=True))
+        UserStats.objects.update(celebrity=Case(
+            When(followers_count__gte=threshold, then=Value(True)),
+            default=Value(False), output_field=BooleanField()))
+        for author_id in dropped:
+            _fan_out_author(author_id)
+
+
+def _fan_out_author(author_id):
+    followers = list(Follow.objects.filter(
+        author_id=author_id).values_list('user_id', flat=True))
+    for user_id in followers:
+        backfill(user_id, author_id)
+
+
+def _bulk_add(entries):
+    FeedEntry.objects.bulk_create(
+        entries, batch_size=BATCH_SIZE, ignore_conflicts=True)
+
+
+def fan_out(post):
+    """Разложить новый пост по лентам подписчиков автора."""
+    if is_celebrity(post.author_id):
+        return
+    followers = Follow.objects.filter(
+        author_id=post.author_id).values_list('user_id', flat=True)
+    _bulk_add(
+        FeedEntry(user_id=user_id, post_id=post.id, pub_date=post.pub_date)
+        for user_id in followers.iterator()
+    )
+
+
+def backfill(user_id, author_id):
+    """Добавить в ленту пользователя посты автора после подписки."""
+    if is_celebrity(author_id):
+        return
+    posts = Post.objects.filter(
+        author_id=author_id).values_list('id', 'pub_date')
+    _bulk_add(
+        FeedEntry(user_id=user_id, post_id=post_id, pub_date=pub_date)
+        for post_id, pub_date in posts.iterator()
+    )
+
+
+def prune(user_id, author_id):
+    """Убрать посты автора из ленты пользователя после отписки."""
+    FeedEntry.objects.filter(
+        user_id=user_id, post__author_id=author_id).delete()
+
+
+@job
+def fan_out_post(post_id):
+    post = Post.objects.filter(pk=post_id).first()
+    if post is not None:
+        fan_out(post)
+        # Ленты подписчиков изменились уже после публикации: страницы
+        # /follow/ и их ETag должны это увидеть
+        cache.bump(cache.POSTS)
+
+
+@job
+def sync_follow(user_id, author_id):
+    """Привести ленту в соответствие с подпиской, какой она стала к запуску.
+
+    Задание повторяемо: подписка и отписка подряд дадут два задания,
+    и оба увидят уже итоговое состояние Follow.
+    """
+    if Follow.objects.filter(user_id=user_id, author_id=author_id).exists():
+        backfill(user_id, author_id)
+    else:
+        prune(user_id, author_id)
+    if update_celebrity(author_id):
+        cache.bump(cache.POSTS)
+    username = User.objects.filter(
+        pk=user_id).values_list('username', flat=True).first()
+    if username is not None:
+        cache.bump(f'author:{username}')
+
+
+def rebuild(users):
+    """Пересобрать ленты пользователей с нуля."""
+    mark_celebrities()
+    for user in users.iterator():
+        FeedEntry.objects.filter(user=user).delete()
+        authors = Follow.objects.filter(
+            user=user).values_list('author_id', flat=True)
+        for author_id in authors:
+            backfill(user.id, author_id)
+
+
+class FeedPaginator(KeysetPaginator):
+    """Курсорная паджинация ленты подписок.
+
+    Страница собирается слиянием двух упорядоченных потоков: готовых
+    записей FeedEntry и постов «звёздных» авторов. Из каждого берётся не
+    больше limit строк по индексу, затем посты загружаются по первичному
+    ключу.
+    """
+
+    def __init__(self, user, object_list, per_page):
+        super().__init__(object_list, per_page)
+        self.user = user
+        self.celebrities = followed_celebrities(user)
+
+    def _count_key(self):
+        return 'paginator-count:feed:%s' % self.user.pk
+
+    def _count(self):
+        count = FeedEntry.objects.filter(user=self.user).count()
+        if self.celebrities:
+            count += Post.objects.filter(
+                author_id__in=self.celebrities).count()
+        return count
+
+    def _keys(self, queryset, names, values, reverse, limit):
+        if values is not None:
+            queryset = queryset.filter(self._seek(values, reverse, names))
+        ordering = [('' if reverse else '-') + name for name in names]
+        return list(queryset.order_by(*ordering)
+                    .values_list(*names)[:limit])
+
+    def _fetch(self, values, reverse, limit, offset=0):
+        keys = self._keys(
+            FeedEntry.objects.filter(user=self.user),
+            ('pub_date', 'post_id'), values, reverse, offset + limit)
+        if self.celebrities:
+            keys += self._keys(
+                Post.objects.filter(author_id__in=self.celebrities),
+                ('pub_date', 'id'), values, reverse, offset + limit)
+            keys = sorted(set(keys), reverse=not reverse)
+        ids = [post_id for _, post_id in keys[offset:offset + limit]]
+        posts = self.object_list.in_bulk(ids)
+        return [posts[post_id] for post_id in ids if post_id in posts]
@@ -1,9 +1,34 @@
 from django import forms
+from django.db import transaction
 
+from . import thumbnails
 from .models import Post, Comment
 
 
 class PostForm(forms.ModelForm):
+    def save(self, commit=True):
+        """Новая картинка нормализуется и получает миниатюры в фоне.
+
+        Если такая же картинка уже есть у другого поста, её миниатюры
+        готовы: файл и ключ sorl у них общие. Пост и задания, которые
+        ставят его сигналы, сохраняются в одной транзакции.
+        """
+        if 'image' in self.changed_data:
+            self.instance.thumbnails_ready = False
+        with transaction.atomic():
+            post = super().save(commit)
+            if commit and 'image' in self.changed_data and post.image:
+                ready = Post.objects.filter(
+                    image=post.image.name, thumbnails_ready=True,
+                ).exclude(pk=post.pk).exists()
+                if ready:
+                    Post.objects.filter(pk=post.pk).update(
+                        thumbnails_ready=True)
+                    post.thumbnails_ready = True
+                else:
+                    thumbnails.schedule(post)
+        return post
+
     class Meta:
         model = Post
         fields = ('group', 'text', 'image')
@@ -19,6 +44,10 @@ class PostForm(forms.ModelForm):
 
 
 class CommentForm(forms.ModelForm):
+    def save(self, commit=True):
+        with transaction.atomic():
+            return super().save(commit)
+
     class Meta:
         model = Comment
         fields = ('text',)
@@ -0,0 +1,155 @@
+"""Граф подписок в кеше: отсортированные массивы id для каждого пользователя.
+
+Для пользователя хранятся два array('q'): на кого он подписан и кто
+подписан на него. Массив читается из основной базы при первом обращении
+и кладётся в общий кеш, а подписка и отписка (posts/signals.py) после
+COMMIT удаляют два затронутых массива. Править массив на месте нельзя:
+чтение и запись кеша не атомарны, и одновременные подписки затирали бы
+друг друга. Проверка подписки — двоичный поиск, общие подписки —
+слияние двух отсортированных массивов.
+
+После массовых изменений в обход сигналов (импорт, сидирование) графу
+нужен rebuild(): он сдвигает поколение, и старые массивы становятся
+недостижимыми.
+"""
+from array import array
+from bisect import bisect_left
+from collections import Counter
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db import transaction
+
+from . import cache as page_cache
+from .models import Follow
+
+FOLLOWING = 'following'
+FOLLOWERS = 'followers'
+# Поле Follow с id владельца массива и поле с id соседей
+FIELDS = {
+    FOLLOWING: ('user_id', 'author_id'),
+    FOLLOWERS: ('author_id', 'user_id'),
+}
+GENERATION = 'graph'
+# Не больше стольких id в одном IN: у SQLite ограничено число параметров
+BATCH_SIZE = 500
+
+
+def _timeout():
+    return getattr(settings, 'FOLLOW_GRAPH_TIMEOUT', 60 * 60 * 24)
+
+
+def _keys(kind, user_ids):
+    generation = page_cache.generations([GENERATION])[0]
+    return {user_id: 'graph:%s:%s:%s' % (generation, kind, user_id)
+            for user_id in user_ids}
+
+
+def _load(kind, user_ids):
+    owner, neighbour = FIELDS[kind]
+    ids = {user_id: array('q') for user_id in user_ids}
+    for start in range(0, len(user_ids), BATCH_SIZE):
+        batch = user_ids[start:start + BATCH_SIZE]
+        # Массив живёт в кеше сутки, отставшая реплика для него не годится
+        rows = (Follow.objects.using('default')
+                .filter(**{owner + '__in': batch})
+                .order_by(owner, neighbour).values_list(owner, neighbour))
+        for owner_id, neighbour_id in rows.iterator():
+            ids[owner_id].append(neighbour_id)
+    return ids
+
+
+def _get_many(kind, user_ids):
+    """{user_id: array} с догрузкой из базы того, чего нет в кеше."""
+    keys = _keys(kind, user_ids)
+    found = cache.get_many(keys.values())
+    result = {user_id: found[key] for user_id, key in keys.items()
+              if key in found}
+    missing = [user_id for user_id in keys if user_id not in result]
+    if missing:
+        loaded = _load(kind, missing)
+        cache.set_many({keys[user_id]: ids for user_id, ids in loaded.items()},
+                       _timeout())
+        result.update(loaded)
+    return result
+
+
+def following(user_id):
+    """Отсортированный массив id авторов, на которых подписан user_id."""
+    return _get_many(FOLLOWING, [user_id])[user_id]
+
+
+def followers(user_id):
+    return _get_many(FOLLOWERS, [user_id])[user_id]
+
+
+def contains(ids, value):
+    i = bisect_left(ids, value)
+    return i < len(ids) and ids[i] == value
+
+
+def is_following(user_id, author_id):
+    return contains(following(user_id), author_id)
+
+
+def counts(user_id):
+    """(число подписчиков, число подписок)."""
+    return len(followers(user_id)), len(following(user_id))
+
+
+def intersect(a, b):
+    """Пересечение двух отсортированных массивов слиянием."""
+    result = array('q')
+    i = j = 0
+    while i < len(a) and j < len(b):
+        if a[i] < b[j]:
+            i += 1
+        elif a[i] > b[j]:
+            j += 1
+        else:
+            result.append(a[i])
+            i += 1
+            j += 1
+    return result
+
+
+def mutuals(user_id):
+    """Взаимные подписки: id тех, кто подписан на user_id и наоборот."""
+    return intersect(following(user_id), followers(user_id))
+
+
+def suggestions(user_id, limit=10):
+    """Кого почитать: авторы, на которых подписаны авторы пользователя.
+
+    Кандидаты упорядочены по числу таких подписок, затем по id.
+    """
+    own = following(user_id)
+    votes = Counter()
+    for ids in _get_many(FOLLOWING, list(own)).values():
+        votes.update(ids)
+    candidates = [(-score, author_id) for author_id, score in votes.items()
+                  if author_id != user_id and not contains(own, author_id)]
+    candidates.sort()
+    return [author_id for _, author_id in candidates[:limit]]
+
+
+def _forget(user_id, author_id):
+    # До COMMIT параллельный запрос перечитал бы старые подписки и
+    # положил их в кеш на FOLLOW_GRAPH_TIMEOUT
+    transaction.on_commit(lambda: cache.delete_many([
+        _keys(FOLLOWING, [user_id])[user_id],
+        _keys(FOLLOWERS, [author_id])[author_id],
+    ]))
+
+
+def follow(user_id, author_id):
+    _forget(user_id, author_id)
+
+
+def unfollow(user_id, author_id):
+    _forget(user_id, author_id)
+
+
+def rebuild():
+    """Забыть все массивы: они заново прочитаются из Follow."""
+    page_cache.bump(GENERATION)
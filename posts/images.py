@@ -0,0 +1,94 @@
+"""Нормализация загруженных картинок и хранение их по хешу содержимого.
+
+Задание после сохранения поста (posts/thumbnails.py) уменьшает картинку
+до IMAGE_MAX_SIZE по большей стороне, поворачивает её по EXIF
+и пересохраняет в IMAGE_FORMAT без метаданных. Картинки с прозрачностью
+остаются PNG, если формат её не поддерживает, анимация сохраняется
+как есть.
+
+ContentHashStorage называет файл по sha256 содержимого, поэтому
+одинаковые картинки хранятся один раз, а sorl, у которого ключ миниатюры
+зависит от имени исходника, строит для них миниатюры тоже один раз.
+"""
+import hashlib
+import os
+import posixpath
+from io import BytesIO
+
+from django.conf import settings
+from django.core.files.base import ContentFile, File
+from django.core.files.storage import FileSystemStorage
+from django.utils.deconstruct import deconstructible
+from PIL import Image, ImageOps, features
+
+EXTENSIONS = {'JPEG': '.jpg', 'PNG': '.png', 'WEBP': '.webp', 'GIF': '.gif'}
+ALPHA_FORMATS = ('PNG', 'WEBP', 'GIF')
+
+
+def _has_alpha(image):
+    return image.mode in ('RGBA', 'LA', 'PA') or (
+        image.mode == 'P' and 'transparency' in image.info)
+
+
+def target_format(image):
+    fmt = settings.IMAGE_FORMAT
+    if fmt is None:
+        fmt = image.format
+    elif fmt == 'WEBP' and not features.check('webp'):
+        fmt = 'JPEG'
+    if fmt not in EXTENSIONS:
+        fmt = 'JPEG'
+    if _has_alpha(image) and fmt not in ALPHA_FORMATS:
+        fmt = 'PNG'
+    return fmt
+
+
+def normalize(uploaded):
+    """Вернуть нормализованную копию загруженной картинки."""
+    uploaded.seek(0)
+    image = Image.open(uploaded)
+    if getattr(image, 'is_animated', False):
+        uploaded.seek(0)
+        return uploaded
+    fmt = target_format(image)
+    image = ImageOps.exif_transpose(image)
+    max_size = settings.IMAGE_MAX_SIZE
+    image.thumbnail((max_size, max_size), Image.LANCZOS)
+
+    if fmt == 'JPEG':
+        image = image.convert('RGB')
+        options = {'quality': settings.IMAGE_QUALITY, 'optimize': True,
+                   'progressive': True}
+    elif fmt == 'WEBP':
+        image = image.convert('RGBA' if _has_alpha(image) else 'RGB')
+        options = {'quality': settings.IMAGE_QUALITY, 'method': 6}
+    elif fmt == 'PNG':
+        options = {'optimize': True}
+    else:
+        options = {}
+    out = BytesIO()
+    # Метаданные (exif, icc_profile, комментарии) не передаются в save
+    image.save(out, fmt, **options)
+    name = os.path.splitext(os.path.basename(uploaded.name))[0]
+    return ContentFile(out.getvalue(), name=name + EXTENSIONS[fmt])
+
+
+@deconstructible
+class ContentHashStorage(FileSystemStorage):
+    """Файлы называются по хешу содержимого: <каталог>/ab/abcd….jpg."""
+
+    def save(self, name, content, max_length=None):
+        if not hasattr(content, 'chunks'):
+            content = File(content, name)
+        digest = hashlib.sha256()
+        content.seek(0)
+        for chunk in content.chunks():
+            digest.update(chunk)
+        digest = digest.hexdigest()
+        ext = os.path.splitext(name)[1].lower()
+        name = posixpath.join(posixpath.dirname(name), digest[:2],
+                              digest + ext)
+        if self.exists(name):
+            return name
+        content.seek(0)
+        return super().save(name, content, max_length)
@@ -0,0 +1,117 @@
+"""Надёжная очередь фоновых заданий в таблице Job.
+
+Задание — строка в базе, поэтому переживает перезапуск процессов.
+ATOMIC_REQUESTS не включён, и без явной транзакции сигнал ставил бы
+задание уже после коммита записи. Поэтому записи, порождающие задания
+(PostForm, CommentForm, подписки), выполняются в transaction.atomic():
+задание не теряется при падении между двумя INSERT и не выполняется,
+если запись откатилась. Команда run_jobs забирает готовые задания
+и выполняет их в пуле процессов. Упавшее задание повторяется с
+экспоненциальной паузой, а после JOB_MAX_ATTEMPTS попыток остаётся
+в таблице со статусом DEAD.
+
+При JOBS_EAGER (разработка и тесты) задание выполняется сразу.
+Задания должны быть идемпотентны: после сбоя воркера их выполнят снова.
+"""
+import json
+import logging
+import traceback
+from datetime import timedelta
+
+from django.conf import settings
+from django.db import close_old_connections, transaction
+from django.utils import timezone
+from django.utils.module_loading import import_string
+
+from .models import Job
+
+logger = logging.getLogger(__name__)
+
+
+def job(func):
+    """Отметить функцию как задание очереди.
+
+    Аргументы задания передаются именованными и должны сериализоваться
+    в JSON, поэтому вместо объектов передаются их id.
+    """
+    func.job_name = f'{func.__module__}.{func.__qualname__}'
+    return func
+
+
+def resolve(name):
+    func = import_string(name)
+    if getattr(func, 'job_name', None) != name:
+        raise ValueError(f'{name} не является заданием очереди')
+    return func
+
+
+def enqueue(func, **kwargs):
+    if settings.JOBS_EAGER:
+        func(**kwargs)
+        return None
+    return Job.objects.create(
+        name=func.job_name,
+        payload=json.dumps(kwargs),
+        run_at=timezone.now(),
+    )
+
+
+def claim(limit):
+    """Забрать до limit готовых заданий и продлить их аренду.
+
+    Задания, чья аренда истекла (воркер упал посреди выполнения), тоже
+    считаются готовыми.
+    """
+    now = timezone.now()
+    with transaction.atomic():
+        ready = (Job.objects.filter(status=Job.QUEUED, run_at__lte=now)
+                 | Job.objects.filter(status=Job.RUNNING,
+                                      locked_until__lt=now))
+        ids = list(ready.order_by('run_at', 'id')
+                   .values_list('id', flat=True)[:limit])
+        Job.objects.filter(id__in=ids).update(
+            status=Job.RUNNING,
+            locked_until=now + timedelta(seconds=settings.JOB_LEASE),
+        )
+    return ids
+
+
+def retry_delay(attempts):
+    return timedelta(seconds=settings.JOB_RETRY_DELAY * 2 ** (attempts - 1))
+
+
+def execute(job_id):
+    """Выполнить одно задание; возвращает True при успехе."""
+    job = Job.objects.filter(id=job_id, status=Job.RUNNING).first()
+    if job is None:
+        return False
+    try:
+        resolve(job.name)(**json.loads(job.payload))
+    except Exception:
+        attempts = job.attempts + 1
+        error = traceback.format_exc()
+        logger.exception('Задание %s (%s) упало', job.id, job.name)
+        if attempts >= settings.JOB_MAX_ATTEMPTS:
+            status, run_at = Job.DEAD, job.run_at
+        else:
+            status, run_at = Job.QUEUED, timezone.now() + retry_delay(attempts)
+        Job.objects.filter(id=job.id).update(
+            status=status, attempts=attempts, run_at=run_at,
+            locked_until=None, last_error=error)
+        return False
+    Job.objects.filter(id=job.id).delete()
+    return True
+
+
+def run(job_id):
+    """Точка входа процесса пула."""
+    try:
+        return execute(job_id)
+    finally:
+        close_old_connections()
+
+
+def requeue_dead():
+    """Вернуть в очередь задания, исчерпавшие попытки."""
+    return Job.objects.filter(status=Job.DEAD).update(
+        status=Job.QUEUED, attempts=0, run_at=timezone.now())
@@ -0,0 +1,69 @@
+import json
+import random
+
+from django.core.management.base import BaseCommand, CommandError
+from django.utils import timezone
+
+from posts import benchmark
+
+
+class Command(BaseCommand):
+    help = ('Прогоняет смесь запросов через WSGI-приложение и сохраняет '
+            'перцентили времени ответа и число SQL-запросов по URL')
+
+    def add_arguments(self, parser):
+        parser.add_argument('--requests', type=int, default=1000)
+        parser.add_argument('--concurrency', type=int, default=4)
+        parser.add_argument('--seed', type=int, default=0)
+        parser.add_argument(
+            '--log', help='Журнал запросов JSON Lines вместо случайной смеси',
+        )
+        parser.add_argument(
+            '--save-log', help='Сохранить сгенерированную смесь в файл',
+        )
+        parser.add_argument(
+            '--output', default='benchmark.json',
+            help='Куда записать результаты',
+        )
+        parser.add_argument(
+            '--compare', help='Результаты прошлого прогона для сравнения',
+        )
+
+    def handle(self, *args, **options):
+        from yatube.wsgi import application
+
+        try:
+            if options['log']:
+                requests = benchmark.read_log(options['log'])
+            else:
+                requests = benchmark.generate(
+                    options['requests'], random.Random(options['seed']))
+        except (OSError, ValueError) as exc:
+            raise CommandError(exc)
+        if options['save_log']:
+            benchmark.write_log(options['save_log'], requests)
+
+        runner = benchmark.Runner(application, options['concurrency'])
+        report = benchmark.summarize(runner.run(requests))
+        result = {
+            'started': timezone.now().isoformat(),
+            'requests': len(requests),
+            'concurrency': options['concurrency'],
+            'urls': report,
+        }
+        with open(options['output'], 'w') as f:
+            json.dump(result, f, ensure_ascii=False, indent=2)
+
+        for name, row in report.items():
+            self.stdout.write(
+                '%-20s %6d  p50 %8.2f  p95 %8.2f  p99 %8.2f ms  '
+                'queries %6.2f' % (name, row['count'], row['p50_ms'],
+                                   row['p95_ms'], row['p99_ms'],
+                                   row['mean_queries']))
+        if options['compare']:
+            with open(options['compare']) as f:
+                previous = json.load(f)['urls']
+            for line in benchmark.compare(report, previous):
+                self.stdout.write(line)
+        self.stdout.write(self.style.SUCCESS(
+            f'Результаты записаны в {options["output"]}'))
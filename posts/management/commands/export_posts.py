@@ -0,0 +1,41 @@
+import sys
+
+from django.core.management.base import BaseCommand, CommandError
+
+from posts import transfer
+
+
+class Command(BaseCommand):
+    help = ('Выгружает пользователей, группы, посты, комментарии и подписки '
+            'в NDJSON или CSV')
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--output', default='-', help='Файл для записи, «-» — stdout')
+        parser.add_argument(
+            '--format', choices=('ndjson', 'csv'), default='ndjson')
+        parser.add_argument(
+            '--type', choices=transfer.TYPES, action='append',
+            help='Какие записи выгружать (по умолчанию все; для CSV — одну)',
+        )
+        parser.add_argument('--batch-size', type=int, default=1000)
+
+    def handle(self, *args, **options):
+        types = options['type'] or list(transfer.TYPES)
+        if options['format'] == 'csv' and len(types) != 1:
+            raise CommandError('В CSV выгружается один --type')
+        progress = transfer.Progress(self.stderr.write)
+        path = options['output']
+        stream = (sys.stdout if path == '-'
+                  else open(path, 'w', encoding='utf-8', newline=''))
+        try:
+            if options['format'] == 'csv':
+                transfer.write_csv(stream, types[0], options['batch_size'],
+                                   progress)
+            else:
+                transfer.write_ndjson(stream, types, options['batch_size'],
+                                      progress)
+        finally:
+            if stream is not sys.stdout:
+                stream.close()
+        progress.report('экспорт')
@@ -0,0 +1,36 @@
+import logging
+
+from django.core.management.base import BaseCommand
+
+from posts import thumbnails
+from posts.models import Post
+
+logger = logging.getLogger(__name__)
+
+
+class Command(BaseCommand):
+    help = 'Строит миниатюры картинок постов, у которых их ещё нет'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--all', action='store_true',
+            help='Перестроить миниатюры всех постов с картинками',
+        )
+
+    def handle(self, *args, **options):
+        posts = Post.objects.exclude(image='').exclude(image__isnull=True)
+        if not options['all']:
+            posts = posts.filter(thumbnails_ready=False)
+        done = failed = 0
+        for post_id in posts.values_list('id', flat=True).iterator():
+            try:
+                thumbnails.generate(post_id)
+            except Exception:
+                logger.exception('Не удалось построить миниатюру поста %s',
+                                 post_id)
+                failed += 1
+            else:
+                done += 1
+        self.stdout.write(self.style.SUCCESS(f'Обработано постов: {done}'))
+        if failed:
+            self.stderr.write(f'С ошибкой: {failed}')
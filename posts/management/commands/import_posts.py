@@ -0,0 +1,61 @@
+import sys
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db import IntegrityError
+
+from posts import transfer
+
+
+class Command(BaseCommand):
+    help = ('Загружает пользователей, группы, посты, комментарии и подписки '
+            'из NDJSON или CSV')
+
+    def add_arguments(self, parser):
+        parser.add_argument('path', help='Файл для чтения, «-» — stdin')
+        parser.add_argument(
+            '--format', choices=('ndjson', 'csv'), default='ndjson')
+        parser.add_argument(
+            '--type', choices=transfer.TYPES,
+            help='Тип записей в CSV или в NDJSON без поля "type"',
+        )
+        parser.add_argument('--batch-size', type=int, default=1000)
+        parser.add_argument(
+            '--create-users', action='store_true',
+            help='Создавать неизвестных авторов без пароля',
+        )
+        parser.add_argument(
+            '--skip-rebuild', action='store_true',
+            help='Не пересчитывать счётчики, ленты и поиск после загрузки',
+        )
+
+    def handle(self, *args, **options):
+        if options['format'] == 'csv' and not options['type']:
+            raise CommandError('Для CSV нужно указать --type')
+        progress = transfer.Progress(self.stderr.write)
+        importer = transfer.Importer(
+            batch_size=options['batch_size'],
+            create_users=options['create_users'],
+            progress=progress,
+        )
+        path = options['path']
+        stream = sys.stdin if path == '-' else open(path, encoding='utf-8')
+        try:
+            if options['format'] == 'csv':
+                records = transfer.read_csv(stream, options['type'])
+            else:
+                records = transfer.read_ndjson(stream, options['type'])
+            counts = importer.run(records)
+        except (transfer.TransferError, IntegrityError, KeyError) as exc:
+            raise CommandError('Импорт остановлен: %s' % exc)
+        finally:
+            if stream is not sys.stdin:
+                stream.close()
+        progress.report('импорт')
+        if not options['skip_rebuild']:
+            transfer.rebuild_derived()
+        self.stdout.write(self.style.SUCCESS(
+            'Загружено: ' + ', '.join(
+                f'{name} {count}' for name, count in counts.items())))
+        if counts['post']:
+            self.stdout.write(
+                'Миниатюры картинок строит команда generate_thumbnails')
@@ -0,0 +1,33 @@
+import time
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+
+from posts import recommendations
+
+
+class Command(BaseCommand):
+    help = ('Пересчитывает рекомендации «Кого почитать» по графу подписок '
+            'и общим группам')
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--top', type=int, default=settings.RECOMMENDATIONS_TOP_K,
+            help='Сколько авторов сохранять для каждого пользователя',
+        )
+        parser.add_argument(
+            '--backend', choices=('auto', 'scipy', 'python'), default='auto',
+            help='scipy — разреженные матрицы, python — без зависимостей',
+        )
+
+    def handle(self, *args, **options):
+        start = time.perf_counter()
+        try:
+            result = recommendations.compute(options['top'],
+                                             options['backend'])
+        except ImportError as exc:
+            raise CommandError(exc)
+        users = recommendations.store(result)
+        self.stdout.write(self.style.SUCCESS(
+            'Рекомендации для %d пользователей за %.2f с'
+            % (users, time.perf_counter() - start)))
@@ -0,0 +1,11 @@
+from django.core.management.base import BaseCommand
+
+from posts import stats
+
+
+class Command(BaseCommand):
+    help = 'Пересчитывает счётчики записей, комментариев и подписок'
+
+    def handle(self, *args, **options):
+        stats.recount()
+        self.stdout.write(self.style.SUCCESS('Счётчики пересчитаны'))
@@ -0,0 +1,80 @@
+import multiprocessing
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+import django
+from django.core.management.base import BaseCommand
+
+
+def _init_worker():
+    # Процессы запускаются через spawn и настраивают Django заново
+    django.setup()
+
+
+def _run(job_id):
+    from posts import jobs
+    return jobs.run(job_id)
+
+
+class Command(BaseCommand):
+    help = 'Выполняет задания фоновой очереди в пуле процессов'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--workers', type=int, default=multiprocessing.cpu_count(),
+            help='Число процессов; 0 — выполнять в текущем процессе',
+        )
+        parser.add_argument(
+            '--batch', type=int, default=50,
+            help='Сколько заданий забирать за раз',
+        )
+        parser.add_argument(
+            '--sleep', type=float, default=1.0,
+            help='Пауза, когда очередь пуста, секунды',
+        )
+        parser.add_argument(
+            '--once', action='store_true',
+            help='Выйти, когда готовых заданий не останется',
+        )
+        parser.add_argument(
+            '--retry-dead', action='store_true',
+            help='Вернуть в очередь задания, исчерпавшие попытки',
+        )
+
+    def handle(self, *args, **options):
+        from posts import jobs
+
+        if options['retry_dead']:
+            count = jobs.requeue_dead()
+            self.stdout.write(f'Возвращено в очередь: {count}')
+
+        pool = None
+        if options['workers'] > 0:
+            pool = ProcessPoolExecutor(
+                max_workers=options['workers'],
+                mp_context=multiprocessing.get_context('spawn'),
+                initializer=_init_worker,
+            )
+        done = failed = 0
+        try:
+            while True:
+                ids = jobs.claim(options['batch'])
+                if not ids:
+                    if options['once']:
+                        break
+                    time.sleep(options['sleep'])
+                    continue
+                if pool is None:
+                    results = map(jobs.execute, ids)
+                else:
+                    results = pool.map(_run, ids)
+                for ok in results:
+                    done += ok
+                    failed += not ok
+        except KeyboardInterrupt:
+            pass
+        finally:
+            if pool is not None:
+                pool.shutdown()
+        self.stdout.write(self.style.SUCCESS(
+            f'Выполнено: {done}, с ошибкой: {failed}'))
@@ -0,0 +1,46 @@
+import os
+import sqlite3
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connections
+
+
+class Command(BaseCommand):
+    help = ('Копирует основную базу SQLite в файлы реплик для чтения '
+            '(YATUBE_DB_REPLICAS)')
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            'paths', nargs='*',
+            help='Куда сохранить копии (по умолчанию файлы из '
+                 'YATUBE_DB_REPLICAS)',
+        )
+
+    def replica_paths(self):
+        paths = []
+        for alias in settings.DATABASE_REPLICAS:
+            name = settings.DATABASES[alias]['NAME']
+            paths.append(name[len('file:'):].split('?')[0])
+        return paths
+
+    def handle(self, *args, **options):
+        connection = connections['default']
+        if connection.vendor != 'sqlite':
+            raise CommandError('Копии делаются только для SQLite')
+        paths = options['paths'] or self.replica_paths()
+        if not paths:
+            raise CommandError('Не указаны файлы реплик')
+        connection.ensure_connection()
+        for path in paths:
+            tmp_path = f'{path}.tmp'
+            target = sqlite3.connect(tmp_path)
+            # backup() даёт согласованную копию даже при идущей записи
+            connection.connection.backup(target)
+            # Копия открывается только на чтение, журнал WAL ей не нужен
+            target.execute('PRAGMA journal_mode = DELETE')
+            target.close()
+            # Уже открытые соединения дочитывают старый файл
+            os.replace(tmp_path, path)
+            self.stdout.write(f'Копия сохранена: {path}')
+        self.stdout.write(self.style.SUCCESS(f'Копий: {len(paths)}'))
@@ -0,0 +1,97 @@
+# Generated by Django 2.2.6 on 2026-10-18 01:48
+
+from collections import defaultdict
+
+from django.db import migrations, models
+import django.db.models.deletion
+
+# Пачка постов, индексируемая за раз: не держим всю таблицу в памяти
+BATCH_SIZE = 500
+
+
+def create_fts_table(apps, schema_editor):
+    """Виртуальная таблица FTS5 для posts/search.py, если SQLite её умеет."""
+    connection = schema_editor.connection
+    if connection.vendor != 'sqlite':
+        return
+    with connection.cursor() as cursor:
+        cursor.execute('PRAGMA compile_options')
+        if 'ENABLE_FTS5' not in {row[0] for row in cursor.fetchall()}:
+            return
+        cursor.execute(
+            "CREATE VIRTUAL TABLE IF NOT EXISTS posts_search USING fts5("
+            "text, grp, tokenize = 'unicode61 remove_diacritics 2')"
+        )
+
+
+def fill_index(apps, schema_editor):
+    """Проиндексировать уже существующие посты, как posts.search.index_post."""
+    from posts.search import FTS_TABLE, GROUP_WEIGHT, TEXT_WEIGHT, terms
+
+    Post = apps.get_model('posts', 'Post')
+    SearchTerm = apps.get_model('posts', 'SearchTerm')
+    connection = schema_editor.connection
+    fts = False
+    if connection.vendor == 'sqlite':
+        with connection.cursor() as cursor:
+            cursor.execute(
+                "SELECT 1 FROM sqlite_master "
+                "WHERE type = 'table' AND name = %s", [FTS_TABLE])
+            fts = cursor.fetchone() is not None
+    last_id = 0
+    while True:
+        posts = list(Post.objects.filter(pk__gt=last_id).order_by('pk')
+                     .values_list('pk', 'text', 'group__title',
+                                  'group__description')[:BATCH_SIZE])
+        if not posts:
+            break
+        last_id = posts[-1][0]
+        rows, search_terms = [], []
+        for post_id, text, title, description in posts:
+            text_terms = terms(text)
+            group_terms = terms('%s %s' % (title, description)
+                                if title is not None else '')
+            if fts:
+                rows.append([post_id, ' '.join(text_terms),
+                             ' '.join(group_terms)])
+                continue
+            weights = defaultdict(int)
+            for term in text_terms:
+                weights[term[:100]] += TEXT_WEIGHT
+            for term in group_terms:
+                weights[term[:100]] += GROUP_WEIGHT
+            search_terms.extend(
+                SearchTerm(post_id=post_id, term=term, weight=weight)
+                for term, weight in weights.items())
+        if rows:
+            with connection.cursor() as cursor:
+                cursor.executemany(
+                    f'INSERT INTO {FTS_TABLE} (rowid, text, grp) '
+                    f'VALUES (%s, %s, %s)', rows)
+        SearchTerm.objects.bulk_create(search_terms, BATCH_SIZE)
+
+
+def drop_fts_table(apps, schema_editor):
+    if schema_editor.connection.vendor == 'sqlite':
+        schema_editor.execute('DROP TABLE IF EXISTS posts_search')
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('posts', '0006_post_thumbnails_ready'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='SearchTerm',
+            fields=[
+                ('id', models.AutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('term', models.CharField(db_index=True, max_length=100)),
+                ('weight', models.PositiveIntegerField(default=1)),
+                ('post', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='search_terms', to='posts.Post')),
+            ],
+        ),
+        migrations.RunPython(create_fts_table, drop_fts_table),
+        migrations.RunPython(fill_index, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,19 @@
+# Generated by Django 2.2.6 on 2026-10-18 02:08
+
+from django.db import migrations, models
+import posts.images
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('posts', '0008_job'),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='post',
+            name='image',
+            field=models.ImageField(blank=True, null=True, storage=posts.images.ContentHashStorage(), upload_to='posts/'),
+        ),
+    ]
@@ -0,0 +1,27 @@
+# Generated by Django 2.2.6 on 2026-10-18 02:31
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+def mark_celebrities(apps, schema_editor):
+    UserStats = apps.get_model('posts', 'UserStats')
+    threshold = getattr(settings, 'FEED_CELEBRITY_FOLLOWERS', 1000)
+    UserStats.objects.filter(
+        followers_count__gte=threshold).update(celebrity=True)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('posts', '0010_recommendation'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='userstats',
+            name='celebrity',
+            field=models.BooleanField(default=False, verbose_name='Читается на лету'),
+        ),
+        migrations.RunPython(mark_celebrities, migrations.RunPython.noop),
+    ]
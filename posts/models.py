@@ -2,6 +2,8 @@ from django.contrib.auth import get_user_model
 from django.db import models
 from pytils.translit import slugify
 
+from .images import ContentHashStorage
+
 User = get_user_model()
 
 
@@ -35,6 +37,16 @@ class Group(models.Model):
         super().save(*args, **kwargs)
 
 
+class PostQuerySet(models.QuerySet):
+    def for_feed(self):
+        """Посты для карточек ленты: автор и группа одним запросом.
+
+        Число комментариев карточка берёт из поля comments_count, поэтому
+        отрисовка страницы не порождает запросов на каждый пост.
+        """
+        return self.select_related('author', 'group')
+
+
 class Post(models.Model):
     text = models.TextField(
         'Текст',
@@ -43,6 +55,9 @@ class Post(models.Model):
     pub_date = models.DateTimeField(
         auto_now_add=True,
     )
+    updated = models.DateTimeField(
+        auto_now=True,
+    )
     author = models.ForeignKey(
         User,
         on_delete=models.CASCADE,
@@ -57,15 +72,38 @@ class Post(models.Model):
     )
     image = models.ImageField(
         upload_to='posts/',
+        storage=ContentHashStorage(),
         blank=True,
         null=True
     )
+    thumbnails_ready = models.BooleanField(
+        'Миниатюры готовы',
+        default=False,
+        editable=False,
+    )
+    comments_count = models.PositiveIntegerField(
+        'Комментариев',
+        default=0,
+        editable=False,
+    )
+
+    objects = PostQuerySet.as_manager()
 
     def __str__(self):
         return self.text[:15]
 
     class Meta:
         ordering = ['-pub_date']
+        # Индексы повторяют сортировку ленты (pub_date, id) из
+        # KeysetPaginator, в том числе после фильтра по автору и группе
+        indexes = [
+            models.Index(fields=['-pub_date', '-id'],
+                         name='post_pub_date_idx'),
+            models.Index(fields=['author', '-pub_date', '-id'],
+                         name='post_author_pub_date_idx'),
+            models.Index(fields=['group', '-pub_date', '-id'],
+                         name='post_group_pub_date_idx'),
+        ]
 
 
 class Comment(models.Model):
@@ -92,6 +130,12 @@ class Comment(models.Model):
     def __str__(self):
         return self.text
 
+    class Meta:
+        indexes = [
+            models.Index(fields=['post', 'created', 'id'],
+                         name='comment_post_created_idx'),
+        ]
+
 
 class Follow(models.Model):
     user = models.ForeignKey(
@@ -114,3 +158,134 @@ class Follow(models.Model):
                 fields=['user', 'author'], name='unique_follow'
             )
         ]
+
+
+class UserStats(models.Model):
+    """Счётчики пользователя, поддерживаемые сигналами (posts/stats.py)."""
+    user = models.OneToOneField(
+        User,
+        on_delete=models.CASCADE,
+        primary_key=True,
+        related_name='stats',
+    )
+    posts_count = models.PositiveIntegerField('Записей', default=0)
+    followers_count = models.PositiveIntegerField('Подписчиков', default=0)
+    following_count = models.PositiveIntegerField('Подписан', default=0)
+    # Посты автора подмешиваются в ленту при чтении (posts/feed.py)
+    celebrity = models.BooleanField('Читается на лету', default=False)
+
+    def __str__(self):
+        return str(self.user_id)
+
+
+class SearchTerm(models.Model):
+    """Инвертированный индекс поиска для баз без SQLite FTS5."""
+    term = models.CharField(max_length=100, db_index=True)
+    post = models.ForeignKey(
+        Post,
+        on_delete=models.CASCADE,
+        related_name='search_terms',
+    )
+    weight = models.PositiveIntegerField(default=1)
+
+    def __str__(self):
+        return self.term
+
+
+class FeedEntry(models.Model):
+    """Запись персональной ленты подписок.
+
+    Строки создаются при публикации поста (fan-out on write), поэтому
+    follow_index читает готовую ленту по индексу (user, -pub_date)
+    вместо соединения Post с Follow.
+    """
+    user = models.ForeignKey(
+        User,
+        on_delete=models.CASCADE,
+        related_name='feed_entries',
+    )
+    post = models.ForeignKey(
+        Post,
+        on_delete=models.CASCADE,
+        related_name='feed_entries',
+    )
+    pub_date = models.DateTimeField()
+
+    def __str__(self):
+        return f'{self.user_id}: {self.post_id}'
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(
+                fields=['user', 'post'], name='unique_feed_entry'
+            )
+        ]
+        indexes = [
+            models.Index(fields=['user', '-pub_date', '-post'],
+                         name='feed_user_pub_date_idx'),
+        ]
+
+
+class Recommendation(models.Model):
+    """Автор, которого стоит почитать пользователю.
+
+    Таблица целиком пересчитывается командой recommend_authors
+    (posts/recommendations.py); страницы читают её по индексу (user, rank).
+    """
+    user = models.ForeignKey(
+        User,
+        on_delete=models.CASCADE,
+        related_name='recommendations',
+    )
+    author = models.ForeignKey(
+        User,
+        on_delete=models.CASCADE,
+        related_name='+',
+    )
+    rank = models.PositiveSmallIntegerField('Место')
+    score = models.FloatField('Оценка')
+
+    def __str__(self):
+        return f'{self.user_id}: {self.author_id}'
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(
+                fields=['user', 'rank'], name='unique_recommendation_rank'
+            )
+        ]
+
+
+class Job(models.Model):
+    """Задание фоновой очереди (posts/jobs.py).
+
+    Выполненные задания удаляются, а исчерпавшие попытки остаются
+    со статусом DEAD и текстом последней ошибки.
+    """
+    QUEUED = 'queued'
+    RUNNING = 'running'
+    DEAD = 'dead'
+    STATUSES = (
+        (QUEUED, 'В очереди'),
+        (RUNNING, 'Выполняется'),
+        (DEAD, 'Не выполнено'),
+    )
+
+    name = models.CharField('Задание', max_length=200)
+    payload = models.TextField('Аргументы', default='{}')
+    status = models.CharField(
+        'Статус', max_length=10, choices=STATUSES, default=QUEUED)
+    attempts = models.PositiveSmallIntegerField('Попыток', default=0)
+    run_at = models.DateTimeField('Выполнить не раньше')
+    locked_until = models.DateTimeField('Занято до', null=True, blank=True)
+    last_error = models.TextField('Последняя ошибка', blank=True)
+    created = models.DateTimeField('Создано', auto_now_add=True)
+
+    def __str__(self):
+        return f'{self.name} ({self.status})'
+
+    class Meta:
+        indexes = [
+            models.Index(fields=['status', 'run_at'],
+                         name='job_status_run_at_idx'),
+        ]
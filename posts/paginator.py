@@ -0,0 +1,296 @@
+import base64
+import hashlib
+import json
+import math
+from collections.abc import Mapping
+
+from django.conf import settings
+from django.core.cache import cache
+from django.core.exceptions import ValidationError
+from django.core.paginator import Page, Paginator
+from django.db.models import Q
+from django.utils.functional import cached_property
+
+
+class InvalidCursor(Exception):
+    pass
+
+
+class KeysetPage(Page):
+    """Страница выдачи курсорного паджинатора.
+
+    Наличие соседних страниц известно из выборки, а не из числа страниц,
+    поэтому has_next и has_previous не обращаются к count.
+    """
+
+    def __init__(self, object_list, paginator, has_next, has_previous,
+                 number=None):
+        super().__init__(object_list, number, paginator)
+        self._has_next = has_next
+        self._has_previous = has_previous
+
+    def __repr__(self):
+        return '<KeysetPage: %s objects>' % len(self.object_list)
+
+    def has_next(self):
+        return self._has_next
+
+    def has_previous(self):
+        return self._has_previous
+
+    def has_other_pages(self):
+        return self._has_next or self._has_previous
+
+    @property
+    def next_cursor(self):
+        if not self._has_next or not self.object_list:
+            return None
+        return self.paginator.encode_cursor(self.object_list[-1])
+
+    @property
+    def previous_cursor(self):
+        if not self._has_previous or not self.object_list:
+            return None
+        return self.paginator.encode_cursor(self.object_list[0])
+
+    @property
+    def page_links(self):
+        """Пары (номер, GET-параметры) для навигации по номерам страниц.
+
+        Ни одна ссылка не ведёт на ?page=N с OFFSET: первая страница
+        открывается без параметров, последняя — по page=last, соседние —
+        по курсорам. У текущей страницы параметров нет (None), пропуск
+        обозначен парой (None, None). Пусто, если номер неизвестен.
+        """
+        if self.number is None:
+            return []
+        neighbours = {
+            self.number - 1: ('before', self.previous_cursor),
+            self.number + 1: ('after', self.next_cursor),
+        }
+        links = []
+        for number in self.paginator.elided_page_range(self.number):
+            if number is None or number == self.number:
+                links.append((number, None))
+            elif number == 1:
+                links.append((number, ''))
+            elif number == self.paginator.num_pages:
+                links.append((number, 'page=last'))
+            elif neighbours.get(number, (None, None))[1]:
+                name, cursor = neighbours[number]
+                links.append(
+                    (number, '%s=%s&page=%d' % (name, cursor, number)))
+        return links
+
+
+class KeysetPaginator(Paginator):
+    """Паджинация по ключу сортировки вместо LIMIT/OFFSET.
+
+    Следующая страница выбирается условием «строго после последней
+    записи» по полям ordering, поэтому стоимость запроса не зависит от
+    глубины страницы, а COUNT(*) не выполняется вовсе. Курсор — непрозрачная
+    строка для параметров ?after= и ?before=.
+    """
+
+    # Сколько номеров показывать по обе стороны от текущей страницы
+    # и у краёв списка. Дальше соседних страниц курсоров нет, а ссылка
+    # по номеру означала бы OFFSET.
+    ON_EACH_SIDE = 1
+    ON_ENDS = 1
+
+    def __init__(self, object_list, per_page, ordering=('-pub_date', '-id')):
+        super().__init__(object_list, per_page)
+        self.ordering = tuple(ordering)
+
+    def _check_object_list_is_ordered(self):
+        # Выборка всегда сортируется по ordering, порядок object_list не важен
+        pass
+
+    def _count_key(self):
+        """Ключ кеша числа записей: подпись SQL-запроса выборки."""
+        query = str(self.object_list.order_by().query)
+        return 'paginator-count:%s' % hashlib.md5(query.encode()).hexdigest()
+
+    def _count(self):
+        return self.object_list.order_by().count()
+
+    @cached_property
+    def count(self):
+        """Приблизительное число записей.
+
+        COUNT(*) по большой таблице дорог, поэтому результат кешируется
+        на PAGINATOR_COUNT_TIMEOUT секунд и может отставать от базы.
+        """
+        key = self._count_key()
+        count = cache.get(key)
+        if count is None:
+            count = self._count()
+            cache.set(key, count,
+                      getattr(settings, 'PAGINATOR_COUNT_TIMEOUT', 300))
+        return count
+
+    @property
+    def num_pages(self):
+        return max(1, math.ceil(self.count / self.per_page))
+
+    def elided_page_range(self, number):
+        """Первая и последняя страницы и окно вокруг number.
+
+        Пропуски обозначены None.
+        """
+        num_pages = max(self.num_pages, number)
+        shown = set(range(1, min(self.ON_ENDS, num_pages) + 1))
+        shown.update(range(max(1, num_pages - self.ON_ENDS + 1),
+                           num_pages + 1))
+        shown.update(range(max(1, number - self.ON_EACH_SIDE),
+                           min(num_pages, number + self.ON_EACH_SIDE) + 1))
+        result = []
+        previous = 0
+        for page in sorted(shown):
+            if page - previous > 1:
+                result.append(None)
+            result.append(page)
+            previous = page
+        return result
+
+    def _field_names(self):
+        return [field.lstrip('-') for field in self.ordering]
+
+    def encode_cursor(self, obj):
+        values = []
+        for name in self._field_names():
+            value = getattr(obj, name)
+            if hasattr(value, 'isoformat'):
+                value = value.isoformat()
+            values.append(value)
+        raw = json.dumps(values, separators=(',', ':')).encode()
+        return base64.urlsafe_b64encode(raw).decode().rstrip('=')
+
+    def decode_cursor(self, cursor):
+        try:
+            raw = base64.urlsafe_b64decode(cursor + '=' * (-len(cursor) % 4))
+            values = json.loads(raw.decode())
+        except (TypeError, ValueError):
+            raise InvalidCursor(cursor)
+        names = self._field_names()
+        if not isinstance(values, list) or len(values) != len(names):
+            raise InvalidCursor(cursor)
+        model = self.object_list.model
+        try:
+            return [model._meta.get_field(name).to_python(value)
+                    for name, value in zip(names, values)]
+        except ValidationError:
+            raise InvalidCursor(cursor)
+
+    def _seek(self, values, reverse=False, names=None):
+        """Условие «запись идёт после курсора» в порядке ordering."""
+        condition = Q()
+        names = names or self._field_names()
+        for i, field in enumerate(self.ordering):
+            descending = field.startswith('-') != reverse
+            lookup = '%s__%s' % (names[i], 'lt' if descending else 'gt')
+            step = Q(**{lookup: values[i]})
+            for name, value in zip(names[:i], values[:i]):
+                step &= Q(**{name: value})
+            condition |= step
+        return condition
+
+    def _reversed_ordering(self):
+        return [field[1:] if field.startswith('-') else '-' + field
+                for field in self.ordering]
+
+    def _fetch(self, values, reverse, limit, offset=0):
+        """Выбрать limit записей после курсора values.
+
+        При reverse=True записи идут до курсора в обратном порядке.
+        Наследники переопределяют метод, чтобы собирать страницу
+        из нескольких источников.
+        """
+        queryset = self.object_list
+        if values is not None:
+            queryset = queryset.filter(self._seek(values, reverse))
+        ordering = self._reversed_ordering() if reverse else self.ordering
+        return list(queryset.order_by(*ordering)[offset:offset + limit])
+
+    def _page(self, rows, has_previous, number=None):
+        return KeysetPage(rows[:self.per_page], self,
+                          len(rows) > self.per_page, has_previous,
+                          number=number)
+
+    def first_page(self):
+        rows = self._fetch(None, False, self.per_page + 1)
+        return self._page(rows, False, number=1)
+
+    def page_after(self, cursor, number=None):
+        values = self.decode_cursor(cursor)
+        return self._page(self._fetch(values, False, self.per_page + 1), True,
+                          number=number)
+
+    def page_before(self, cursor, number=None):
+        values = self.decode_cursor(cursor)
+        rows = self._fetch(values, True, self.per_page + 1)
+        has_previous = len(rows) > self.per_page
+        rows = rows[:self.per_page]
+        rows.reverse()
+        if not has_previous:
+            number = 1
+        return KeysetPage(rows, self, True, has_previous, number=number)
+
+    def last_page(self):
+        """Последняя страница: первые записи в обратном порядке, без OFFSET.
+
+        На ней остаток от деления числа записей на per_page, чтобы границы
+        страниц совпадали с нумерацией от начала.
+        """
+        size = self.count - (self.num_pages - 1) * self.per_page
+        if not 0 < size <= self.per_page:
+            size = self.per_page
+        rows = self._fetch(None, True, size + 1)
+        has_previous = len(rows) > size
+        rows = rows[:size]
+        rows.reverse()
+        number = self.num_pages if has_previous else 1
+        return KeysetPage(rows, self, False, has_previous, number=number)
+
+    def page_number(self, number):
+        """Совместимость со старыми ссылками вида ?page=N.
+
+        Использует OFFSET, но без COUNT(*); дальше пользователь уходит
+        по курсорным ссылкам.
+        """
+        offset = (number - 1) * self.per_page
+        rows = self._fetch(None, False, self.per_page + 1, offset=offset)
+        return self._page(rows, number > 1, number=number)
+
+    def page(self, number):
+        """Страница по номеру, как Paginator.page().
+
+        Номер сверяется с приблизительным числом страниц.
+        """
+        return self.page_number(self.validate_number(number))
+
+    def get_page(self, params):
+        """Вернуть страницу по GET-параметрам after, before или page.
+
+        Вместе с курсором page передаёт номер страницы для навигации;
+        page=last открывает последнюю страницу. Испорченный курсор или номер
+        страницы приводят на первую страницу, как Paginator.get_page().
+        Вместо словаря можно передать номер страницы, как в Paginator.
+        """
+        if not isinstance(params, Mapping):
+            params = {'page': params}
+        if params.get('page') == 'last':
+            return self.last_page()
+        try:
+            number = int(params.get('page') or 0) or None
+            if number is not None and number < 1:
+                raise ValueError(number)
+            if params.get('after'):
+                return self.page_after(params['after'], number)
+            if params.get('before'):
+                return self.page_before(params['before'], number)
+        except (InvalidCursor, ValueError):
+            return self.first_page()
+        if number and number > 1:
+            return self.page_number(number)
+        return self.first_page()
@@ -0,0 +1,156 @@
+"""Рекомендации «Кого почитать», пересчитываемые пакетно.
+
+Оценка автора b для пользователя u складывается из двух частей:
+
+* друзья друзей — сколько авторов, на которых подписан u, подписаны
+  на b (F @ F, где F — матрица подписок);
+* общие группы — сколько групп, в которых пишет b, интересны u: в них
+  пишет сам u или авторы, на которых он подписан ((P + F @ P) @ P.T,
+  где P — матрица «автор писал в группе»).
+
+Если установлен scipy, матрицы перемножаются разреженными, иначе те же
+суммы считаются словарями множеств. Для каждого пользователя остаются
+RECOMMENDATIONS_TOP_K лучших авторов без него самого и без тех, на кого
+он уже подписан; результат целиком заменяет таблицу Recommendation.
+"""
+import heapq
+from collections import Counter, defaultdict
+
+from django.conf import settings
+from django.db import transaction
+
+from . import cache, graph
+from .models import Follow, Post, Recommendation, User
+
+try:
+    import numpy
+    from scipy import sparse
+except ImportError:
+    numpy = sparse = None
+
+FOLLOW_WEIGHT = 1.0
+GROUP_WEIGHT = 0.5
+# Поколение кеша страниц с рекомендациями (posts/cache.py)
+GENERATION = 'recommendations'
+# SQLite вставляет пачку одним составным SELECT, а частей в нём не больше 500
+BATCH_SIZE = 500
+
+
+def load():
+    """id пользователей, пары подписок и пары (автор, группа)."""
+    users = list(User.objects.order_by('id').values_list('id', flat=True))
+    follows = list(Follow.objects.values_list('user_id', 'author_id'))
+    postings = list(Post.objects.exclude(group=None).order_by()
+                    .values_list('author_id', 'group_id').distinct())
+    return users, follows, postings
+
+
+def _top(candidates, top_k):
+    """Лучшие (author_id, score): по убыванию оценки, затем по id."""
+    best = heapq.nsmallest(top_k, ((-score, author_id)
+                                   for author_id, score in candidates))
+    return [(author_id, -score) for score, author_id in best]
+
+
+def compute_python(users, follows, postings, top_k):
+    following = defaultdict(set)
+    for user_id, author_id in follows:
+        following[user_id].add(author_id)
+    user_groups = defaultdict(set)
+    group_authors = defaultdict(set)
+    for author_id, group_id in postings:
+        user_groups[author_id].add(group_id)
+        group_authors[group_id].add(author_id)
+
+    for user_id in users:
+        own = following.get(user_id, set())
+        scores = Counter()
+        interests = set(user_groups.get(user_id, ()))
+        for author_id in own:
+            for candidate in following.get(author_id, ()):
+                scores[candidate] += FOLLOW_WEIGHT
+            interests.update(user_groups.get(author_id, ()))
+        for group_id in interests:
+            for candidate in group_authors[group_id]:
+                scores[candidate] += GROUP_WEIGHT
+        candidates = [(author_id, score) for author_id, score in scores.items()
+                      if author_id != user_id and author_id not in own]
+        if candidates:
+            yield user_id, _top(candidates, top_k)
+
+
+def _matrix(pairs, rows, cols, shape):
+    data = numpy.ones(len(pairs))
+    row = numpy.fromiter((rows[a] for a, _ in pairs), int, len(pairs))
+    col = numpy.fromiter((cols[b] for _, b in pairs), int, len(pairs))
+    return sparse.csr_matrix((data, (row, col)), shape=shape)
+
+
+def compute_scipy(users, follows, postings, top_k):
+    index = {user_id: i for i, user_id in enumerate(users)}
+    groups = {group_id: i for i, group_id in
+              enumerate(sorted({group_id for _, group_id in postings}))}
+    n = len(users)
+    F = _matrix(follows, index, index, (n, n))
+    P = _matrix(postings, index, groups, (n, len(groups)))
+    interests = (P + F @ P).sign()
+    S = (FOLLOW_WEIGHT * (F @ F) + GROUP_WEIGHT * (interests @ P.T)).tocsr()
+    # Уже прочитанные авторы и сам пользователь из кандидатов убираются
+    S = S - S.multiply(F + sparse.identity(n, format='csr'))
+    S.eliminate_zeros()
+
+    ids = numpy.array(users)
+    for i in range(n):
+        start, end = S.indptr[i], S.indptr[i + 1]
+        if start == end:
+            continue
+        authors = ids[S.indices[start:end]]
+        scores = S.data[start:end]
+        yield users[i], _top(zip(authors.tolist(), scores.tolist()), top_k)
+
+
+def compute(top_k, backend='auto'):
+    if backend == 'auto':
+        backend = 'python' if sparse is None else 'scipy'
+    if backend == 'scipy' and sparse is None:
+        raise ImportError('Для расчёта матрицами нужны numpy и scipy')
+    func = compute_scipy if backend == 'scipy' else compute_python
+    return func(*load(), top_k)
+
+
+def store(recommendations):
+    """Заменить таблицу рекомендаций; возвращает число пользователей.
+
+    Рекомендации считаются целиком до начала транзакции: она начинается
+    с BEGIN IMMEDIATE, и иначе запись в базу ждала бы весь расчёт.
+    """
+    recommendations = list(recommendations)
+    with transaction.atomic():
+        Recommendation.objects.all().delete()
+        batch = []
+        for user_id, authors in recommendations:
+            batch.extend(
+                Recommendation(user_id=user_id, author_id=author_id,
+                               rank=rank, score=score)
+                for rank, (author_id, score) in enumerate(authors))
+            if len(batch) >= BATCH_SIZE:
+                Recommendation.objects.bulk_create(batch, BATCH_SIZE)
+                batch = []
+        Recommendation.objects.bulk_create(batch, BATCH_SIZE)
+    cache.bump(GENERATION)
+    return len(recommendations)
+
+
+def for_user(user, exclude=()):
+    """Рекомендации для показа: один запрос по индексу (user, rank).
+
+    Авторы, на которых пользователь подписался после расчёта, отсеиваются
+    по графу подписок из кеша.
+    """
+    limit = settings.RECOMMENDATIONS_SHOWN
+    followed = graph.following(user.id)
+    rows = (Recommendation.objects.filter(user=user)
+            .select_related('author').order_by('rank')[:limit * 2])
+    return [row.author for row in rows
+            if not graph.contains(followed, row.author_id)
+            and row.author_id not in exclude][:limit]
@@ -0,0 +1,204 @@
+"""Полнотекстовый поиск по постам.
+
+Индексируются текст поста, название и описание его группы. Слова
+приводятся к основе лёгким стеммером для русского языка, а запрос,
+набранный латиницей, дополнительно переводится в кириллицу через
+pytils, как это делает Group.save() в обратную сторону.
+
+Если SQLite собран с FTS5, индекс хранится в виртуальной таблице
+posts_search и ранжируется через bm25(). Иначе используется
+инвертированный индекс в модели SearchTerm.
+"""
+import re
+from collections import defaultdict
+
+from django.db import connection
+from django.db.models import Q, Sum
+from pytils.translit import detranslify
+
+from .jobs import job
+from .models import Post, SearchTerm
+
+FTS_TABLE = 'posts_search'
+
+# Вес слова из текста поста и из описания группы
+TEXT_WEIGHT = 2
+GROUP_WEIGHT = 1
+
+WORD_RE = re.compile(r'\w+', re.UNICODE)
+CYRILLIC_RE = re.compile(r'[а-я]')
+
+REFLEXIVE = ('ся', 'сь')
+ENDINGS = sorted((
+    'иями', 'ями', 'ами', 'ого', 'его', 'ому', 'ему', 'ыми', 'ими', 'ией',
+    'иях', 'ях', 'ах', 'ов', 'ев', 'ей', 'ой', 'ий', 'ый', 'ая', 'яя',
+    'ое', 'ее', 'ие', 'ые', 'ую', 'юю', 'ом', 'ем', 'ам', 'ям', 'ия',
+    'ья', 'ье', 'ью', 'ть', 'ет', 'ит', 'ут', 'ют', 'ат', 'ят', 'ла',
+    'ло', 'ли', 'на', 'но', 'ны', 'а', 'я', 'о', 'е', 'и', 'ы', 'у',
+    'ю', 'ь', 'й',
+), key=len, reverse=True)
+MIN_STEM = 3
+
+
+def stem(word):
+    """Отрезать от русского слова возвратную частицу и окончание."""
+    if not CYRILLIC_RE.search(word):
+        return word
+    for suffix in REFLEXIVE:
+        if word.endswith(suffix) and len(word) - len(suffix) >= MIN_STEM:
+            word = word[:-len(suffix)]
+            break
+    for ending in ENDINGS:
+        if word.endswith(ending) and len(word) - len(ending) >= MIN_STEM:
+            return word[:-len(ending)]
+    return word
+
+
+def tokenize(text):
+    return WORD_RE.findall((text or '').lower().replace('ё', 'е'))
+
+
+def terms(text):
+    return [stem(word) for word in tokenize(text)]
+
+
+def query_terms(query):
+    """Варианты основ для каждого слова запроса.
+
+    Слово, набранное латиницей, ищется и как есть, и в кириллической
+    транслитерации: «moskva» найдёт пост со словом «Москва».
+    """
+    variants = []
+    for word in tokenize(query):
+        options = {stem(word)}
+        if not CYRILLIC_RE.search(word) and not word.isdigit():
+            options.add(stem(detranslify(word).lower().replace('ё', 'е')))
+        variants.append(sorted(options))
+    return variants
+
+
+def _group_text(post):
+    if post.group_id is None:
+        return ''
+    return '%s %s' % (post.group.title, post.group.description)
+
+
+_fts_databases = {}
+
+
+def fts_available():
+    """Есть ли в базе таблица FTS5 (её создаёт миграция 0007_search)."""
+    name = connection.settings_dict['NAME']
+    if name not in _fts_databases:
+        available = False
+        if connection.vendor == 'sqlite':
+            with connection.cursor() as cursor:
+                cursor.execute(
+                    "SELECT 1 FROM sqlite_master "
+                    "WHERE type = 'table' AND name = %s", [FTS_TABLE])
+                available = cursor.fetchone() is not None
+        _fts_databases[name] = available
+    return _fts_databases[name]
+
+
+def index_post(post):
+    text_terms = terms(post.text)
+    group_terms = terms(_group_text(post))
+    if fts_available():
+        with connection.cursor() as cursor:
+            cursor.execute(
+                f'DELETE FROM {FTS_TABLE} WHERE rowid = %s', [post.id])
+            cursor.execute(
+                f'INSERT INTO {FTS_TABLE} (rowid, text, grp) '
+                f'VALUES (%s, %s, %s)',
+                [post.id, ' '.join(text_terms), ' '.join(group_terms)])
+        return
+    weights = defaultdict(int)
+    for term in text_terms:
+        weights[term[:100]] += TEXT_WEIGHT
+    for term in group_terms:
+        weights[term[:100]] += GROUP_WEIGHT
+    SearchTerm.objects.filter(post=post).delete()
+    SearchTerm.objects.bulk_create(
+        SearchTerm(post=post, term=term, weight=weight)
+        for term, weight in weights.items()
+    )
+
+
+def remove_post(post_id):
+    if fts_available():
+        with connection.cursor() as cursor:
+            cursor.execute(
+                f'DELETE FROM {FTS_TABLE} WHERE rowid = %s', [post_id])
+
+
+@job
+def index_post_job(post_id):
+    """Проиндексировать пост или убрать его из индекса, если он удалён."""
+    post = Post.objects.select_related('group').filter(pk=post_id).first()
+    if post is None:
+        remove_post(post_id)
+    else:
+        index_post(post)
+
+
+@job
+def reindex_group(group_id):
+    posts = Post.objects.select_related('group').filter(group_id=group_id)
+    for post in posts.iterator():
+        index_post(post)
+
+
+def rebuild():
+    if fts_available():
+        with connection.cursor() as cursor:
+            cursor.execute(f'DELETE FROM {FTS_TABLE}')
+    else:
+        SearchTerm.objects.all().delete()
+    for post in Post.objects.select_related('group').iterator():
+        index_post(post)
+
+
+def _fts_search(variants, limit, offset):
+    match = ' AND '.join(
+        '(%s)' % ' OR '.join('"%s"*' % term for term in options)
+        for options in variants
+    )
+    with connection.cursor() as cursor:
+        cursor.execute(
+            f'SELECT rowid FROM {FTS_TABLE} WHERE {FTS_TABLE} MATCH %s '
+            f'ORDER BY bm25({FTS_TABLE}, {TEXT_WEIGHT}, {GROUP_WEIGHT}) '
+            f'LIMIT %s OFFSET %s',
+            [match, limit, offset])
+        return [row[0] for row in cursor.fetchall()]
+
+
+def _index_search(variants, limit, offset):
+    scores = None
+    for options in variants:
+        condition = Q()
+        for term in options:
+            condition |= Q(term__startswith=term)
+        found = dict(
+            SearchTerm.objects.filter(condition)
+            .values_list('post')
+            .annotate(score=Sum('weight'))
+        )
+        if scores is None:
+            scores = found
+        else:
+            scores = {post_id: scores[post_id] + score
+                      for post_id, score in found.items()
+                      if post_id in scores}
+    ranked = sorted(scores, key=lambda post_id: (-scores[post_id], -post_id))
+    return ranked[offset:offset + limit]
+
+
+def search(query, limit, offset=0):
+    """id постов по запросу, от более релевантных к менее."""
+    variants = [options for options in query_terms(query) if options]
+    if not variants:
+        return []
+    if fts_available():
+        return _fts_search(variants, limit, offset)
+    return _index_search(variants, limit, offset)
@@ -0,0 +1,78 @@
+"""Побочные эффекты записи постов, комментариев и подписок.
+
+Счётчики меняются сразу: это одно UPDATE, а повтор задания посчитал
+бы их дважды. Поколения кеша страниц сдвигаются после COMMIT. Лента, поисковый индекс и миниатюры
+обновляются заданиями очереди (posts/jobs.py).
+"""
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+
+from . import cache, feed, graph, search, stats
+from .jobs import enqueue
+from .models import Comment, Follow, Group, Post
+
+
+def bump_follow_pages(follow):
+    cache.bump_after_commit(f'author:{follow.author.username}',
+                            f'author:{follow.user.username}')
+
+
+@receiver(post_save, sender=Post)
+def post_saved(sender, instance, created, **kwargs):
+    if created:
+        stats.bump_user(instance.author_id, 'posts_count', 1)
+        enqueue(feed.fan_out_post, post_id=instance.id)
+    enqueue(search.index_post_job, post_id=instance.id)
+    cache.bump_after_commit(cache.POSTS)
+
+
+@receiver(post_delete, sender=Post)
+def post_deleted(sender, instance, **kwargs):
+    stats.bump_user(instance.author_id, 'posts_count', -1)
+    cache.forget_card(instance)
+    enqueue(search.index_post_job, post_id=instance.id)
+    cache.bump_after_commit(cache.POSTS)
+
+
+@receiver(post_save, sender=Group)
+def group_saved(sender, instance, created, **kwargs):
+    if not created:
+        cache.touch_posts(group=instance)
+        cache.bump_after_commit(cache.POSTS, f'group:{instance.slug}')
+        enqueue(search.reindex_group, group_id=instance.id)
+
+
+@receiver(post_save, sender=Comment)
+def comment_saved(sender, instance, created, **kwargs):
+    if created:
+        stats.bump_post(instance.post_id, 1)
+    cache.touch_posts(pk=instance.post_id)
+    cache.bump_after_commit(cache.POSTS)
+
+
+@receiver(post_delete, sender=Comment)
+def comment_deleted(sender, instance, **kwargs):
+    stats.bump_post(instance.post_id, -1)
+    cache.touch_posts(pk=instance.post_id)
+    cache.bump_after_commit(cache.POSTS)
+
+
+@receiver(post_save, sender=Follow)
+def follow_saved(sender, instance, created, **kwargs):
+    if created:
+        stats.bump_user(instance.author_id, 'followers_count', 1)
+        stats.bump_user(instance.user_id, 'following_count', 1)
+        graph.follow(instance.user_id, instance.author_id)
+        enqueue(feed.sync_follow, user_id=instance.user_id,
+                author_id=instance.author_id)
+        bump_follow_pages(instance)
+
+
+@receiver(post_delete, sender=Follow)
+def follow_deleted(sender, instance, **kwargs):
+    stats.bump_user(instance.author_id, 'followers_count', -1)
+    stats.bump_user(instance.user_id, 'following_count', -1)
+    graph.unfollow(instance.user_id, instance.author_id)
+    enqueue(feed.sync_follow, user_id=instance.user_id,
+            author_id=instance.author_id)
+    bump_follow_pages(instance)
@@ -0,0 +1,61 @@
+"""Денормализованные счётчики записей, комментариев и подписок.
+
+Счётчики меняются атомарно через F() в обработчиках сигналов, поэтому
+страницы профиля и поста не выполняют агрегирующих запросов. Если
+значения разошлись с таблицами, их чинит команда recount_stats.
+"""
+from django.db.models import Count, F, OuterRef, Subquery
+from django.db.models.functions import Coalesce
+
+from . import feed
+from .models import Comment, Follow, Post, User, UserStats
+
+
+def get_stats(user):
+    """Счётчики пользователя; для новых пользователей — нулевые."""
+    try:
+        return user.stats
+    except UserStats.DoesNotExist:
+        return UserStats(user=user)
+
+
+def bump_user(user_id, field, delta):
+    updated = UserStats.objects.filter(user_id=user_id).update(
+        **{field: F(field) + delta})
+    if not updated and delta > 0:
+        UserStats.objects.get_or_create(user_id=user_id)
+        UserStats.objects.filter(user_id=user_id).update(
+            **{field: F(field) + delta})
+
+
+def bump_post(post_id, delta):
+    Post.objects.filter(pk=post_id).update(
+        comments_count=F('comments_count') + delta)
+
+
+def _count(queryset, field):
+    return Coalesce(Subquery(
+        queryset.filter(**{field: OuterRef('pk')})
+        .order_by()
+        .values(field)
+        .annotate(total=Count('pk'))
+        .values('total')
+    ), 0)
+
+
+def recount():
+    """Пересчитать все счётчики по исходным таблицам."""
+    UserStats.objects.bulk_create(
+        [UserStats(user_id=pk)
+         for pk in User.objects.values_list('pk', flat=True)],
+        ignore_conflicts=True,
+    )
+    UserStats.objects.update(
+        posts_count=_count(Post.objects.all(), 'author'),
+        followers_count=_count(Follow.objects.all(), 'author'),
+        following_count=_count(Follow.objects.all(), 'user'),
+    )
+    Post.objects.update(
+        comments_count=_count(Comment.objects.all(), 'post'))
+    # Режим ленты зависит от только что пересчитанного followers_count
+    feed.mark_celebrities()
@@ -0,0 +1,180 @@
+"""RSS и Atom для общей ленты, групп и авторов.
+
+Лента отдаётся потоком: XML пишется по одному посту, пока посты читаются
+из базы. Перед этим выполняется один запрос MAX(updated) и COUNT(*),
+как у валидаторов API: по ним отвечаем 304 на
+If-Modified-Since/If-None-Match, и по ним же строится ключ кеша готового
+XML, так что лента генерируется заново только после нового, изменённого
+или удалённого поста.
+"""
+import io
+
+from django.core.cache import cache
+from django.db.models import Count, Max
+from django.http import HttpResponse, StreamingHttpResponse
+from django.shortcuts import get_object_or_404
+from django.urls import reverse
+from django.utils import feedgenerator
+from django.utils.feedgenerator import SimplerXMLGenerator
+from django.utils.text import Truncator
+from django.views.decorators.http import condition
+
+from .models import Group, Post, User
+
+ITEMS = 20
+CACHE_TIMEOUT = 60 * 60 * 24
+
+
+class StreamingFeedMixin:
+    """Генерация ленты кусками: заголовок, по элементу на пост, хвост."""
+
+    item_element = 'item'
+
+    def __init__(self, *args, latest=None, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.latest = latest
+
+    def latest_post_date(self):
+        # Базовый метод перебирает self.items, а они появляются по одному
+        return self.latest or super().latest_post_date()
+
+    def stream(self, posts, make_item, encoding='utf-8'):
+        out = io.StringIO()
+        handler = SimplerXMLGenerator(out, encoding)
+
+        def drain():
+            chunk = out.getvalue()
+            out.seek(0)
+            out.truncate()
+            return chunk
+
+        self.write_head(handler)
+        yield drain()
+        for post in posts:
+            self.add_item(**make_item(post))
+            item = self.items.pop()
+            handler.startElement(self.item_element,
+                                 self.item_attributes(item))
+            self.add_item_elements(handler, item)
+            handler.endElement(self.item_element)
+            yield drain()
+        self.write_tail(handler)
+        yield drain()
+
+
+class RssFeed(StreamingFeedMixin, feedgenerator.Rss201rev2Feed):
+    def write_head(self, handler):
+        handler.startDocument()
+        handler.startElement('rss', self.rss_attributes())
+        handler.startElement('channel', self.root_attributes())
+        self.add_root_elements(handler)
+
+    def write_tail(self, handler):
+        self.endChannelElement(handler)
+        handler.endElement('rss')
+
+
+class AtomFeed(StreamingFeedMixin, feedgenerator.Atom1Feed):
+    item_element = 'entry'
+
+    def write_head(self, handler):
+        handler.startDocument()
+        handler.startElement('feed', self.root_attributes())
+        self.add_root_elements(handler)
+
+    def write_tail(self, handler):
+        handler.endElement('feed')
+
+
+FORMATS = {'rss': RssFeed, 'atom': AtomFeed}
+
+
+def _source(request, slug=None, username=None):
+    """Посты, заголовок, адрес страницы ленты и версия постов.
+
+    Результат кешируется в request.
+    """
+    if not hasattr(request, '_syndication'):
+        if slug is not None:
+            group = get_object_or_404(Group, slug=slug)
+            source = (group.group_posts.all(), group.title,
+                      reverse('group', args=[slug]))
+        elif username is not None:
+            author = get_object_or_404(User, username=username)
+            source = (author.posts.all(),
+                      author.get_full_name() or author.username,
+                      reverse('profile', args=[username]))
+        else:
+            source = (Post.objects.all(), 'Yatube', reverse('index'))
+        # updated сдвигается и правкой поста, и его комментариями, а
+        # удаление поста меняет только число постов
+        version = source[0].order_by().aggregate(
+            latest=Max('updated'), count=Count('id'))
+        request._syndication = source + (
+            version['latest'], version['count'])
+    return request._syndication
+
+
+def _version(request, **kwargs):
+    latest, count = _source(request, **kwargs)[3:]
+    return '%s-%s' % (latest.timestamp() if latest else 0, count)
+
+
+def _last_modified(request, fmt, **kwargs):
+    return _source(request, **kwargs)[3]
+
+
+def _etag(request, fmt, **kwargs):
+    return '%s-%s' % (fmt, _version(request, **kwargs))
+
+
+def _item(request):
+    def make_item(post):
+        link = request.build_absolute_uri(
+            reverse('post', args=[post.author.username, post.id]))
+        return {
+            'title': Truncator(post.text).words(8),
+            'link': link,
+            'description': post.text,
+            'author_name': post.author.get_full_name() or post.author.username,
+            'pubdate': post.pub_date,
+            'updateddate': post.updated,
+            'unique_id': link,
+            'categories': [post.group.title] if post.group_id else (),
+        }
+    return make_item
+
+
+@condition(etag_func=_etag, last_modified_func=_last_modified)
+def feed(request, fmt, slug=None, username=None):
+    posts, title, page_url, latest, _ = _source(
+        request, slug=slug, username=username)
+    feed_class = FORMATS[fmt]
+    key = 'syndication:%s%s:%s' % (
+        request.get_host(), request.path,
+        _version(request, slug=slug, username=username))
+    cached = cache.get(key)
+    if cached is not None:
+        return HttpResponse(cached, content_type=feed_class.content_type)
+
+    generator = feed_class(
+        title=title,
+        link=request.build_absolute_uri(page_url),
+        description=title,
+        feed_url=request.build_absolute_uri(),
+        language='ru',
+        latest=latest,
+    )
+    posts = posts.select_related('author', 'group').order_by(
+        '-pub_date', '-id')[:ITEMS]
+
+    def chunks():
+        parts = []
+        for chunk in generator.stream(posts.iterator(), _item(request)):
+            parts.append(chunk)
+            yield chunk
+        # Ключ содержит версию постов: любое их изменение — новый ключ
+        cache.set(key, ''.join(parts), CACHE_TIMEOUT)
+
+    return StreamingHttpResponse(chunks(),
+                                 content_type=feed_class.content_type)
@@ -0,0 +1,99 @@
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.test import Client, TestCase
+from django.urls import reverse
+
+from posts.models import Comment, Follow, Group, Post
+from yatube.settings import PAGE_SIZE
+
+
+class ApiTests(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.user = get_user_model().objects.create(username='reader')
+        cls.author = get_user_model().objects.create(username='writer')
+        cls.group = Group.objects.create(
+            title='Тестовая группа',
+            description='Описание',
+            slug='test-group'
+        )
+
+    def setUp(self):
+        cache.clear()
+        self.guest_client = Client()
+        self.authorized_client = Client()
+        self.authorized_client.force_login(self.user)
+
+    def test_posts_cursor(self):
+        """Лента листается курсорами без пропусков и повторов."""
+        for i in range(PAGE_SIZE + 3):
+            Post.objects.create(text=f'Пост {i}', author=self.author,
+                                group=self.group)
+        url = reverse('api_posts')
+        first = self.guest_client.get(url).json()
+        self.assertEqual(len(first['results']), PAGE_SIZE)
+        self.assertIsNone(first['previous'])
+        second = self.guest_client.get(url, {'after': first['next']}).json()
+        self.assertEqual(len(second['results']), 3)
+        self.assertIsNone(second['next'])
+        ids = [post['id'] for post in first['results'] + second['results']]
+        self.assertEqual(len(set(ids)), PAGE_SIZE + 3)
+        back = self.guest_client.get(
+            url, {'before': second['previous']}).json()
+        self.assertEqual(back['results'], first['results'])
+
+    def test_fields(self):
+        """?fields= оставляет только перечисленные поля."""
+        post = Post.objects.create(text='Текст', author=self.author,
+                                   group=self.group)
+        response = self.guest_client.get(
+            reverse('api_post', args=[post.id]), {'fields': 'id,group'})
+        self.assertEqual(response.json(),
+                         {'id': post.id, 'group': 'test-group'})
+        response = self.guest_client.get(
+            reverse('api_posts'), {'fields': 'id,password'})
+        self.assertEqual(response.status_code, 400)
+
+    def test_conditional_get(self):
+        """Повторный запрос с ETag получает 304, после правки — 200."""
+        post = Post.objects.create(text='Текст', author=self.author)
+        url = reverse('api_author_posts', args=[self.author.username])
+        response = self.guest_client.get(url)
+        self.assertEqual(response.status_code, 200)
+        self.assertIn('Last-Modified', response)
+        etag = response['ETag']
+        response = self.guest_client.get(url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 304)
+        self.assertEqual(response.content, b'')
+        post.text = 'Новый текст'
+        post.save()
+        response = self.guest_client.get(url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 200)
+        self.assertNotEqual(response['ETag'], etag)
+
+    def test_comments(self):
+        """Комментарии отдаются в порядке написания."""
+        post = Post.objects.create(text='Текст', author=self.author)
+        for i in range(3):
+            Comment.objects.create(post=post, author=self.user,
+                                   text=f'Комментарий {i}')
+        response = self.guest_client.get(
+            reverse('api_post_comments', args=[post.id]))
+        self.assertEqual(
+            [comment['text'] for comment in response.json()['results']],
+            ['Комментарий 0', 'Комментарий 1', 'Комментарий 2'])
+
+    def test_follow(self):
+        """Лента подписок доступна только авторизованному пользователю."""
+        url = reverse('api_follow')
+        self.assertEqual(self.guest_client.get(url).status_code, 401)
+        Follow.objects.create(user=self.user, author=self.author)
+        Post.objects.create(text='Для подписчиков', author=self.author)
+        results = self.authorized_client.get(url).json()['results']
+        self.assertEqual([post['text'] for post in results],
+                         ['Для подписчиков'])
+        user = self.guest_client.get(
+            reverse('api_user', args=[self.author.username])).json()
+        self.assertEqual(user['followers_count'], 1)
+        self.assertEqual(user['posts_count'], 1)
@@ -0,0 +1,64 @@
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.test import Client, TestCase, override_settings
+from django.urls import reverse
+
+from users.auth import TOUCH_SESSION_KEY, user_cache_key
+
+
+class CachedUserTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.user = get_user_model().objects.create(username='reader')
+        self.user.set_password('secret')
+        self.user.save()
+        self.client = Client()
+        self.client.force_login(self.user)
+
+    def test_no_session_or_user_queries(self):
+        """Сессия и пользователь после входа читаются из кеша."""
+        url = reverse('search')
+        with self.assertNumQueries(0):
+            response = self.client.get(url)
+        self.assertEqual(response.context['user'], self.user)
+
+    def test_user_change_invalidates_cache(self):
+        self.user.first_name = 'Новое имя'
+        self.user.save()
+        self.assertIsNone(cache.get(user_cache_key(self.user.pk)))
+        response = self.client.get(reverse('search'))
+        self.assertEqual(response.context['user'].first_name, 'Новое имя')
+
+    def test_password_change_logs_out(self):
+        self.user.set_password('another')
+        self.user.save()
+        response = self.client.get(reverse('search'))
+        self.assertFalse(response.context['user'].is_authenticated)
+
+    def expire_touch(self):
+        session = self.client.session
+        session[TOUCH_SESSION_KEY] -= 120
+        session.save()
+
+    @override_settings(AUTH_TOUCH_INTERVAL=60)
+    def test_touch_does_not_write_user(self):
+        """Продление сессии не пишет в строку пользователя."""
+        model = get_user_model()
+        last_login = model.objects.get(pk=self.user.pk).last_login
+        self.expire_touch()
+        self.client.get(reverse('search'))
+        self.assertEqual(
+            model.objects.get(pk=self.user.pk).last_login, last_login)
+        with self.assertNumQueries(0):
+            self.client.get(reverse('search'))
+
+    @override_settings(AUTH_TOUCH_INTERVAL=60)
+    def test_bulk_deactivation_logs_out_after_interval(self):
+        get_user_model().objects.filter(
+            pk=self.user.pk).update(is_active=False)
+        response = self.client.get(reverse('search'))
+        self.assertTrue(response.context['user'].is_authenticated)
+
+        self.expire_touch()
+        response = self.client.get(reverse('search'))
+        self.assertFalse(response.context['user'].is_authenticated)
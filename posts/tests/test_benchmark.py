@@ -0,0 +1,38 @@
+import random
+
+from django.core.cache import cache
+from django.test import TestCase
+
+from posts import benchmark
+from posts.models import Follow, Post
+from yatube.wsgi import application
+
+
+class BenchmarkTests(TestCase):
+    def setUp(self):
+        cache.clear()
+
+    def test_seed(self):
+        """Подписчики распределены неравномерно, даты постов разнесены."""
+        benchmark.seed(users=30, groups=2, posts=50, comments=20,
+                       follows=5, rng=random.Random(1))
+        self.assertEqual(Post.objects.count(), 50)
+        self.assertEqual(
+            Post.objects.values('pub_date').distinct().count(), 50)
+        first = Follow.objects.filter(author__username='bench_0').count()
+        last = Follow.objects.filter(author__username='bench_29').count()
+        self.assertGreater(first, last)
+
+    def test_run(self):
+        """Все страницы смеси отвечают без ошибок и попадают в отчёт."""
+        benchmark.seed(users=10, groups=2, posts=20, comments=10,
+                       follows=3, rng=random.Random(1))
+        requests = benchmark.generate(200, random.Random(1))
+        report = benchmark.summarize(
+            benchmark.Runner(application, concurrency=1).run(requests))
+        self.assertEqual(set(report), set(benchmark.MIX) | {'__all__'})
+        self.assertEqual(report['__all__']['count'], 200)
+        for row in report.values():
+            self.assertTrue(all(int(status) < 400 for status in row['status']),
+                            row)
+            self.assertLessEqual(row['p50_ms'], row['p99_ms'])
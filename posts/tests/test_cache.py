@@ -0,0 +1,190 @@
+import os
+import tempfile
+
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.test import Client, RequestFactory, SimpleTestCase, TestCase
+from django.urls import reverse
+
+from posts.cache import POSTS, card_key, generations, page_key
+from posts.models import Comment, Group, Post
+from posts.tests.utils import on_commit_callbacks
+from yatube.cache import SQLiteCache
+
+
+class PostCardCacheTests(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.author = get_user_model().objects.create(username='writer')
+        cls.reader = get_user_model().objects.create(username='reader')
+        cls.group = Group.objects.create(
+            title='Заголовок',
+            description='Создан для теста',
+            slug='test-slug'
+        )
+
+    def setUp(self):
+        cache.clear()
+        self.post = Post.objects.create(
+            text='Пост', author=self.author, group=self.group)
+        self.guest_client = Client()
+        self.author_client = Client()
+        self.author_client.force_login(self.author)
+
+    def test_card_is_cached(self):
+        """Отрисованная карточка попадает в кеш."""
+        self.guest_client.get(reverse('index'))
+        self.assertIsNotNone(cache.get(card_key(self.post)))
+
+    def test_comment_changes_card_version(self):
+        """Новый комментарий сдвигает версию карточки."""
+        old_key = card_key(self.post)
+        Comment.objects.create(post=self.post, author=self.reader, text='Да')
+        self.post.refresh_from_db()
+        self.assertNotEqual(card_key(self.post), old_key)
+        response = self.guest_client.get(reverse('index'))
+        self.assertContains(response, 'Комментариев: 1')
+
+    def test_group_rename_changes_card_version(self):
+        """Переименование группы попадает в закешированные карточки."""
+        self.guest_client.get(reverse('index'))
+        self.group.title = 'Новый заголовок'
+        with on_commit_callbacks():
+            self.group.save()
+        response = self.guest_client.get(reverse('index'))
+        self.assertContains(response, '#Новый заголовок')
+
+    def test_delete_forgets_card(self):
+        """Удаление поста стирает его карточку из кеша."""
+        self.guest_client.get(reverse('index'))
+        key = card_key(self.post)
+        self.post.delete()
+        self.assertIsNone(cache.get(key))
+
+    def test_edit_button_is_not_cached(self):
+        """Кнопка редактирования зависит от пользователя, а не от кеша."""
+        edit_url = reverse('post_edit', args=[self.author.username,
+                                              self.post.id])
+        self.assertContains(self.author_client.get(reverse('index')),
+                            edit_url)
+        self.assertNotContains(self.guest_client.get(reverse('index')),
+                               edit_url)
+
+
+class AnonymousPageCacheTests(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.author = get_user_model().objects.create(username='writer')
+        cls.reader = get_user_model().objects.create(username='reader')
+
+    def setUp(self):
+        cache.clear()
+        self.guest_client = Client()
+        self.authorized_client = Client()
+        self.authorized_client.force_login(self.reader)
+
+    def test_anonymous_page_is_served_from_cache(self):
+        """Повторный анонимный запрос не обращается к базе."""
+        url = reverse('profile', args=[self.author.username])
+        self.guest_client.get(url)
+        with self.assertNumQueries(0):
+            self.guest_client.get(url)
+
+    def test_new_post_bumps_generation(self):
+        """Новый пост сразу виден анонимному читателю."""
+        self.guest_client.get(reverse('index'))
+        Post.objects.create(text='Свежий пост', author=self.author)
+        self.assertContains(self.guest_client.get(reverse('index')),
+                            'Свежий пост')
+
+    def test_follow_bumps_author_pages(self):
+        """Подписка обновляет счётчики на закешированной странице автора."""
+        post = Post.objects.create(text='Пост', author=self.author)
+        url = reverse('post', args=[self.author.username, post.id])
+        self.guest_client.get(url)
+        with on_commit_callbacks():
+            self.authorized_client.get(
+                reverse('profile_follow', args=[self.author.username]))
+        self.assertContains(self.guest_client.get(url), 'Подписчиков: 1')
+
+    def test_generation_bumped_after_commit(self):
+        """Поколение сдвигается только после COMMIT записи."""
+        post = Post.objects.create(text='Пост', author=self.author)
+        before = generations([POSTS])
+        with on_commit_callbacks(execute=False) as callbacks:
+            Comment.objects.create(post=post, author=self.reader,
+                                   text='Комментарий')
+            self.assertEqual(generations([POSTS]), before)
+        for callback in callbacks:
+            callback()
+        self.assertNotEqual(generations([POSTS]), before)
+
+    def test_authorized_pages_are_not_cached(self):
+        """Авторизованные пользователи получают свежую страницу."""
+        url = reverse('index')
+        self.authorized_client.get(url)
+        with self.assertNumQueries(1):
+            self.authorized_client.get(url)
+
+
+class PageKeyTests(SimpleTestCase):
+    def test_unknown_params_share_key(self):
+        factory = RequestFactory()
+        key = page_key(factory.get('/', {'page': 2}), [POSTS])
+        self.assertEqual(
+            page_key(factory.get('/', {'page': 2, 'x': 'random'}), [POSTS]),
+            key)
+        self.assertNotEqual(
+            page_key(factory.get('/', {'page': 3}), [POSTS]), key)
+
+
+class SQLiteCacheTests(SimpleTestCase):
+    def setUp(self):
+        self.directory = tempfile.mkdtemp()
+        self.cache = self.make_cache({})
+
+    def make_cache(self, params):
+        return SQLiteCache(
+            os.path.join(self.directory, 'cache.sqlite3'), params)
+
+    def test_set_get_delete(self):
+        self.cache.set('key', {'value': 1})
+        self.assertEqual(self.cache.get('key'), {'value': 1})
+        self.assertEqual(self.cache.get_many(['key', 'missing']),
+                         {'key': {'value': 1}})
+        self.cache.delete('key')
+        self.assertIsNone(self.cache.get('key'))
+
+    def test_add_and_incr(self):
+        self.assertTrue(self.cache.add('counter', 1))
+        self.assertFalse(self.cache.add('counter', 5))
+        self.assertEqual(self.cache.incr('counter'), 2)
+        with self.assertRaises(ValueError):
+            self.cache.incr('missing')
+
+    def test_expired_values_are_not_returned(self):
+        self.cache.set('key', 'value', timeout=-1)
+        self.assertIsNone(self.cache.get('key'))
+        self.assertTrue(self.cache.add('key', 'new'))
+
+    def test_max_entries(self):
+        self.cache = self.make_cache(
+            {'OPTIONS': {'MAX_ENTRIES': 10, 'CULL_FREQUENCY': 2}})
+        self.cache.set('generation', 1, None)
+        for number in range(30):
+            self.cache.set('key%d' % number, number)
+        self.assertLessEqual(self.cache._count(), 10)
+        # Последняя запись на месте, бессрочные вытесняются последними
+        self.assertEqual(self.cache.get('key29'), 29)
+        self.assertEqual(self.cache.get('generation'), 1)
+
+    def test_cull_frequency_zero_clears(self):
+        self.cache = self.make_cache(
+            {'OPTIONS': {'MAX_ENTRIES': 5, 'CULL_FREQUENCY': 0}})
+        for number in range(5):
+            self.cache.set('key%d' % number, number)
+        self.cache.set('last', 1)
+        self.assertEqual(self.cache._count(), 1)
+        self.assertEqual(self.cache.get('last'), 1)
@@ -0,0 +1,58 @@
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.test import Client, TestCase
+from django.urls import reverse
+
+from posts.models import Comment, Post
+from yatube.settings import COMMENTS_PAGE_SIZE
+
+
+class CommentsPaginationTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        User = get_user_model()
+        cls.author = User.objects.create(username='writer')
+        cls.post = Post.objects.create(text='Текст', author=cls.author)
+        for i in range(COMMENTS_PAGE_SIZE + 5):
+            reader = User.objects.create(username=f'reader{i}')
+            Comment.objects.create(post=cls.post, author=reader,
+                                   text=f'Комментарий {i}')
+
+    def setUp(self):
+        cache.clear()
+        self.guest_client = Client()
+
+    def texts(self, comments):
+        return [comment.text for comment in comments]
+
+    def test_first_page(self):
+        """На странице поста — первые комментарии по порядку и кнопка."""
+        url = reverse('post', args=[self.author.username, self.post.id])
+        response = self.guest_client.get(url)
+        comments = response.context['comments']
+        self.assertEqual(
+            self.texts(comments),
+            [f'Комментарий {i}' for i in range(COMMENTS_PAGE_SIZE)])
+        self.assertIsNotNone(response.context['comments_next'])
+        self.assertContains(response, 'Показать ещё')
+
+    def test_queries_do_not_grow(self):
+        """Авторы комментариев загружаются одним запросом с комментариями."""
+        url = reverse('post', args=[self.author.username, self.post.id])
+        with self.assertNumQueries(2):
+            self.guest_client.get(url)
+
+    def test_load_more(self):
+        """Фрагмент «Показать ещё» отдаёт оставшиеся комментарии."""
+        response = self.guest_client.get(
+            reverse('post', args=[self.author.username, self.post.id]))
+        response = self.guest_client.get(
+            reverse('post_comments', args=[self.author.username,
+                                           self.post.id]),
+            {'after': response.context['comments_next']})
+        self.assertEqual(
+            self.texts(response.context['comments']),
+            [f'Комментарий {i}' for i in range(COMMENTS_PAGE_SIZE,
+                                               COMMENTS_PAGE_SIZE + 5)])
+        self.assertIsNone(response.context['comments_next'])
+        self.assertNotContains(response, 'Показать ещё')
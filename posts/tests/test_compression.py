@@ -0,0 +1,107 @@
+import gzip
+
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.http import HttpResponse
+from django.test import Client, RequestFactory, TestCase
+from django.urls import reverse
+
+from posts.models import Post
+from yatube.compression import CompressionMiddleware, choose_encoding
+
+
+class CompressionTests(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.author = get_user_model().objects.create(username='writer')
+        for i in range(5):
+            Post.objects.create(text=f'Тестовый пост {i}', author=cls.author)
+
+    def setUp(self):
+        cache.clear()
+        self.guest_client = Client()
+
+    def test_gzip(self):
+        response = self.guest_client.get(reverse('index'),
+                                         HTTP_ACCEPT_ENCODING='gzip')
+        self.assertEqual(response['Content-Encoding'], 'gzip')
+        self.assertIn('Accept-Encoding', response['Vary'])
+        self.assertIn('Тестовый пост 4',
+                      gzip.decompress(response.content).decode())
+        self.assertTrue(response['ETag'].startswith('W/'))
+
+    def test_not_accepted(self):
+        response = self.guest_client.get(reverse('index'))
+        self.assertFalse(response.has_header('Content-Encoding'))
+        self.assertContains(response, 'Тестовый пост 4')
+
+    def test_partial_content_not_compressed(self):
+        def view(request):
+            response = HttpResponse('x' * 1000, status=206,
+                                    content_type='text/plain')
+            response['Content-Range'] = 'bytes 0-999/5000'
+            return response
+
+        request = RequestFactory().get('/', HTTP_ACCEPT_ENCODING='gzip')
+        response = CompressionMiddleware(view)(request)
+        self.assertFalse(response.has_header('Content-Encoding'))
+        self.assertEqual(response.content, b'x' * 1000)
+
+    def test_choose_encoding(self):
+        available = ['zstd', 'br', 'gzip']
+        self.assertEqual(choose_encoding('gzip, br', available), 'br')
+        self.assertEqual(
+            choose_encoding('br;q=0.5, gzip;q=0.8', available), 'gzip')
+        self.assertEqual(choose_encoding('*', available), 'zstd')
+        self.assertIsNone(choose_encoding('identity, br;q=0', available))
+        self.assertIsNone(choose_encoding('', available))
+
+
+class ConditionalPageTests(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        User = get_user_model()
+        cls.author = User.objects.create(username='writer')
+        cls.reader = User.objects.create(username='reader')
+        Post.objects.create(text='Первый пост', author=cls.author)
+
+    def setUp(self):
+        cache.clear()
+        self.guest_client = Client()
+
+    def test_not_modified_without_queries(self):
+        """Неизменившаяся страница — 304 без обращений к базе."""
+        url = reverse('profile', args=['writer'])
+        etag = self.guest_client.get(url)['ETag']
+        with self.assertNumQueries(0):
+            response = self.guest_client.get(url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 304)
+
+        Post.objects.create(text='Второй пост', author=self.author)
+        response = self.guest_client.get(url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 200)
+        self.assertContains(response, 'Второй пост')
+
+    def test_etag_depends_on_user(self):
+        url = reverse('index')
+        etag = self.guest_client.get(url)['ETag']
+        client = Client()
+        client.force_login(self.reader)
+        response = client.get(url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 200)
+        self.assertNotEqual(response['ETag'], etag)
+
+    def test_etag_depends_on_csrf_token(self):
+        """Страница с формами не отдаётся 304 после смены CSRF-токена."""
+        url = reverse('index')
+        client = Client()
+        client.force_login(self.reader)
+        etag = client.get(url)['ETag']
+        response = client.get(url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 304)
+        client.cookies[settings.CSRF_COOKIE_NAME] = 'x' * 64
+        response = client.get(url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 200)
@@ -0,0 +1,99 @@
+from io import StringIO
+
+from django.contrib.auth import get_user_model
+from django.core.management import call_command
+from django.test import Client, TestCase, override_settings
+from django.urls import reverse
+
+from posts import feed, stats
+from posts.models import FeedEntry, Follow, Post, UserStats
+
+
+class FeedTests(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.user = get_user_model().objects.create(username='reader')
+        cls.author = get_user_model().objects.create(username='writer')
+        cls.other = get_user_model().objects.create(username='other')
+
+    def setUp(self):
+        self.authorized_client = Client()
+        self.authorized_client.force_login(self.user)
+
+    def feed_ids(self):
+        response = self.authorized_client.get(reverse('follow_index'))
+        return [post.id for post in response.context.get('page')]
+
+    def test_new_post_fans_out_to_followers(self):
+        """Новый пост попадает в ленты подписчиков автора."""
+        Follow.objects.create(user=self.user, author=self.author)
+        post = Post.objects.create(text='Пост', author=self.author)
+        Post.objects.create(text='Чужой пост', author=self.other)
+        self.assertTrue(
+            FeedEntry.objects.filter(user=self.user, post=post).exists())
+        self.assertEqual(self.feed_ids(), [post.id])
+
+    def test_follow_backfills_and_unfollow_prunes(self):
+        """Подписка добавляет старые посты автора, отписка убирает их."""
+        post = Post.objects.create(text='Пост', author=self.author)
+        self.authorized_client.get(
+            reverse('profile_follow', args=[self.author.username]))
+        self.assertEqual(self.feed_ids(), [post.id])
+        self.authorized_client.get(
+            reverse('profile_unfollow', args=[self.author.username]))
+        self.assertFalse(FeedEntry.objects.filter(user=self.user).exists())
+        self.assertEqual(self.feed_ids(), [])
+
+    @override_settings(FEED_CELEBRITY_FOLLOWERS=1)
+    def test_celebrity_posts_are_read_on_the_fly(self):
+        """Посты «звёздных» авторов не раскладываются, но видны в ленте."""
+        Follow.objects.create(user=self.user, author=self.author)
+        post = Post.objects.create(text='Пост', author=self.author)
+        self.assertFalse(FeedEntry.objects.exists())
+        self.assertEqual(self.feed_ids(), [post.id])
+
+    def test_rebuild_feed_command(self):
+        """Команда rebuild_feed восстанавливает ленты из подписок."""
+        Follow.objects.create(user=self.user, author=self.author)
+        post = Post.objects.create(text='Пост', author=self.author)
+        FeedEntry.objects.all().delete()
+        call_command('rebuild_feed', stdout=StringIO())
+        self.assertEqual(self.feed_ids(), [post.id])
+
+    @override_settings(FEED_CELEBRITY_FOLLOWERS=2)
+    def test_celebrity_below_threshold_is_fanned_out(self):
+        """Посты «звёздного» периода остаются в ленте, когда порог потерян."""
+        Follow.objects.create(user=self.user, author=self.author)
+        Follow.objects.create(user=self.other, author=self.author)
+        post = Post.objects.create(text='Пост', author=self.author)
+        self.assertFalse(FeedEntry.objects.exists())
+        Follow.objects.filter(user=self.other).delete()
+        self.assertTrue(
+            FeedEntry.objects.filter(user=self.user, post=post).exists())
+        self.assertEqual(self.feed_ids(), [post.id])
+        # Дальше посты автора снова раскладываются при публикации
+        newer = Post.objects.create(text='Новый пост', author=self.author)
+        self.assertEqual(self.feed_ids(), [newer.id, post.id])
+
+    @override_settings(FEED_CELEBRITY_FOLLOWERS=2)
+    def test_recount_marks_celebrities(self):
+        """Подписки в обход сигналов учитываются при пересчёте режима."""
+        Follow.objects.bulk_create([
+            Follow(user=self.user, author=self.author),
+            Follow(user=self.other, author=self.author),
+        ])
+        stats.recount()
+        self.assertTrue(UserStats.objects.get(user=self.author).celebrity)
+        post = Post.objects.create(text='Пост', author=self.author)
+        self.assertFalse(FeedEntry.objects.exists())
+        self.assertEqual(self.feed_ids(), [post.id])
+
+        # Ниже порога, но режим разошёлся с числом подписчиков
+        Follow.objects.filter(user=self.other).delete()
+        FeedEntry.objects.all().delete()
+        UserStats.objects.filter(user=self.author).update(celebrity=True)
+        feed.rebuild(get_user_model().objects.none())
+        self.assertFalse(UserStats.objects.get(user=self.author).celebrity)
+        self.assertTrue(
+            FeedEntry.objects.filter(user=self.user, post=post).exists())
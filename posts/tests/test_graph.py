@@ -0,0 +1,104 @@
+from unittest import mock
+
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.http import HttpResponse
+from django.test import Client, RequestFactory, TestCase
+from django.urls import reverse
+
+from posts import graph
+from posts.models import Follow
+from posts.tests.utils import on_commit_callbacks
+from yatube.routers import replica_reads
+
+
+class FollowGraphTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        User = get_user_model()
+        self.users = [User.objects.create(username=f'user{i}')
+                      for i in range(5)]
+        self.ids = [user.id for user in self.users]
+        pairs = [(0, 1), (0, 2), (1, 0), (1, 3), (2, 3), (2, 4)]
+        for user, author in pairs:
+            Follow.objects.create(user=self.users[user],
+                                  author=self.users[author])
+
+    def test_queries(self):
+        a, b, c, d, e = self.ids
+        self.assertEqual(list(graph.following(a)), [b, c])
+        self.assertEqual(list(graph.followers(d)), [b, c])
+        self.assertTrue(graph.is_following(a, b))
+        self.assertFalse(graph.is_following(a, d))
+        self.assertEqual(graph.counts(a), (1, 2))
+        self.assertEqual(list(graph.mutuals(a)), [b])
+        # d читают оба автора пользователя a, e — только один
+        self.assertEqual(graph.suggestions(a), [d, e])
+
+    def test_cached(self):
+        a, b = self.ids[:2]
+        graph.following(a)
+        with self.assertNumQueries(0):
+            self.assertTrue(graph.is_following(a, b))
+
+    def test_updates(self):
+        """Подписка и отписка сбрасывают затронутые массивы."""
+        a, b, c, d, e = self.ids
+        graph.following(a)
+        graph.followers(e)
+        graph.following(b)
+        with on_commit_callbacks():
+            Follow.objects.create(user=self.users[0], author=self.users[4])
+        self.assertEqual(list(graph.following(a)), [b, c, e])
+        self.assertEqual(list(graph.followers(e)), [a, c])
+        with self.assertNumQueries(0):
+            graph.following(b)
+        with on_commit_callbacks():
+            Follow.objects.filter(
+                user=self.users[0], author=self.users[1]).delete()
+        self.assertEqual(list(graph.following(a)), [c, e])
+
+    def test_loaded_from_primary(self):
+        """Даже в представлении на реплике массив читается с основной базы."""
+        @replica_reads
+        def view(request):
+            return HttpResponse(str(list(graph.following(self.ids[0]))))
+
+        with mock.patch('yatube.routers.replicas',
+                        return_value=['replica0']):
+            response = view(RequestFactory().get('/'))
+        self.assertEqual(response.content.decode(),
+                         str([self.ids[1], self.ids[2]]))
+
+    def test_rebuild(self):
+        a = self.ids[0]
+        graph.following(a)
+        Follow.objects.bulk_create(
+            [Follow(user=self.users[0], author=self.users[3])])
+        self.assertEqual(len(graph.following(a)), 2)
+        graph.rebuild()
+        self.assertEqual(len(graph.following(a)), 3)
+
+    def test_profile_button(self):
+        client = Client()
+        client.force_login(self.users[0])
+        url = reverse('profile', args=['user1'])
+        self.assertTrue(client.get(url).context['following'])
+        with on_commit_callbacks():
+            client.get(reverse('profile_unfollow', args=['user1']))
+        self.assertFalse(client.get(url).context['following'])
+
+    def test_follow_view_refreshes_after_commit(self):
+        """Подписка через profile_follow видна в графе только после COMMIT."""
+        a, d = self.ids[0], self.ids[3]
+        self.assertFalse(graph.is_following(a, d))
+        client = Client()
+        client.force_login(self.users[0])
+        with on_commit_callbacks(execute=False) as callbacks:
+            client.get(reverse('profile_follow', args=['user3']))
+        # Транзакция ещё не зафиксирована — массив в кеше не тронут
+        self.assertFalse(graph.is_following(a, d))
+        for callback in callbacks:
+            callback()
+        self.assertTrue(graph.is_following(a, d))
+        self.assertIn(a, graph.followers(d))
@@ -0,0 +1,117 @@
+import json
+import shutil
+import tempfile
+from io import BytesIO
+
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.test import Client, TestCase, override_settings
+from django.urls import reverse
+from PIL import Image
+
+from posts import thumbnails
+from posts.models import Job, Post
+
+# Тег EXIF Orientation: 6 — снимок нужно повернуть на 90° по часовой
+ORIENTATION = 0x0112
+
+
+def photo(size=(400, 200), fmt='JPEG', mode='RGB', orientation=None):
+    image = Image.new(mode, size, color='red')
+    out = BytesIO()
+    if orientation:
+        exif = Image.Exif()
+        exif[ORIENTATION] = orientation
+        image.save(out, fmt, exif=exif.tobytes())
+    else:
+        image.save(out, fmt)
+    return out.getvalue()
+
+
+@override_settings(IMAGE_MAX_SIZE=100, IMAGE_FORMAT='JPEG')
+class ImageUploadTests(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.media_root = tempfile.mkdtemp(dir=settings.BASE_DIR)
+        cls.user = get_user_model().objects.create(username='writer')
+
+    @classmethod
+    def tearDownClass(cls):
+        super().tearDownClass()
+        shutil.rmtree(cls.media_root, ignore_errors=True)
+
+    def setUp(self):
+        cache.clear()
+        self.authorized_client = Client()
+        self.authorized_client.force_login(self.user)
+
+    def upload(self, text, content, name='photo.jpg'):
+        with self.settings(MEDIA_ROOT=self.media_root):
+            self.authorized_client.post(reverse('new_post'), data={
+                'text': text,
+                'image': SimpleUploadedFile(name, content, 'image/jpeg'),
+            })
+        return Post.objects.get(text=text)
+
+    def open(self, post):
+        with self.settings(MEDIA_ROOT=self.media_root):
+            with post.image.open('rb') as f:
+                image = Image.open(BytesIO(f.read()))
+                image.load()
+                return image
+
+    def test_downscaled_rotated_and_stripped(self):
+        """Картинка уменьшается, поворачивается по EXIF и теряет EXIF."""
+        post = self.upload('Снимок', photo(orientation=6))
+        image = self.open(post)
+        self.assertEqual(image.format, 'JPEG')
+        self.assertEqual(image.size, (50, 100))
+        self.assertNotIn('exif', image.info)
+        self.assertTrue(post.image.name.startswith('posts/'))
+        self.assertTrue(post.image.name.endswith('.jpg'))
+
+    def test_transparency_kept(self):
+        post = self.upload('Прозрачная', photo(fmt='PNG', mode='RGBA'),
+                           name='logo.png')
+        image = self.open(post)
+        self.assertEqual(image.format, 'PNG')
+        self.assertEqual(image.mode, 'RGBA')
+
+    @override_settings(JOBS_EAGER=False)
+    def test_normalized_in_background(self):
+        """Запрос сохраняет исходник, нормализует его задание очереди."""
+        post = self.upload('Снимок', photo())
+        original = post.image.name
+        self.assertEqual(self.open(post).size, (400, 200))
+        job = Job.objects.get(name='posts.thumbnails.prepare')
+
+        with self.settings(MEDIA_ROOT=self.media_root):
+            thumbnails.prepare(**json.loads(job.payload))
+            # Повторный запуск не пересжимает картинку ещё раз
+            post.refresh_from_db()
+            normalized = post.image.name
+            thumbnails.prepare(**json.loads(job.payload))
+            post.refresh_from_db()
+            self.assertFalse(post.image.storage.exists(original))
+        self.assertEqual(post.image.name, normalized)
+        self.assertNotEqual(normalized, original)
+        self.assertEqual(self.open(post).size, (100, 50))
+        self.assertTrue(post.thumbnails_ready)
+
+    @override_settings(JOBS_EAGER=False)
+    def test_same_image_stored_once(self):
+        """Одинаковые картинки хранятся в одном файле с общими миниатюрами."""
+        content = photo()
+        first = self.upload('Первый', content, name='a.jpg')
+        self.assertEqual(Job.objects.filter(
+            name='posts.thumbnails.prepare').count(), 1)
+        Post.objects.filter(pk=first.pk).update(thumbnails_ready=True)
+
+        second = self.upload('Второй', content, name='b.jpg')
+        self.assertEqual(first.image.name, second.image.name)
+        self.assertTrue(second.thumbnails_ready)
+        self.assertEqual(Job.objects.filter(
+            name='posts.thumbnails.prepare').count(), 1)
@@ -0,0 +1,137 @@
+from datetime import timedelta
+from io import StringIO
+from unittest import mock
+
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.core.management import call_command
+from django.db import DatabaseError
+from django.test import Client, TestCase, override_settings
+from django.urls import reverse
+from django.utils import timezone
+
+from posts import jobs
+from posts.forms import PostForm
+from posts.models import FeedEntry, Follow, Job, Post
+
+calls = []
+
+
+@jobs.job
+def record(value):
+    calls.append(value)
+
+
+@jobs.job
+def broken():
+    raise RuntimeError('сломано')
+
+
+def not_a_job():
+    pass
+
+
+@override_settings(JOBS_EAGER=False, JOB_MAX_ATTEMPTS=2, JOB_RETRY_DELAY=60)
+class JobQueueTests(TestCase):
+    def setUp(self):
+        calls.clear()
+
+    def test_enqueue_and_execute(self):
+        """Задание сохраняется в таблице и удаляется после выполнения."""
+        jobs.enqueue(record, value=42)
+        self.assertEqual(calls, [])
+        self.assertEqual(jobs.claim(10), [Job.objects.get().id])
+        self.assertTrue(jobs.execute(Job.objects.get().id))
+        self.assertEqual(calls, [42])
+        self.assertFalse(Job.objects.exists())
+
+    @override_settings(JOBS_EAGER=True)
+    def test_eager(self):
+        jobs.enqueue(record, value=1)
+        self.assertEqual(calls, [1])
+        self.assertFalse(Job.objects.exists())
+
+    def test_retry_and_dead_letter(self):
+        """Упавшее задание откладывается, а после всех попыток — DEAD."""
+        jobs.enqueue(broken)
+        job_id = jobs.claim(10)[0]
+        with self.assertLogs('posts.jobs', 'ERROR'):
+            self.assertFalse(jobs.execute(job_id))
+        job = Job.objects.get()
+        self.assertEqual((job.status, job.attempts), (Job.QUEUED, 1))
+        self.assertGreater(job.run_at, timezone.now() + timedelta(seconds=50))
+        self.assertIn('сломано', job.last_error)
+        self.assertEqual(jobs.claim(10), [])
+
+        Job.objects.update(run_at=timezone.now())
+        with self.assertLogs('posts.jobs', 'ERROR'):
+            self.assertFalse(jobs.execute(jobs.claim(10)[0]))
+        job.refresh_from_db()
+        self.assertEqual((job.status, job.attempts), (Job.DEAD, 2))
+        self.assertEqual(jobs.claim(10), [])
+        self.assertEqual(jobs.requeue_dead(), 1)
+        self.assertEqual(jobs.claim(10), [job.id])
+
+    def test_expired_lease(self):
+        """Задание упавшего воркера забирается снова после конца аренды."""
+        jobs.enqueue(record, value=1)
+        job_id = jobs.claim(10)[0]
+        self.assertEqual(jobs.claim(10), [])
+        Job.objects.update(locked_until=timezone.now() - timedelta(seconds=1))
+        self.assertEqual(jobs.claim(10), [job_id])
+
+    def test_only_marked_functions(self):
+        Job.objects.create(name=f'{__name__}.not_a_job',
+                           status=Job.RUNNING, run_at=timezone.now())
+        with self.assertLogs('posts.jobs', 'ERROR'):
+            self.assertFalse(jobs.execute(Job.objects.get().id))
+        self.assertIn('не является заданием', Job.objects.get().last_error)
+
+    def test_post_side_effects(self):
+        """Лента подписчика заполняется воркером, а не в запросе."""
+        User = get_user_model()
+        author = User.objects.create(username='writer')
+        reader = User.objects.create(username='reader')
+        Follow.objects.create(user=reader, author=author)
+        post = Post.objects.create(text='Текст', author=author)
+        self.assertFalse(FeedEntry.objects.exists())
+        self.assertEqual(author.stats.posts_count, 1)
+
+        call_command('run_jobs', '--workers', '0', '--once',
+                     stdout=StringIO())
+        self.assertEqual(
+            list(FeedEntry.objects.values_list('user_id', 'post_id')),
+            [(reader.id, post.id)])
+        self.assertFalse(Job.objects.exists())
+
+    def test_follow_page_revalidated_after_job(self):
+        """После раскладки поста /follow/ не отвечает 304 по старому ETag."""
+        cache.clear()
+        User = get_user_model()
+        author = User.objects.create(username='writer')
+        reader = User.objects.create(username='reader')
+        Follow.objects.create(user=reader, author=author)
+        call_command('run_jobs', '--workers', '0', '--once',
+                     stdout=StringIO())
+        client = Client()
+        client.force_login(reader)
+        url = reverse('follow_index')
+        Post.objects.create(text='Новый пост', author=author)
+        etag = client.get(url)['ETag']
+
+        call_command('run_jobs', '--workers', '0', '--once',
+                     stdout=StringIO())
+        response = client.get(url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 200)
+        self.assertContains(response, 'Новый пост')
+
+    def test_post_and_jobs_in_one_transaction(self):
+        """Если задание не встало в очередь, пост тоже не сохраняется."""
+        author = get_user_model().objects.create(username='writer')
+        form = PostForm({'text': 'Текст'}, instance=Post(author=author))
+        self.assertTrue(form.is_valid())
+        with mock.patch.object(Job.objects, 'create',
+                               side_effect=DatabaseError):
+            with self.assertRaises(DatabaseError):
+                form.save()
+        self.assertFalse(Post.objects.exists())
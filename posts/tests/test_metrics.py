@@ -0,0 +1,101 @@
+import json
+import os
+import tempfile
+from unittest import mock
+
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.test import Client, TestCase, override_settings
+from django.urls import reverse
+
+from posts.models import Post
+from yatube import metrics
+
+
+class MetricsTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.client = Client()
+        self.tmp = tempfile.TemporaryDirectory()
+        self.addCleanup(self.tmp.cleanup)
+        patcher = mock.patch('yatube.metrics.registry', metrics.Registry())
+        patcher.start()
+        self.addCleanup(patcher.stop)
+        user = get_user_model().objects.create(username='writer')
+        Post.objects.create(text='Текст', author=user)
+
+    def scrape(self):
+        response = self.client.get(reverse('metrics'))
+        self.assertEqual(response.status_code, 200)
+        return response.content.decode()
+
+    def test_sampled_request(self):
+        """Замеренный запрос попадает во все гистограммы."""
+        with override_settings(METRICS_SAMPLE_RATE=1,
+                               METRICS_DIR=self.tmp.name):
+            self.client.get(reverse('index'))
+            body = self.scrape()
+        self.assertIn('yatube_request_duration_seconds_count{view="index"} 1',
+                      body)
+        self.assertIn('yatube_db_queries_count{view="index"} 1', body)
+        self.assertIn('yatube_template_duration_seconds_count{view="index"} 1',
+                      body)
+        self.assertIn('yatube_response_size_bytes_count{view="index"} 1',
+                      body)
+        self.assertIn('yatube_requests_total{view="index",status="200"} 1',
+                      body)
+
+    def test_unsampled_request(self):
+        """Без выборки запрос только считается."""
+        with override_settings(METRICS_SAMPLE_RATE=0,
+                               METRICS_DIR=self.tmp.name):
+            self.client.get(reverse('index'))
+            body = self.scrape()
+        self.assertIn('yatube_requests_total{view="index",status="200"} 1',
+                      body)
+        self.assertNotIn('view="index",le=', body)
+
+    def test_workers_merged(self):
+        """Снимки других воркеров суммируются с метриками процесса."""
+        other = {
+            'histograms': {},
+            'counters': {'yatube_requests_total\tindex\t200': 5},
+        }
+        name = metrics.worker_file(os.getppid())
+        with open(os.path.join(self.tmp.name, name), 'w') as f:
+            json.dump(other, f)
+        with override_settings(METRICS_SAMPLE_RATE=0,
+                               METRICS_DIR=self.tmp.name):
+            self.client.get(reverse('index'))
+            body = self.scrape()
+        self.assertIn('yatube_requests_total{view="index",status="200"} 6',
+                      body)
+        self.assertTrue(os.path.exists(os.path.join(self.tmp.name, name)))
+
+    def test_dead_workers_archived(self):
+        """Снимок завершившегося воркера переносится в архив один раз."""
+        other = {
+            'histograms': {},
+            'counters': {'yatube_requests_total\tindex\t200': 5},
+        }
+        # Тот же pid, что у живого процесса, но другое время запуска
+        name = '%d-0.json' % os.getppid()
+        with open(os.path.join(self.tmp.name, name), 'w') as f:
+            json.dump(other, f)
+        with override_settings(METRICS_SAMPLE_RATE=0,
+                               METRICS_DIR=self.tmp.name):
+            self.client.get(reverse('index'))
+            self.scrape()
+            body = self.scrape()
+        self.assertIn('yatube_requests_total{view="index",status="200"} 6',
+                      body)
+        self.assertEqual(
+            sorted(name for name in os.listdir(self.tmp.name)
+                   if name.endswith('.json')),
+            sorted([metrics.ARCHIVE, metrics.worker_file()]))
+
+    def test_forbidden(self):
+        """Чужим адресам метрики не отдаются."""
+        response = self.client.get(reverse('metrics'),
+                                   REMOTE_ADDR='10.0.0.1')
+        self.assertEqual(response.status_code, 403)
@@ -0,0 +1,60 @@
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.db import connection
+from django.test import Client, TestCase
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+
+from posts.models import Comment, Follow, Group, Post
+
+
+class QueryPlanTests(TestCase):
+    """Запросы страниц читают данные по индексам, без полного просмотра
+    таблиц и без сортировки во временном B-дереве."""
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.reader = get_user_model().objects.create(username='reader')
+        cls.author = get_user_model().objects.create(username='writer')
+        cls.group = Group.objects.create(
+            title='Заголовок',
+            description='Создан для теста',
+            slug='test-slug'
+        )
+        Follow.objects.create(user=cls.reader, author=cls.author)
+        for i in range(3):
+            cls.post = Post.objects.create(
+                text=f'Пост {i}', author=cls.author, group=cls.group)
+            Comment.objects.create(post=cls.post, author=cls.reader,
+                                   text='Да')
+
+    def setUp(self):
+        cache.clear()
+        self.authorized_client = Client()
+        self.authorized_client.force_login(self.reader)
+
+    def query_plan(self, sql):
+        with connection.cursor() as cursor:
+            cursor.execute('EXPLAIN QUERY PLAN ' + sql)
+            return [row[-1] for row in cursor.fetchall()]
+
+    def test_views_use_indexes(self):
+        urls = [
+            reverse('index'),
+            reverse('index') + '?page=2',
+            reverse('group', args=[self.group.slug]),
+            reverse('profile', args=[self.author.username]),
+            reverse('post', args=[self.author.username, self.post.id]),
+            reverse('follow_index'),
+        ]
+        for url in urls:
+            with CaptureQueriesContext(connection) as queries:
+                self.authorized_client.get(url)
+            for query in queries.captured_queries:
+                if not query['sql'].startswith('SELECT'):
+                    continue
+                for step in self.query_plan(query['sql']):
+                    with self.subTest(url=url, sql=query['sql'], step=step):
+                        self.assertNotIn('TEMP B-TREE', step)
+                        if step.startswith('SCAN'):
+                            self.assertIn('INDEX', step)
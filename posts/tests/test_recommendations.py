@@ -0,0 +1,91 @@
+from io import StringIO
+from unittest import mock, skipIf
+
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.core.management import call_command
+from django.db import transaction
+from django.test import Client, TestCase
+
+from posts import recommendations
+from posts.models import Follow, Group, Post, Recommendation
+from posts.tests.utils import on_commit_callbacks
+
+
+class RecommendationTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        User = get_user_model()
+        self.reader, self.friend, self.star, self.neighbour, self.loner = [
+            User.objects.create(username=name)
+            for name in ('reader', 'friend', 'star', 'neighbour', 'loner')]
+        group = Group.objects.create(title='Группа', slug='group',
+                                     description='Описание')
+        # reader читает friend, а friend читает star: друг друга
+        Follow.objects.create(user=self.reader, author=self.friend)
+        Follow.objects.create(user=self.friend, author=self.star)
+        # friend и neighbour пишут в одной группе
+        Post.objects.create(text='Пост', author=self.friend, group=group)
+        Post.objects.create(text='Пост', author=self.neighbour, group=group)
+        Post.objects.create(text='Пост', author=self.loner)
+
+    def computed(self, backend):
+        return {user_id: authors for user_id, authors in
+                recommendations.compute(10, backend)}
+
+    def test_python(self):
+        result = self.computed('python')
+        self.assertEqual(result[self.reader.id], [
+            (self.star.id, recommendations.FOLLOW_WEIGHT),
+            (self.neighbour.id, recommendations.GROUP_WEIGHT),
+        ])
+        self.assertEqual(result[self.neighbour.id], [
+            (self.friend.id, recommendations.GROUP_WEIGHT)])
+        self.assertNotIn(self.loner.id, result)
+
+    @skipIf(recommendations.sparse is None, 'scipy не установлен')
+    def test_scipy_matches_python(self):
+        self.assertEqual(self.computed('scipy'), self.computed('python'))
+
+    def test_computed_before_transaction(self):
+        """Расчёт не держит блокировку записи, взятую транзакцией."""
+        events = []
+        atomic = transaction.atomic
+
+        def computed():
+            events.append('compute')
+            yield from recommendations.compute(10, 'python')
+
+        def tracked_atomic(*args, **kwargs):
+            events.append('atomic')
+            return atomic(*args, **kwargs)
+
+        with mock.patch.object(transaction, 'atomic', tracked_atomic):
+            users = recommendations.store(computed())
+        self.assertEqual(events[:2], ['compute', 'atomic'])
+        self.assertEqual(users, len(self.computed('python')))
+
+    def test_command_and_pages(self):
+        call_command('recommend_authors', '--backend', 'python',
+                     stdout=StringIO())
+        self.assertEqual(
+            list(Recommendation.objects.filter(user=self.reader)
+                 .order_by('rank').values_list('author__username', flat=True)),
+            ['star', 'neighbour'])
+
+        client = Client()
+        client.force_login(self.reader)
+        response = client.get('/follow/')
+        self.assertEqual(response.context['suggestions'],
+                         [self.star, self.neighbour])
+        self.assertContains(response, 'Кого почитать')
+
+        # На странице автора он сам не предлагается
+        response = client.get('/star/')
+        self.assertEqual(response.context['suggestions'], [self.neighbour])
+
+        # Подписка убирает автора из показа до следующего пересчёта
+        with on_commit_callbacks():
+            client.get('/neighbour/follow/')
+        response = client.get('/follow/')
+        self.assertEqual(response.context['suggestions'], [self.star])
@@ -0,0 +1,102 @@
+from unittest import mock
+
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.db import connection
+from django.http import HttpResponse
+from django.test import Client, RequestFactory, TestCase
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+
+from posts.cache import POSTS, bump
+from posts.models import Post
+from yatube.routers import PIN_COOKIE, ReplicaRouter, replica_reads
+
+
+class ReplicaRouterTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.router = ReplicaRouter()
+        self.factory = RequestFactory()
+        patcher = mock.patch('yatube.routers.replicas',
+                             return_value=['replica0'])
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def read_in_view(self, request, write=False):
+        @replica_reads
+        def view(request):
+            if write:
+                self.router.db_for_write(Post)
+            return HttpResponse(self.router.db_for_read(Post))
+        return view(request).content.decode()
+
+    def test_reads(self):
+        """Реплику читают только помеченные представления на GET."""
+        self.assertEqual(self.router.db_for_read(Post), 'default')
+        self.assertEqual(self.read_in_view(self.factory.get('/')),
+                         'replica0')
+        self.assertEqual(self.read_in_view(self.factory.post('/')),
+                         'default')
+        self.assertEqual(self.router.db_for_read(Post), 'default')
+
+    def test_primary_after_write(self):
+        """После записи и с cookie закрепления чтение идёт с основной базы."""
+        self.assertEqual(
+            self.read_in_view(self.factory.get('/'), write=True), 'default')
+        request = self.factory.get('/')
+        request.COOKIES[PIN_COOKIE] = '1'
+        self.assertEqual(self.read_in_view(request), 'default')
+
+    def test_replicas_not_migrated(self):
+        self.assertFalse(self.router.allow_migrate('replica0', 'posts'))
+        self.assertTrue(self.router.allow_migrate('default', 'posts'))
+
+
+class PrimaryPinTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.user = get_user_model().objects.create(username='writer')
+        self.client = Client()
+        self.client.force_login(self.user)
+
+    def test_pin_cookie(self):
+        """Запрос с записью ставит cookie, чтение — нет."""
+        response = self.client.get(reverse('index'))
+        self.assertNotIn(PIN_COOKIE, response.cookies)
+        response = self.client.post(reverse('new_post'), {'text': 'Текст'})
+        self.assertIn(PIN_COOKIE, response.cookies)
+
+    def test_page_cache_filled_from_primary(self):
+        """Промах кеша страниц читает основную базу, и страница кешируется."""
+        self.client.logout()
+        # Псевдонима replica0 нет: обращение к реплике упало бы
+        with mock.patch('yatube.routers.replicas',
+                        return_value=['replica0']):
+            etag = self.client.get(reverse('index'))['ETag']
+            with self.assertNumQueries(0):
+                self.client.get(reverse('index'))
+            response = self.client.get(reverse('index'),
+                                       HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 304)
+
+    def revalidate_on_replica(self):
+        """Повторный запрос с ETag; True, если представление выполнялось."""
+        with mock.patch('yatube.routers.replicas', return_value=['default']):
+            etag = self.client.get(reverse('index'))['ETag']
+            with CaptureQueriesContext(connection) as queries:
+                self.client.get(reverse('index'), HTTP_IF_NONE_MATCH=etag)
+        return any('posts_post' in query['sql']
+                   for query in queries.captured_queries)
+
+    def test_replica_etag_after_lag(self):
+        """ETag поколений с реплики — только когда они старше её отставания.
+
+        Иначе отставшая реплика закрепила бы у клиента старую страницу
+        под свежими поколениями.
+        """
+        bump(POSTS)
+        with self.settings(REPLICA_PIN_SECONDS=3600):
+            self.assertTrue(self.revalidate_on_replica())
+        with self.settings(REPLICA_PIN_SECONDS=0):
+            self.assertFalse(self.revalidate_on_replica())
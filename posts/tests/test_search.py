@@ -0,0 +1,75 @@
+from unittest import mock
+
+from django.contrib.auth import get_user_model
+from django.test import Client, TestCase
+from django.urls import reverse
+
+from posts import search
+from posts.models import Group, Post
+
+
+class SearchTests(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.user = get_user_model().objects.create(username='writer')
+        cls.group = Group.objects.create(
+            title='Путешествия',
+            description='Поездки по городам',
+            slug='travel'
+        )
+
+    def setUp(self):
+        self.guest_client = Client()
+
+    def found(self, query):
+        response = self.guest_client.get(reverse('search'), {'q': query})
+        return [post.text for post in response.context.get('posts')]
+
+    def test_stem(self):
+        """Словоформы сводятся к одной основе."""
+        self.assertEqual(search.stem('котами'), search.stem('кот'))
+        self.assertEqual(search.stem('москве'), search.stem('москва'))
+        self.assertEqual(search.stem('python'), 'python')
+
+    def check_search(self):
+        Post.objects.create(text='Гуляли с котами', author=self.user)
+        Post.objects.create(text='Неделя в Москве', author=self.user,
+                            group=self.group)
+        self.assertEqual(self.found('кот'), ['Гуляли с котами'])
+        self.assertEqual(self.found('москва'), ['Неделя в Москве'])
+        self.assertEqual(self.found('moskva'), ['Неделя в Москве'])
+        self.assertEqual(self.found('поездка'), ['Неделя в Москве'])
+        self.assertEqual(self.found('кот москва'), [])
+
+    def test_fts_search(self):
+        """Поиск через SQLite FTS5 понимает словоформы и латиницу."""
+        self.assertTrue(search.fts_available())
+        self.check_search()
+
+    def test_inverted_index_search(self):
+        """Без FTS5 работает встроенный инвертированный индекс."""
+        with mock.patch('posts.search.fts_available', return_value=False):
+            self.check_search()
+
+    def test_text_ranks_above_group(self):
+        """Совпадение в тексте поста важнее совпадения в группе."""
+        Post.objects.create(text='Про погоду', author=self.user,
+                            group=self.group)
+        Post.objects.create(text='Путешествия на поезде', author=self.user)
+        self.assertEqual(self.found('путешествия'),
+                         ['Путешествия на поезде', 'Про погоду'])
+
+    def test_index_follows_changes(self):
+        """Индекс обновляется при правке и удалении поста и группы."""
+        group = Group.objects.get(pk=self.group.pk)
+        post = Post.objects.create(text='Черновик', author=self.user,
+                                   group=group)
+        post.text = 'Чистовик'
+        post.save()
+        self.assertEqual(self.found('черновик'), [])
+        group.title = 'Походы'
+        group.save()
+        self.assertEqual(self.found('поход'), ['Чистовик'])
+        post.delete()
+        self.assertEqual(self.found('чистовик'), [])
@@ -0,0 +1,40 @@
+import os
+import tempfile
+import threading
+
+from django.db import connection
+from django.test import TestCase, override_settings
+
+from yatube.sqlite.writer import write_lock
+
+
+class SQLiteBackendTests(TestCase):
+    def pragma(self, name):
+        with connection.cursor() as cursor:
+            cursor.execute('PRAGMA %s' % name)
+            return cursor.fetchone()[0]
+
+    def test_pragmas(self):
+        """Соединение открывается с настройками из yatube.sqlite."""
+        self.assertEqual(self.pragma('synchronous'), 1)  # NORMAL
+        self.assertEqual(self.pragma('temp_store'), 2)  # MEMORY
+        self.assertEqual(self.pragma('busy_timeout'), 5000)
+        self.assertEqual(self.pragma('cache_size'), -64 * 1024)
+
+    def test_write_lock(self):
+        """Пока один писатель держит блокировку, второй ждёт."""
+        with tempfile.TemporaryDirectory() as tmp:
+            path = os.path.join(tmp, 'db.lock')
+            with override_settings(SQLITE_WRITE_LOCK=path):
+                results = []
+
+                def try_lock():
+                    with write_lock(blocking=False) as acquired:
+                        results.append(acquired)
+
+                with write_lock():
+                    thread = threading.Thread(target=try_lock)
+                    thread.start()
+                    thread.join()
+                try_lock()
+        self.assertEqual(results, [False, True])
@@ -0,0 +1,108 @@
+import gzip
+import io
+import json
+import os
+import shutil
+import tempfile
+
+from django.conf import settings
+from django.contrib.staticfiles.storage import staticfiles_storage
+from django.core.management import call_command
+from django.test import SimpleTestCase, override_settings
+
+from yatube.staticfiles import StaticFilesApp
+
+CSS = 'body { color: red; }\n' * 100
+
+
+class StaticFilesTests(SimpleTestCase):
+    def setUp(self):
+        self.source = tempfile.mkdtemp(dir=settings.BASE_DIR)
+        self.root = tempfile.mkdtemp(dir=settings.BASE_DIR)
+        self.addCleanup(shutil.rmtree, self.source, ignore_errors=True)
+        self.addCleanup(shutil.rmtree, self.root, ignore_errors=True)
+        os.makedirs(os.path.join(self.source, 'css'))
+        with open(os.path.join(self.source, 'css', 'site.css'), 'w') as f:
+            f.write(CSS)
+        overrides = override_settings(
+            STATICFILES_DIRS=[self.source],
+            STATIC_ROOT=self.root,
+            STATICFILES_STORAGE='yatube.staticfiles.CompressedManifestStorage',
+        )
+        overrides.enable()
+        self.addCleanup(overrides.disable)
+        call_command('collectstatic', interactive=False, verbosity=0)
+        with open(os.path.join(self.root, 'staticfiles.json')) as f:
+            self.hashed = json.load(f)['paths']['css/site.css']
+        self.app = StaticFilesApp(self.fallback)
+
+    def fallback(self, environ, start_response):
+        start_response('404 Not Found', [])
+        return [b'django']
+
+    def get(self, path, **headers):
+        environ = {'REQUEST_METHOD': 'GET', 'PATH_INFO': path}
+        environ.update(headers)
+        result = {}
+
+        def start_response(status, response_headers):
+            result['status'] = int(status.split()[0])
+            result['headers'] = dict(response_headers)
+
+        body = b''.join(self.app(environ, start_response))
+        return result['status'], result['headers'], body
+
+    def test_collectstatic(self):
+        """Файлы получают хеш в имени и сжатую копию рядом."""
+        self.assertRegex(self.hashed, r'^css/site\.[0-9a-f]{12}\.css$')
+        with open(os.path.join(self.root, self.hashed + '.gz'), 'rb') as f:
+            self.assertEqual(gzip.decompress(f.read()).decode(), CSS)
+        self.assertEqual(staticfiles_storage.url('css/site.css'),
+                         '/static/' + self.hashed)
+
+    def test_serve(self):
+        status, headers, body = self.get('/static/' + self.hashed)
+        self.assertEqual(status, 200)
+        self.assertEqual(body.decode(), CSS)
+        self.assertIn('immutable', headers['Cache-Control'])
+        self.assertEqual(headers['Content-Type'], 'text/css')
+
+        status, headers, body = self.get('/static/' + self.hashed,
+                                         HTTP_ACCEPT_ENCODING='gzip')
+        self.assertEqual(headers['Content-Encoding'], 'gzip')
+        self.assertEqual(gzip.decompress(body).decode(), CSS)
+        self.assertEqual(int(headers['Content-Length']), len(body))
+
+        status, _, body = self.get('/static/' + self.hashed,
+                                   HTTP_ACCEPT_ENCODING='gzip',
+                                   HTTP_IF_NONE_MATCH=headers['ETag'])
+        self.assertEqual((status, body), (304, b''))
+        # ETag сжатой копии не подходит к несжатому ответу
+        status, identity, _ = self.get('/static/' + self.hashed,
+                                       HTTP_IF_NONE_MATCH=headers['ETag'])
+        self.assertEqual(status, 200)
+        self.assertNotEqual(identity['ETag'], headers['ETag'])
+
+        status, headers, _ = self.get('/static/css/site.css')
+        self.assertNotIn('immutable', headers['Cache-Control'])
+
+    def test_range(self):
+        path = '/static/' + self.hashed
+        status, headers, body = self.get(path, HTTP_RANGE='bytes=5-9')
+        self.assertEqual(status, 206)
+        self.assertEqual(body.decode(), CSS[5:10])
+        self.assertEqual(headers['Content-Range'], 'bytes 5-9/%d' % len(CSS))
+        status, _, body = self.get(path, HTTP_RANGE='bytes=-4')
+        self.assertEqual(body.decode(), CSS[-4:])
+        status, headers, _ = self.get(path, HTTP_RANGE='bytes=99999-')
+        self.assertEqual(status, 416)
+        # Неверный диапазон игнорируется
+        status, headers, body = self.get(path, HTTP_RANGE='bytes=5-3')
+        self.assertEqual((status, body.decode()), (200, CSS))
+        self.assertNotIn('Content-Range', headers)
+
+    def test_outside_root(self):
+        """Пути вне STATIC_ROOT и неизвестные файлы идут в Django."""
+        for path in ('/static/../manage.py', '/static/missing.css', '/'):
+            with self.subTest(path=path):
+                self.assertEqual(self.get(path)[2], b'django')
@@ -0,0 +1,54 @@
+from io import StringIO
+
+from django.contrib.auth import get_user_model
+from django.core.management import call_command
+from django.test import Client, TestCase
+from django.urls import reverse
+
+from posts.models import Comment, Follow, Post, UserStats
+
+
+class StatsTests(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.author = get_user_model().objects.create(username='writer')
+        cls.reader = get_user_model().objects.create(username='reader')
+        cls.post = Post.objects.create(text='Пост', author=cls.author)
+        Comment.objects.create(post=cls.post, author=cls.reader, text='Да')
+        Follow.objects.create(user=cls.reader, author=cls.author)
+
+    def setUp(self):
+        self.guest_client = Client()
+
+    def test_counters_follow_writes(self):
+        """Счётчики меняются при создании и удалении объектов."""
+        stats = UserStats.objects.get(user=self.author)
+        self.assertEqual(stats.posts_count, 1)
+        self.assertEqual(stats.followers_count, 1)
+        self.assertEqual(
+            UserStats.objects.get(user=self.reader).following_count, 1)
+        self.post.refresh_from_db()
+        self.assertEqual(self.post.comments_count, 1)
+        Follow.objects.filter(user=self.reader).delete()
+        self.assertEqual(
+            UserStats.objects.get(user=self.author).followers_count, 0)
+
+    def test_recount_stats_repairs_drift(self):
+        """Команда recount_stats восстанавливает разошедшиеся счётчики."""
+        UserStats.objects.update(posts_count=42, followers_count=0)
+        Post.objects.update(comments_count=0)
+        call_command('recount_stats', stdout=StringIO())
+        stats = UserStats.objects.get(user=self.author)
+        self.assertEqual(stats.posts_count, 1)
+        self.assertEqual(stats.followers_count, 1)
+        self.post.refresh_from_db()
+        self.assertEqual(self.post.comments_count, 1)
+
+    def test_post_page_counts_without_aggregates(self):
+        """Страница поста берёт счётчики без COUNT-запросов."""
+        url = reverse('post', args=[self.author.username, self.post.id])
+        response = self.guest_client.get(url)
+        self.assertEqual(response.context.get('count'), 1)
+        self.assertEqual(response.context.get('follower'), 1)
+        self.assertEqual(response.context.get('following'), 0)
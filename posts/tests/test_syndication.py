@@ -0,0 +1,97 @@
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.test import Client, TestCase
+from django.urls import reverse
+
+from posts.models import Group, Post
+
+
+class SyndicationTests(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.author = get_user_model().objects.create(username='writer')
+        cls.group = Group.objects.create(
+            title='Тестовая группа',
+            description='Описание',
+            slug='test-group'
+        )
+
+    def setUp(self):
+        cache.clear()
+        self.guest_client = Client()
+
+    def content(self, response):
+        return b''.join(response.streaming_content).decode()
+
+    def test_feeds(self):
+        """Ленты RSS и Atom содержат посты своей группы и автора."""
+        Post.objects.create(text='Пост в группе', author=self.author,
+                            group=self.group)
+        Post.objects.create(text='Пост без группы', author=self.author)
+        response = self.guest_client.get(
+            reverse('group_feed', args=['test-group', 'rss']))
+        body = self.content(response)
+        self.assertTrue(body.startswith('<?xml'))
+        self.assertIn('<rss', body)
+        self.assertIn('Пост в группе', body)
+        self.assertNotIn('Пост без группы', body)
+
+        response = self.guest_client.get(
+            reverse('profile_feed', args=['writer', 'atom']))
+        body = self.content(response)
+        self.assertIn('<feed', body)
+        self.assertEqual(body.count('<entry>'), 2)
+        self.assertTrue(body.endswith('</feed>'))
+
+    def test_not_modified(self):
+        """Неизменившуюся ленту повторно не отдаём, новый пост её меняет."""
+        Post.objects.create(text='Первый пост', author=self.author)
+        url = reverse('feed', args=['atom'])
+        response = self.guest_client.get(url)
+        self.content(response)
+        etag = response['ETag']
+        modified = response['Last-Modified']
+        response = self.guest_client.get(url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 304)
+        response = self.guest_client.get(
+            url, HTTP_IF_MODIFIED_SINCE=modified)
+        self.assertEqual(response.status_code, 304)
+
+        with self.assertNumQueries(1):
+            response = self.guest_client.get(url)
+        self.assertIn('Первый пост', response.content.decode())
+
+        Post.objects.create(text='Второй пост', author=self.author)
+        response = self.guest_client.get(url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 200)
+        self.assertIn('Второй пост', self.content(response))
+
+    def test_edit_and_delete_change_feed(self):
+        """Правка и удаление поста тоже меняют ETag и ключ кеша."""
+        first = Post.objects.create(text='Первый пост', author=self.author)
+        Post.objects.create(text='Второй пост', author=self.author)
+        url = reverse('feed', args=['rss'])
+
+        def fetch():
+            response = self.guest_client.get(url)
+            if response.streaming:
+                return response['ETag'], self.content(response)
+            return response['ETag'], response.content.decode()
+
+        etag, _ = fetch()
+        first.text = 'Исправленный пост'
+        first.save()
+        edited_etag, body = fetch()
+        self.assertNotEqual(edited_etag, etag)
+        self.assertIn('Исправленный пост', body)
+
+        first.delete()
+        deleted_etag, body = fetch()
+        self.assertNotEqual(deleted_etag, edited_etag)
+        self.assertNotIn('Исправленный пост', body)
+
+    def test_unknown_group(self):
+        response = self.guest_client.get(
+            reverse('group_feed', args=['missing', 'rss']))
+        self.assertEqual(response.status_code, 404)
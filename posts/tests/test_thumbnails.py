@@ -0,0 +1,74 @@
+import shutil
+import tempfile
+from io import StringIO
+
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.core.management import call_command
+from django.test import Client, TestCase, override_settings
+from django.urls import reverse
+
+from posts.models import Post
+
+SMALL_GIF = (
+    b'\x47\x49\x46\x38\x39\x61\x01\x00'
+    b'\x01\x00\x00\x00\x00\x21\xf9\x04'
+    b'\x01\x0a\x00\x01\x00\x2c\x00\x00'
+    b'\x00\x00\x01\x00\x01\x00\x00\x02'
+    b'\x02\x4c\x01\x00\x3b'
+)
+
+
+class ThumbnailTests(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.media_root = tempfile.mkdtemp(dir=settings.BASE_DIR)
+        cls.user = get_user_model().objects.create(username='writer')
+
+    @classmethod
+    def tearDownClass(cls):
+        super().tearDownClass()
+        shutil.rmtree(cls.media_root, ignore_errors=True)
+
+    def setUp(self):
+        cache.clear()
+        self.authorized_client = Client()
+        self.authorized_client.force_login(self.user)
+
+    def create_post(self):
+        uploaded = SimpleUploadedFile(
+            name='small.gif', content=SMALL_GIF, content_type='image/gif')
+        self.authorized_client.post(
+            reverse('new_post'), data={'text': 'С картинкой', 'image': uploaded})
+        return Post.objects.get(text='С картинкой')
+
+    @override_settings(JOBS_EAGER=False)
+    def test_placeholder_until_thumbnail_is_ready(self):
+        """Пока миниатюра строится в фоне, показывается заглушка."""
+        with self.settings(MEDIA_ROOT=self.media_root):
+            post = self.create_post()
+            self.assertFalse(post.thumbnails_ready)
+            response = self.authorized_client.get(reverse('index'))
+        self.assertContains(response, 'Изображение обрабатывается')
+
+    @override_settings(JOBS_EAGER=True)
+    def test_thumbnail_generated_on_save(self):
+        """Миниатюра строится при сохранении формы, а не при отрисовке."""
+        with self.settings(MEDIA_ROOT=self.media_root):
+            post = self.create_post()
+            post.refresh_from_db()
+            self.assertTrue(post.thumbnails_ready)
+            response = self.authorized_client.get(reverse('index'))
+        self.assertContains(response, '<img class="card-img"')
+
+    @override_settings(JOBS_EAGER=False)
+    def test_generate_thumbnails_command(self):
+        """Команда generate_thumbnails достраивает миниатюры."""
+        with self.settings(MEDIA_ROOT=self.media_root):
+            post = self.create_post()
+            call_command('generate_thumbnails', stdout=StringIO())
+        post.refresh_from_db()
+        self.assertTrue(post.thumbnails_ready)
@@ -0,0 +1,88 @@
+import io
+import os
+import tempfile
+
+from django.contrib.auth import get_user_model
+from django.core.management import CommandError, call_command
+from django.test import TestCase
+
+from posts.models import Comment, FeedEntry, Follow, Group, Post
+
+
+class TransferTests(TestCase):
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.addCleanup(self.tmp.cleanup)
+        User = get_user_model()
+        self.author = User.objects.create(username='writer')
+        self.reader = User.objects.create(username='reader')
+        self.group = Group.objects.create(
+            title='Тестовая группа', slug='test-group', description='Описание')
+        self.post = Post.objects.create(
+            text='Первый пост', author=self.author, group=self.group)
+        Comment.objects.create(post=self.post, author=self.reader,
+                               text='Комментарий')
+        Follow.objects.create(user=self.reader, author=self.author)
+
+    def path(self, name):
+        return os.path.join(self.tmp.name, name)
+
+    def export(self, name, *args):
+        call_command('export_posts', '--output', self.path(name), *args,
+                     stderr=io.StringIO())
+
+    def load(self, name, *args):
+        out = io.StringIO()
+        call_command('import_posts', self.path(name), *args,
+                     stdout=out, stderr=io.StringIO())
+        return out.getvalue()
+
+    def test_round_trip(self):
+        """Выгрузка и загрузка сохраняют записи, даты и связи."""
+        pub_date = self.post.pub_date
+        self.export('dump.ndjson')
+        get_user_model().objects.all().delete()
+        Group.objects.all().delete()
+        self.load('dump.ndjson', '--batch-size', '2')
+
+        post = Post.objects.get()
+        self.assertEqual(post.id, self.post.id)
+        self.assertEqual(post.pub_date, pub_date)
+        self.assertEqual(post.author.username, 'writer')
+        self.assertEqual(post.group.slug, 'test-group')
+        self.assertEqual(post.comments_count, 1)
+        self.assertEqual(post.comments.get().author.username, 'reader')
+        reader = get_user_model().objects.get(username='reader')
+        self.assertEqual(reader.stats.following_count, 1)
+        self.assertEqual(FeedEntry.objects.filter(user=reader).count(), 1)
+
+    def test_csv_follows(self):
+        """Повторные подписки из CSV отбрасываются."""
+        self.export('follows.csv', '--format', 'csv', '--type', 'follow')
+        output = self.load('follows.csv', '--format', 'csv',
+                           '--type', 'follow')
+        self.assertIn('follow 0', output)
+        self.assertEqual(Follow.objects.count(), 1)
+
+    def test_dates_without_ids(self):
+        """Даты сохраняются и у записей без id."""
+        with open(self.path('posts.ndjson'), 'w') as f:
+            for day in (1, 2):
+                f.write('{"type": "post", "author": "writer", "text": '
+                        '"День %d", "pub_date": "2020-01-0%dT10:00:00"}\n'
+                        % (day, day))
+        self.load('posts.ndjson')
+        for day in (1, 2):
+            post = Post.objects.get(text='День %d' % day)
+            self.assertEqual((post.pub_date.day, post.updated.day),
+                             (day, day))
+        self.assertTrue(Post._meta.get_field('pub_date').auto_now_add)
+
+    def test_unknown_author(self):
+        """Неизвестный автор останавливает импорт без --create-users."""
+        with open(self.path('posts.ndjson'), 'w') as f:
+            f.write('{"type": "post", "author": "ghost", "text": "Текст"}\n')
+        with self.assertRaises(CommandError):
+            self.load('posts.ndjson')
+        self.load('posts.ndjson', '--create-users')
+        self.assertTrue(Post.objects.filter(author__username='ghost').exists())
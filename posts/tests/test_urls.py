@@ -1,4 +1,5 @@
 from django.contrib.auth import get_user_model
+from django.core.cache import cache
 from django.test import Client, TestCase
 from django.urls import reverse
 
@@ -7,6 +8,7 @@ from posts.models import Group, Post
 
 class StaticURLTests(TestCase):
     def setUp(self):
+        cache.clear()
         self.guest_client = Client()
 
     def test_static_pages_response(self):
@@ -37,6 +39,7 @@ class URLTests(TestCase):
         )
 
     def setUp(self):
+        cache.clear()
         self.guest_client = Client()
         self.authorized_client = Client()
         self.authorized_client.force_login(self.post.author)
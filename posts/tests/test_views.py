@@ -1,9 +1,12 @@
 from django import forms
 from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.core.paginator import Page, Paginator
 from django.test import Client, TestCase
 from django.urls import reverse
 
 from posts.models import Group, Post, Comment, Follow
+from posts.paginator import KeysetPaginator
 
 
 class ViewsTests(TestCase):
@@ -33,6 +36,7 @@ class ViewsTests(TestCase):
     #  )
 
     def setUp(self):
+        cache.clear()
         self.guest_client = Client()
         self.user = self.post.author
         self.user1 = self.comment.author
@@ -132,6 +136,7 @@ class PaginatorViewsTests(TestCase):
         Post.objects.bulk_create(posts)
 
     def setUp(self):
+        cache.clear()
         self.guest_client = Client()
         self.authorized_client = Client()
         self.authorized_client.force_login(PaginatorViewsTests.user)
@@ -147,6 +152,91 @@ class PaginatorViewsTests(TestCase):
         response = self.client.get(reverse('index') + '?page=2')
         self.assertEqual(len(response.context.get('page').object_list), 1)
 
+    def test_cursor_pages_cover_all_posts(self):
+        """Переход по курсорам ?after= и ?before= не теряет записей."""
+        response = self.client.get(reverse('index'))
+        first_page = response.context.get('page')
+        self.assertTrue(first_page.has_next())
+        self.assertFalse(first_page.has_previous())
+        response = self.client.get(
+            reverse('index') + '?after=' + first_page.next_cursor)
+        second_page = response.context.get('page')
+        self.assertEqual(len(second_page), 1)
+        self.assertFalse(second_page.has_next())
+        ids = [post.id for post in first_page] + [post.id for post in second_page]
+        self.assertEqual(sorted(ids), sorted(
+            Post.objects.values_list('id', flat=True)))
+        response = self.client.get(
+            reverse('index') + '?before=' + second_page.previous_cursor)
+        self.assertEqual(
+            [post.id for post in response.context.get('page')],
+            [post.id for post in first_page])
+
+    def test_invalid_cursor_falls_back_to_first_page(self):
+        """Испорченный курсор открывает первую страницу."""
+        response = self.client.get(reverse('index') + '?after=garbage')
+        self.assertEqual(len(response.context.get('page')), 10)
+
+    def test_page_range_window(self):
+        """Номера страниц: края и окно вокруг текущей, пропуски — None."""
+        paginator = KeysetPaginator(Post.objects.all(), 1)
+        self.assertEqual(paginator.num_pages, 11)
+        self.assertEqual(paginator.elided_page_range(1), [1, 2, None, 11])
+        self.assertEqual(paginator.elided_page_range(6),
+                         [1, None, 5, 6, 7, None, 11])
+        self.assertEqual(paginator.elided_page_range(11), [1, None, 10, 11])
+
+    def test_django_paginator_types(self):
+        """Курсорные классы — наследники Paginator и Page."""
+        paginator = KeysetPaginator(Post.objects.all(), 10)
+        page = paginator.get_page({})
+        self.assertIsInstance(paginator, Paginator)
+        self.assertIsInstance(page, Page)
+        self.assertEqual(paginator.page(2).object_list,
+                         paginator.get_page(2).object_list)
+
+    def test_page_links_without_offset(self):
+        """Номера страниц ведут по курсорам, а не по ?page=N."""
+        paginator = KeysetPaginator(Post.objects.all(), 1)
+        page = paginator.page_after(
+            paginator.first_page().next_cursor, number=2)
+        self.assertEqual(page.page_links, [
+            (1, ''),
+            (2, None),
+            (3, f'after={page.next_cursor}&page=3'),
+            (None, None),
+            (11, 'page=last'),
+        ])
+        response = self.client.get(reverse('index'))
+        self.assertNotContains(response, '?page=2"')
+
+    def test_last_page(self):
+        """?page=last открывает последнюю страницу без OFFSET."""
+        response = self.client.get(reverse('index') + '?page=last')
+        page = response.context.get('page')
+        self.assertEqual(len(page), 1)
+        self.assertEqual(page.number, 2)
+        self.assertFalse(page.has_next())
+        self.assertEqual(page[0], Post.objects.order_by('pub_date', 'id')[0])
+
+    def test_count_is_cached(self):
+        """Число записей берётся из кеша, пока не истечёт срок."""
+        paginator = KeysetPaginator(Post.objects.all(), 10)
+        self.assertEqual(paginator.count, 11)
+        Post.objects.create(text='Ещё пост', author=self.user)
+        with self.assertNumQueries(0):
+            self.assertEqual(
+                KeysetPaginator(Post.objects.all(), 10).count, 11)
+
+    def test_cursor_links_carry_page_number(self):
+        """Ссылка «Следующая» передаёт номер страницы вместе с курсором."""
+        response = self.client.get(reverse('index'))
+        cursor = response.context.get('page').next_cursor
+        self.assertContains(response, f'?after={cursor}&page=2')
+        response = self.client.get(
+            reverse('index'), {'after': cursor, 'page': 2})
+        self.assertEqual(response.context.get('page').number, 2)
+
     def test_cache_index_page(self):
         """Проверка работы кеша"""
         response = self.guest_client.get(reverse('index'))
@@ -159,3 +249,40 @@ class PaginatorViewsTests(TestCase):
         response2 = self.guest_client.get(reverse('index'))
         self.assertHTMLEqual(str(response), str(response2),
                              'Что-то пошло не так')
+
+
+class QueryBudgetTests(TestCase):
+    """Число запросов на страницу ленты не зависит от числа постов."""
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.reader = get_user_model().objects.create(username='reader')
+        cls.group = Group.objects.create(
+            title='Заголовок',
+            description='Создан для теста',
+            slug='test-slug'
+        )
+        for i in range(10):
+            author = get_user_model().objects.create(username=f'author{i}')
+            Follow.objects.create(user=cls.reader, author=author)
+            post = Post.objects.create(
+                text=f'Пост {i}', author=author, group=cls.group)
+            Comment.objects.create(post=post, author=cls.reader, text='Да')
+        cls.author = author
+
+    def setUp(self):
+        cache.clear()
+        self.authorized_client = Client()
+        self.authorized_client.force_login(self.reader)
+
+    def test_listing_query_budget(self):
+        budgets = {
+            reverse('index'): 1,
+            reverse('group', args=[self.group.slug]): 2,
+            reverse('profile', args=[self.author.username]): 4,
+            reverse('follow_index'): 4,
+        }
+        for url, budget in budgets.items():
+            with self.subTest(url=url):
+                with self.assertNumQueries(budget):
+                    self.authorized_client.get(url)
@@ -0,0 +1,22 @@
+from contextlib import contextmanager
+
+from django.db import DEFAULT_DB_ALIAS, connections
+
+
+@contextmanager
+def on_commit_callbacks(using=DEFAULT_DB_ALIAS, execute=True):
+    """Собрать колбэки transaction.on_commit, поставленные внутри блока.
+
+    TestCase не фиксирует транзакцию, и без этого колбэки не выполнились бы
+    вовсе. Повторяет TestCase.captureOnCommitCallbacks из Django 3.2.
+    """
+    callbacks = []
+    start = len(connections[using].run_on_commit)
+    try:
+        yield callbacks
+    finally:
+        callbacks[:] = [func for _, func in
+                        connections[using].run_on_commit[start:]]
+        if execute:
+            for callback in callbacks:
+                callback()
@@ -0,0 +1,75 @@
+"""Подготовка картинок постов и их миниатюр вне цикла запроса.
+
+После сохранения PostForm задание очереди (posts/jobs.py) нормализует
+загруженную картинку (posts/images.py) и строит миниатюры всех размеров
+из THUMBNAIL_SIZES. Запрос на загрузку только сохраняет исходный файл:
+декодирование и пересжатие большого снимка заняли бы воркер на сотни
+миллисекунд. Пока Post.thumbnails_ready не выставлен, шаблон показывает
+заглушку вместо картинки, так что исходник с метаданными на страницу
+не попадает. Когда флаг выставлен, тег {% thumbnail %} только читает
+готовую миниатюру из хранилища ключей sorl. Вместе с флагом сдвигается
+версия карточки, и страницы перерисовываются уже с картинкой.
+"""
+from django.db import transaction
+from django.utils import timezone
+from sorl.thumbnail import get_thumbnail
+
+from . import cache, images
+from .jobs import enqueue, job
+from .models import Post
+
+# Размеры и параметры должны совпадать с тегами {% thumbnail %}
+# в шаблонах (includes/image.html), иначе шаблон построит свою миниатюру
+THUMBNAIL_SIZES = {
+    '960x339': {'crop': 'center', 'upscale': True},
+}
+
+
+@job
+def generate(post_id):
+    """Построить все миниатюры поста и отметить их готовность."""
+    post = Post.objects.filter(pk=post_id).first()
+    if post is None or not post.image:
+        return
+    # Ошибка пробрасывается: очередь повторит задание позже
+    for geometry, options in THUMBNAIL_SIZES.items():
+        get_thumbnail(post.image, geometry, **options)
+    Post.objects.filter(pk=post_id).update(
+        thumbnails_ready=True, updated=timezone.now())
+    cache.bump(cache.POSTS)
+
+
+@job
+def prepare(post_id, name):
+    """Нормализовать загруженную картинку name и построить миниатюры.
+
+    Если у поста уже другая картинка, значит, её нормализовали при
+    прошлом запуске задания или заменили новой со своим заданием:
+    повторно пересжимать её не нужно.
+    """
+    post = Post.objects.filter(pk=post_id).first()
+    if post is None or not post.image:
+        return
+    if post.image.name == name:
+        storage = post.image.storage
+        with storage.open(name, 'rb') as original:
+            normalized = images.normalize(original)
+            # Анимацию normalize возвращает без изменений
+            if normalized is not original:
+                name = storage.save(post.image.field.generate_filename(
+                    post, normalized.name), normalized)
+        if name != post.image.name:
+            with transaction.atomic():
+                Post.objects.filter(
+                    pk=post_id, image=post.image.name).update(image=name)
+                # Исходник хранит метаданные снимка, в том числе EXIF
+                # с координатами; одинаковые файлы у постов общие
+                if not Post.objects.filter(image=post.image.name).exists():
+                    storage.delete(post.image.name)
+    generate(post_id)
+
+
+def schedule(post):
+    """Поставить нормализацию картинки и миниатюры в очередь заданий."""
+    if post.image:
+        enqueue(prepare, post_id=post.id, name=post.image.name)
@@ -0,0 +1,295 @@
+"""Потоковый импорт и экспорт постов, комментариев и подписок.
+
+Формат — NDJSON (одна запись JSON в строке, тип в поле "type") или CSV
+с записями одного типа. Записи ссылаются на пользователей по username,
+на группы по slug, а комментарии на посты — по id поста, который при
+импорте сохраняется, как в loaddata.
+
+Импорт копит записи в пачки по batch_size и вставляет их через
+bulk_create в отдельной транзакции, поэтому память не растёт с размером
+файла. Сигналы при этом не посылаются, и счётчики, ленты подписок
+и поисковый индекс пересчитываются один раз в конце.
+"""
+import csv
+import json
+import time
+
+from django.db import transaction
+from django.db.models import Max
+from django.utils import timezone
+from django.utils.dateparse import parse_datetime
+
+from . import cache, feed, graph, search, stats
+from .models import Comment, Follow, Group, Post, User
+
+TYPES = ('user', 'group', 'post', 'comment', 'follow')
+
+FIELDS = {
+    'user': ('username', 'first_name', 'last_name'),
+    'group': ('slug', 'title', 'description'),
+    'post': ('id', 'author', 'group', 'text', 'pub_date', 'image'),
+    'comment': ('id', 'post', 'author', 'text', 'created'),
+    'follow': ('user', 'author'),
+}
+
+
+class TransferError(ValueError):
+    pass
+
+
+class Progress:
+    """Печатает число обработанных записей и скорость раз в every записей."""
+
+    def __init__(self, write, every=10000):
+        self.write = write
+        self.every = every
+        self.count = 0
+        self.started = time.monotonic()
+
+    def step(self, label):
+        self.count += 1
+        if self.count % self.every == 0:
+            self.report(label)
+
+    def report(self, label):
+        elapsed = time.monotonic() - self.started or 1e-9
+        self.write('%s: %d записей, %.0f в секунду'
+                   % (label, self.count, self.count / elapsed))
+
+
+def _last_id(model):
+    return model.objects.aggregate(last=Max('pk'))['last'] or 0
+
+
+def bulk_create_dated(model, objects, date_fields):
+    """bulk_create с исходными датами в полях auto_now/auto_now_add.
+
+    bulk_create подставляет в такие поля текущее время, поэтому даты
+    записываются вторым запросом через bulk_update. SQLite не возвращает
+    id вставленных строк, но внутри транзакции (BEGIN IMMEDIATE,
+    yatube/sqlite) строки без явного id получают возрастающие id больше
+    прежних, и их можно прочитать обратно по порядку.
+    """
+    dates = [[getattr(obj, name) for name in date_fields]
+             for obj in objects]
+    last = _last_id(model)
+    model.objects.bulk_create(objects)
+    missing = [obj for obj in objects if obj.pk is None]
+    if missing:
+        explicit = {obj.pk for obj in objects if obj.pk is not None}
+        ids = [pk for pk in model.objects.filter(pk__gt=last).order_by(
+            'pk').values_list('pk', flat=True) if pk not in explicit]
+        for obj, pk in zip(missing, ids):
+            obj.pk = pk
+    for obj, values in zip(objects, dates):
+        for name, value in zip(date_fields, values):
+            setattr(obj, name, value)
+    model.objects.bulk_update(objects, date_fields)
+
+
+def read_ndjson(stream, default_type=None):
+    for number, line in enumerate(stream, 1):
+        if not line.strip():
+            continue
+        try:
+            record = json.loads(line)
+        except ValueError as exc:
+            raise TransferError('Строка %d: %s' % (number, exc))
+        record.setdefault('type', default_type)
+        yield record
+
+
+def read_csv(stream, record_type):
+    for row in csv.DictReader(stream):
+        row['type'] = record_type
+        yield {key: (value if value != '' else None)
+               for key, value in row.items()}
+
+
+def _date(value):
+    if not value:
+        return timezone.now()
+    date = parse_datetime(value)
+    if date is None:
+        raise TransferError('Неверная дата: %s' % value)
+    if timezone.is_naive(date):
+        date = timezone.make_aware(date, timezone.utc)
+    return date
+
+
+class Importer:
+    def __init__(self, batch_size=1000, create_users=False, progress=None):
+        self.batch_size = batch_size
+        self.create_users = create_users
+        self.progress = progress
+        self.pending = {record_type: [] for record_type in TYPES}
+        self.counts = {record_type: 0 for record_type in TYPES}
+        self.users = dict(User.objects.values_list('username', 'id'))
+        self.groups = dict(Group.objects.values_list('slug', 'id'))
+
+    def add(self, record):
+        record_type = record.get('type')
+        if record_type not in TYPES:
+            raise TransferError('Неизвестный тип записи: %s' % record_type)
+        self.pending[record_type].append(record)
+        if self.progress:
+            self.progress.step('импорт')
+        if len(self.pending[record_type]) >= self.batch_size:
+            self.flush()
+
+    def run(self, records):
+        for record in records:
+            self.add(record)
+        self.flush()
+        return self.counts
+
+    def _user(self, username):
+        if username not in self.users:
+            if not self.create_users:
+                raise TransferError('Нет пользователя: %s' % username)
+            self.pending['user'].append({'username': username})
+            self._flush_users()
+        return self.users[username]
+
+    def _flush_users(self):
+        records = self.pending['user']
+        if not records:
+            return
+        new = {record['username']: record for record in records
+               if record['username'] not in self.users}
+        User.objects.bulk_create(
+            [User(username=username,
+                  first_name=record.get('first_name') or '',
+                  last_name=record.get('last_name') or '')
+             for username, record in new.items()],
+            ignore_conflicts=True)
+        self.users.update(User.objects.filter(
+            username__in=list(new)).values_list('username', 'id'))
+        self.counts['user'] += len(new)
+        records.clear()
+
+    def _flush_groups(self):
+        records = self.pending['group']
+        new = {record['slug']: record for record in records
+               if record['slug'] not in self.groups}
+        Group.objects.bulk_create(
+            [Group(slug=slug, title=record.get('title') or slug,
+                   description=record.get('description') or '')
+             for slug, record in new.items()],
+            ignore_conflicts=True)
+        self.groups.update(Group.objects.filter(
+            slug__in=list(new)).values_list('slug', 'id'))
+        self.counts['group'] += len(new)
+        records.clear()
+
+    def _group(self, slug):
+        if not slug:
+            return None
+        if slug not in self.groups:
+            raise TransferError('Нет группы: %s' % slug)
+        return self.groups[slug]
+
+    def _flush_posts(self):
+        records = self.pending['post']
+        posts = []
+        for record in records:
+            pub_date = _date(record.get('pub_date'))
+            posts.append(Post(
+                id=record.get('id'),
+                author_id=self._user(record['author']),
+                group_id=self._group(record.get('group')),
+                text=record.get('text') or '',
+                pub_date=pub_date,
+                updated=pub_date,
+                image=record.get('image') or '',
+            ))
+        bulk_create_dated(Post, posts, ['pub_date', 'updated'])
+        self.counts['post'] += len(posts)
+        records.clear()
+
+    def _flush_comments(self):
+        records = self.pending['comment']
+        bulk_create_dated(Comment, [
+            Comment(id=record.get('id'),
+                    post_id=record['post'],
+                    author_id=self._user(record['author']),
+                    text=record.get('text') or '',
+                    created=_date(record.get('created')))
+            for record in records
+        ], ['created'])
+        self.counts['comment'] += len(records)
+        records.clear()
+
+    def _flush_follows(self):
+        records = self.pending['follow']
+        last = _last_id(Follow)
+        # Повторные подписки отбрасывает ограничение unique_follow
+        Follow.objects.bulk_create(
+            [Follow(user_id=self._user(record['user']),
+                    author_id=self._user(record['author']))
+             for record in records if record['user'] != record['author']],
+            ignore_conflicts=True)
+        # Пропущенные строки id не получают: считаем только вставленные
+        self.counts['follow'] += Follow.objects.filter(pk__gt=last).count()
+        records.clear()
+
+    def flush(self):
+        """Записать накопленные пачки, соблюдая порядок внешних ключей."""
+        with transaction.atomic():
+            self._flush_users()
+            self._flush_groups()
+            self._flush_posts()
+            self._flush_comments()
+            self._flush_follows()
+
+
+def rebuild_derived():
+    """Пересчитать то, что обычно обновляют сигналы."""
+    stats.recount()
+    feed.rebuild(User.objects.filter(follower__isnull=False).distinct())
+    graph.rebuild()
+    search.rebuild()
+    cache.bump(cache.POSTS)
+
+
+def export_rows(record_type, batch_size=1000):
+    """Записи одного типа в виде словарей, без загрузки таблицы в память."""
+    if record_type == 'user':
+        rows = User.objects.order_by('id').values(*FIELDS['user'])
+    elif record_type == 'group':
+        rows = Group.objects.order_by('id').values(*FIELDS['group'])
+    elif record_type == 'post':
+        rows = Post.objects.order_by('id').values(
+            'id', 'author__username', 'group__slug', 'text', 'pub_date',
+            'image')
+    elif record_type == 'comment':
+        rows = Comment.objects.order_by('id').values(
+            'id', 'post_id', 'author__username', 'text', 'created')
+    else:
+        rows = Follow.objects.order_by('id').values(
+            'user__username', 'author__username')
+    for row in rows.iterator(chunk_size=batch_size):
+        values = list(row.values())
+        record = dict(zip(FIELDS[record_type], values))
+        for key, value in record.items():
+            if hasattr(value, 'isoformat'):
+                record[key] = value.isoformat()
+        yield record
+
+
+def write_ndjson(stream, types, batch_size=1000, progress=None):
+    for record_type in types:
+        for record in export_rows(record_type, batch_size):
+            stream.write(json.dumps({'type': record_type, **record},
+                                    ensure_ascii=False) + '\n')
+            if progress:
+                progress.step('экспорт')
+
+
+def write_csv(stream, record_type, batch_size=1000, progress=None):
+    writer = csv.DictWriter(stream, fieldnames=FIELDS[record_type])
+    writer.writeheader()
+    for record in export_rows(record_type, batch_size):
+        writer.writerow(record)
+        if progress:
+            progress.step('экспорт')
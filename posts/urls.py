@@ -1,12 +1,31 @@
-from django.urls import path
+from django.urls import path, re_path
 
-from . import views
+from . import api, syndication, views
 
 urlpatterns = [
     path('', views.index, name='index'),
     path('group/<slug:slug>/', views.group_posts, name='group'),
     path('new/', views.new_posts, name='new_post'),
     path('follow/', views.follow_index, name='follow_index'),
+    path('search/', views.search, name='search'),
+
+    # Ленты RSS и Atom
+    re_path(r'^feeds/(?P<fmt>rss|atom)/$', syndication.feed, name='feed'),
+    re_path(r'^group/(?P<slug>[-\w]+)/(?P<fmt>rss|atom)/$',
+            syndication.feed, name='group_feed'),
+
+    # JSON API только для чтения
+    path('api/posts/', api.posts, name='api_posts'),
+    path('api/posts/<int:post_id>/', api.post_detail, name='api_post'),
+    path('api/posts/<int:post_id>/comments/', api.post_comments,
+         name='api_post_comments'),
+    path('api/groups/', api.groups, name='api_groups'),
+    path('api/groups/<slug:slug>/posts/', api.group_posts,
+         name='api_group_posts'),
+    path('api/users/<str:username>/', api.user_detail, name='api_user'),
+    path('api/users/<str:username>/posts/', api.author_posts,
+         name='api_author_posts'),
+    path('api/follow/', api.follow_posts, name='api_follow'),
 
     # Профайл пользователя
     path('<str:username>/', views.profile, name='profile'),
@@ -17,10 +36,14 @@ urlpatterns = [
     path('<str:username>/follow/', views.profile_follow, name='profile_follow'),
     path('<str:username>/unfollow/', views.profile_unfollow,
          name='profile_unfollow'),
+    re_path(r'^(?P<username>[^/]+)/(?P<fmt>rss|atom)/$', syndication.feed,
+            name='profile_feed'),
     path('<str:username>/<int:post_id>/edit/',
          views.post_edit,
          name='post_edit'
          ),
+    path('<str:username>/<int:post_id>/comments/', views.post_comments,
+         name='post_comments'),
     path('<str:username>/<int:post_id>/', views.post_view, name='post'),
     path('404/', views.page_not_found, name='404'),
     path('500/', views.server_error, name='500'),
@@ -1,40 +1,82 @@
 from django.contrib.auth.decorators import login_required
-from django.core.paginator import Paginator
+from django.db import transaction
 from django.shortcuts import get_object_or_404, redirect, render
-from yatube.settings import PAGE_SIZE
+from yatube.routers import replica_reads
+from yatube.settings import COMMENTS_PAGE_SIZE, PAGE_SIZE
+from yatube.sqlite.writer import serialize_writes
 
+from . import graph, recommendations
+from .cache import POSTS, anonymous_page_cache, conditional_page
+from .feed import FeedPaginator
 from .forms import PostForm, CommentForm
 from .models import Group, Post, User, Follow
+from .paginator import KeysetPaginator
+from .search import search as search_posts
+from .stats import get_stats
 
 
+def paginate(request, queryset):
+    """Курсорная паджинация ленты по ?after=, ?before= или ?page=N."""
+    paginator = KeysetPaginator(queryset, PAGE_SIZE)
+    return paginator, paginator.get_page(request.GET)
+
+
+def comments_paginator(post):
+    """Комментарии поста в порядке написания, с авторами."""
+    return KeysetPaginator(post.comments.select_related('author'),
+                           COMMENTS_PAGE_SIZE, ordering=('created', 'id'))
+
+
+@conditional_page(POSTS)
+@anonymous_page_cache(POSTS)
+@replica_reads
 def index(request):
-    post_list = Post.objects.select_related('group')
-    paginator = Paginator(post_list, PAGE_SIZE)
-    page_number = request.GET.get('page')
-    page = paginator.get_page(page_number)
+    post_list = Post.objects.for_feed()
+    paginator, page = paginate(request, post_list)
 
     return render(request, 'index.html', {'page': page, 'paginator': paginator})
 
 
+@conditional_page(POSTS, 'group:{slug}')
+@anonymous_page_cache(POSTS, 'group:{slug}')
+@replica_reads
 def group_posts(request, slug):
     group = get_object_or_404(Group, slug=slug)
-    posts = group.group_posts.all()
-    paginator = Paginator(posts, PAGE_SIZE)
-    page_number = request.GET.get('page')
-    page = paginator.get_page(page_number)
+    posts = group.group_posts.for_feed()
+    paginator, page = paginate(request, posts)
     context = {
         'group': group,
         'page': page,
-        'posts': posts,
         'paginator': paginator,
     }
     return render(request, 'group.html', context)
 
 
+def search(request):
+    query = request.GET.get('q', '').strip()
+    try:
+        number = max(int(request.GET.get('page', 1)), 1)
+    except ValueError:
+        number = 1
+    posts = []
+    ids = []
+    if query:
+        ids = search_posts(query, limit=PAGE_SIZE + 1,
+                           offset=(number - 1) * PAGE_SIZE)
+        found = Post.objects.for_feed().in_bulk(ids[:PAGE_SIZE])
+        posts = [found[pk] for pk in ids[:PAGE_SIZE] if pk in found]
+    return render(request, 'search.html', {
+        'query': query,
+        'posts': posts,
+        'number': number,
+        'has_next': len(ids) > PAGE_SIZE,
+    })
+
+
 @login_required
 def new_posts(request):
     if request.method == 'POST':
-        form = PostForm(request.POST)
+        form = PostForm(request.POST, files=request.FILES or None)
         if form.is_valid():
             post = form.save(commit=False)
             post.author = request.user
@@ -46,21 +88,25 @@ def new_posts(request):
     return render(request, 'new.html', {'form': form})
 
 
+@conditional_page(POSTS, 'author:{username}', recommendations.GENERATION)
+@anonymous_page_cache(POSTS, 'author:{username}')
+@replica_reads
 def profile(request, username):
-    author = get_object_or_404(User, username=username)
-    post_list = author.posts.all()
-    paginator = Paginator(post_list, PAGE_SIZE)
-    page_number = request.GET.get('page')
-    page = paginator.get_page(page_number)
-    count = post_list.count()
+    author = get_object_or_404(
+        User.objects.select_related('stats'), username=username)
+    post_list = author.posts.for_feed()
+    paginator, page = paginate(request, post_list)
+    count = get_stats(author).posts_count
     form = CommentForm(request.POST or None)
+    following = (request.user.is_authenticated
+                 and graph.is_following(request.user.id, author.id))
+    suggestions = []
     if request.user.is_authenticated:
-        following = Follow.objects.filter(
-            user=request.user, author=author).exists()
-    else:
-        following = False
+        suggestions = recommendations.for_user(
+            request.user, exclude=(author.id,))
     context = {
         'author': author,
+        'suggestions': suggestions,
         'page': page,
         'count': count,
         'paginator': paginator,
@@ -71,17 +117,19 @@ def profile(request, username):
     return render(request, 'profile.html', context)
 
 
+@conditional_page(POSTS, 'author:{username}')
+@anonymous_page_cache(POSTS, 'author:{username}')
+@replica_reads
 def post_view(request, username, post_id):
-    post = get_object_or_404(Post, pk=post_id, author__username=username)
-    count = Post.objects.filter(author=post.author).select_related(
-        'author').count()
-    comments = post.comments.all()
-    follower = Follow.objects.filter(
-        author__username=username
-    ).count()
-    following = Follow.objects.filter(
-        user__username=username
-    ).count()
+    post = get_object_or_404(
+        Post.objects.for_feed().select_related('author__stats'),
+        pk=post_id, author__username=username)
+    stats = get_stats(post.author)
+    count = stats.posts_count
+    # Остальные комментарии подгружаются кнопкой «Показать ещё»
+    comments = comments_paginator(post).first_page()
+    follower = stats.followers_count
+    following = stats.following_count
     form = CommentForm(request.POST or None)
     return render(request, 'post.html', {
         'author': post.author,
@@ -89,12 +137,28 @@ def post_view(request, username, post_id):
         'count': count,
         'post_id': post_id,
         'comments': comments,
+        'comments_next': comments.next_cursor,
         'form': form,
         'follower': follower,
         'following': following,
     })
 
 
+@conditional_page(POSTS, 'author:{username}')
+@anonymous_page_cache(POSTS, 'author:{username}')
+@replica_reads
+def post_comments(request, username, post_id):
+    """Следующая пачка комментариев HTML-фрагментом для «Показать ещё»."""
+    post = get_object_or_404(Post.objects.select_related('author'),
+                             pk=post_id, author__username=username)
+    page = comments_paginator(post).get_page(request.GET)
+    return render(request, 'includes/comments.html', {
+        'post': post,
+        'comments': page,
+        'comments_next': page.next_cursor,
+    })
+
+
 @login_required
 def post_edit(request, username, post_id):
     profile = get_object_or_404(User, username=username)
@@ -131,27 +195,36 @@ def add_comment(request, username, post_id):
 
 
 @login_required
+@conditional_page(POSTS, 'author:{user}', recommendations.GENERATION)
+@replica_reads
 def follow_index(request):
-    post = Post.objects.filter(author__following__user=request.user)
-    paginator = Paginator(post, PAGE_SIZE)
-    page_number = request.GET.get('page')
-    page = paginator.get_page(page_number)
-    return render(request, "follow.html",
-                  {'page': page, 'paginator': paginator})
+    paginator = FeedPaginator(request.user, Post.objects.for_feed(),
+                              PAGE_SIZE)
+    page = paginator.get_page(request.GET)
+    return render(request, "follow.html", {
+        'page': page,
+        'paginator': paginator,
+        'suggestions': recommendations.for_user(request.user),
+    })
 
 
 @login_required
+@serialize_writes
 def profile_follow(request, username):
     author = get_object_or_404(User, username=username)
     if request.user != author:
-        Follow.objects.get_or_create(user=request.user, author=author)
+        # Подписка и задание пересборки ленты из сигнала — одна транзакция
+        with transaction.atomic():
+            Follow.objects.get_or_create(user=request.user, author=author)
     return redirect("profile", username=username)
 
 
 @login_required
+@serialize_writes
 def profile_unfollow(request, username):
     author = get_object_or_404(User, username=username)
-    Follow.objects.filter(user=request.user, author=author).delete()
+    with transaction.atomic():
+        Follow.objects.filter(user=request.user, author=author).delete()
     return redirect('profile', username=username)
 
 
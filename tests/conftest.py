@@ -1,4 +1,19 @@
+import pytest
+
 pytest_plugins = [
     'tests.fixtures.fixture_user',
     'tests.fixtures.fixture_data',
 ]
+
+
+@pytest.fixture(autouse=True)
+def clear_cache():
+    """Кеш страниц переживает очистку базы между тестами."""
+    from django.core.cache import cache
+    cache.clear()
+
+
+@pytest.fixture(autouse=True)
+def run_jobs_inline(settings):
+    """Задания очереди выполняются сразу, без отдельного воркера."""
+    settings.JOBS_EAGER = True
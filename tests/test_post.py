@@ -4,6 +4,7 @@ import pytest
 from django import forms
 from django.contrib.auth import get_user_model
 from django.core.files.base import File
+from django.core.paginator import Page
 from django.db.models.query import QuerySet
 from PIL import Image
 
@@ -12,7 +13,7 @@ from posts.models import Post
 
 def get_field_context(context, field_type):
     for field in context.keys():
-        if field not in ('user', 'request') and type(context[field]) == field_type:
+        if field not in ('user', 'request') and isinstance(context[field], field_type):
             return context[field]
     return
 
@@ -53,9 +54,9 @@ class TestPostView:
         assert type(comment_form_context.fields['text']) == forms.fields.CharField, \
             'Проверьте, что форма комментария в контекстке страницы `/<username>/<post_id>/` содержится поле `text` типа `CharField`'
 
-        comment_context = get_field_context(response.context, QuerySet)
+        comment_context = get_field_context(response.context, (QuerySet, Page))
         assert comment_context is not None, \
-            'Проверьте, что передали список комментариев в контекст страницы `/<username>/<post_id>/` типа `QuerySet`'
+            'Проверьте, что передали список комментариев в контекст страницы `/<username>/<post_id>/` типа `QuerySet` или `Page`'
 
 
 class TestPostEditView:
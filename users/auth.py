@@ -0,0 +1,101 @@
+"""request.user из кеша вместо SELECT из auth_user на каждый запрос.
+
+CachedAuthenticationMiddleware повторяет django.contrib.auth.get_user,
+но пользователь берётся из кеша по id из сессии и читается из базы
+только при промахе. Запись пользователя удаляется из кеша при любом
+сохранении или удалении User (users/signals.py). Смена пароля меняет
+хеш сессии, поэтому старые сессии сбрасываются как и без кеша.
+
+Раз в AUTH_TOUCH_INTERVAL секунд активности пользователь перечитывается
+из базы: изменения в обход сигналов (например, массовый
+update(is_active=False) или смена пароля через update()) выкидывают
+его из сессии не позже, чем через этот интервал. Время проверки
+хранится в самой сессии, её сохранение заодно продлевает срок жизни;
+строка пользователя на чтениях не пишется.
+"""
+import time
+
+from django.conf import settings
+from django.contrib import auth
+from django.contrib.auth.middleware import AuthenticationMiddleware
+from django.contrib.auth.models import AnonymousUser
+from django.core.cache import cache
+from django.utils.crypto import constant_time_compare
+from django.utils.functional import SimpleLazyObject
+
+
+TOUCH_SESSION_KEY = '_auth_user_touched'
+
+
+def user_cache_key(user_id):
+    return 'auth:user:%s' % user_id
+
+
+def remember(user):
+    cache.set(user_cache_key(user.pk), user,
+              settings.AUTH_USER_CACHE_TIMEOUT)
+
+
+def forget(user_id):
+    cache.delete(user_cache_key(user_id))
+
+
+def mark_touched(session):
+    session[TOUCH_SESSION_KEY] = time.time()
+
+
+def touch(request, user, backend_path):
+    """Раз в AUTH_TOUCH_INTERVAL перечитать пользователя и продлить сессию.
+
+    Возвращает пользователя из базы или None, если войти он больше
+    не может: удалён, неактивен или сменил пароль.
+    """
+    touched = request.session.get(TOUCH_SESSION_KEY, 0)
+    if time.time() - touched < settings.AUTH_TOUCH_INTERVAL:
+        return user
+    fresh = auth.load_backend(backend_path).get_user(user.pk)
+    if fresh is None or not constant_time_compare(
+            request.session.get(auth.HASH_SESSION_KEY, ''),
+            fresh.get_session_auth_hash()):
+        forget(user.pk)
+        return None
+    remember(fresh)
+    mark_touched(request.session)
+    return fresh
+
+
+def get_user(request):
+    session = request.session
+    try:
+        user_id = auth._get_user_session_key(request)
+        backend_path = session[auth.BACKEND_SESSION_KEY]
+    except KeyError:
+        return AnonymousUser()
+    if backend_path not in settings.AUTHENTICATION_BACKENDS:
+        return AnonymousUser()
+
+    user = cache.get(user_cache_key(user_id))
+    if user is None:
+        user = auth.load_backend(backend_path).get_user(user_id)
+        if user is None:
+            return AnonymousUser()
+        remember(user)
+    user.backend = backend_path
+
+    session_hash = session.get(auth.HASH_SESSION_KEY)
+    if not session_hash or not constant_time_compare(
+            session_hash, user.get_session_auth_hash()):
+        session.flush()
+        return AnonymousUser()
+    user = touch(request, user, backend_path)
+    if user is None:
+        session.flush()
+        return AnonymousUser()
+    user.backend = backend_path
+    return user
+
+
+class CachedAuthenticationMiddleware(AuthenticationMiddleware):
+    def process_request(self, request):
+        super().process_request(request)
+        request.user = SimpleLazyObject(lambda: get_user(request))
@@ -0,0 +1,30 @@
+from django.contrib.auth import get_user_model, user_logged_in
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+
+from . import auth
+
+User = get_user_model()
+
+
+@receiver(post_save, sender=User)
+def user_saved(sender, instance, update_fields=None, **kwargs):
+    if update_fields == frozenset(['last_login']):
+        # Вход (django.contrib.auth.models.update_last_login): остальные
+        # поля не менялись, и пользователя можно сразу положить в кеш
+        auth.remember(instance)
+    else:
+        auth.forget(instance.pk)
+
+
+@receiver(post_delete, sender=User)
+def user_deleted(sender, instance, **kwargs):
+    auth.forget(instance.pk)
+
+
+@receiver(user_logged_in)
+def user_logged_in_cached(sender, request, user, **kwargs):
+    # Первый запрос после входа не идёт в базу за пользователем
+    auth.remember(user)
+    if request is not None:
+        auth.mark_touched(request.session)
@@ -0,0 +1,155 @@
+"""Кеш в отдельном файле SQLite, общий для всех воркеров на сервере.
+
+В отличие от LocMemCache содержимое видят все процессы gunicorn,
+а в отличие от FileBasedCache incr() атомарен, что важно для счётчиков
+поколений страниц (posts/cache.py).
+"""
+import pickle
+import sqlite3
+import threading
+import time
+
+from django.core.cache.backends.base import DEFAULT_TIMEOUT, BaseCache
+
+SCHEMA = '''
+CREATE TABLE IF NOT EXISTS cache (
+    key TEXT PRIMARY KEY,
+    value BLOB NOT NULL,
+    expires REAL
+)
+'''
+
+
+class SQLiteCache(BaseCache):
+    def __init__(self, location, params):
+        super().__init__(params)
+        self._path = location
+        self._local = threading.local()
+
+    @property
+    def _db(self):
+        connection = getattr(self._local, 'connection', None)
+        if connection is None:
+            connection = sqlite3.connect(
+                self._path, timeout=5, isolation_level=None,
+                check_same_thread=False)
+            connection.execute('PRAGMA journal_mode=WAL')
+            connection.execute('PRAGMA synchronous=NORMAL')
+            connection.execute(SCHEMA)
+            self._local.connection = connection
+        return connection
+
+    def _expires(self, timeout):
+        # get_backend_timeout() возвращает абсолютное время истечения
+        return self.get_backend_timeout(timeout)
+
+    def _key(self, key, version):
+        key = self.make_key(key, version=version)
+        self.validate_key(key)
+        return key
+
+    def add(self, key, value, timeout=DEFAULT_TIMEOUT, version=None):
+        key = self._key(key, version)
+        self._db.execute(
+            'DELETE FROM cache WHERE key = ? AND expires <= ?',
+            (key, time.time()))
+        self._cull_if_full()
+        cursor = self._db.execute(
+            'INSERT OR IGNORE INTO cache VALUES (?, ?, ?)',
+            (key, pickle.dumps(value, pickle.HIGHEST_PROTOCOL),
+             self._expires(timeout)))
+        return cursor.rowcount == 1
+
+    def get(self, key, default=None, version=None):
+        row = self._db.execute(
+            'SELECT value FROM cache WHERE key = ? '
+            'AND (expires IS NULL OR expires > ?)',
+            (self._key(key, version), time.time())).fetchone()
+        return default if row is None else pickle.loads(row[0])
+
+    def get_many(self, keys, version=None):
+        mapping = {self._key(key, version): key for key in keys}
+        if not mapping:
+            return {}
+        rows = self._db.execute(
+            'SELECT key, value FROM cache WHERE key IN (%s) '
+            'AND (expires IS NULL OR expires > ?)'
+            % ', '.join('?' * len(mapping)),
+            (*mapping, time.time()))
+        return {mapping[key]: pickle.loads(value) for key, value in rows}
+
+    def set(self, key, value, timeout=DEFAULT_TIMEOUT, version=None):
+        key = self._key(key, version)
+        self._cull_if_full()
+        self._db.execute(
+            'INSERT OR REPLACE INTO cache VALUES (?, ?, ?)',
+            (key, pickle.dumps(value, pickle.HIGHEST_PROTOCOL),
+             self._expires(timeout)))
+
+    def touch(self, key, timeout=DEFAULT_TIMEOUT, version=None):
+        cursor = self._db.execute(
+            'UPDATE cache SET expires = ? WHERE key = ?',
+            (self._expires(timeout), self._key(key, version)))
+        return cursor.rowcount == 1
+
+    def incr(self, key, delta=1, version=None):
+        key = self._key(key, version)
+        db = self._db
+        db.execute('BEGIN IMMEDIATE')
+        try:
+            row = db.execute(
+                'SELECT value FROM cache WHERE key = ? '
+                'AND (expires IS NULL OR expires > ?)',
+                (key, time.time())).fetchone()
+            if row is None:
+                raise ValueError("Key '%s' not found" % key)
+            value = pickle.loads(row[0]) + delta
+            db.execute('UPDATE cache SET value = ? WHERE key = ?',
+                       (pickle.dumps(value, pickle.HIGHEST_PROTOCOL), key))
+        except Exception:
+            db.execute('ROLLBACK')
+            raise
+        db.execute('COMMIT')
+        return value
+
+    def delete(self, key, version=None):
+        self._db.execute(
+            'DELETE FROM cache WHERE key = ?', (self._key(key, version),))
+
+    def has_key(self, key, version=None):
+        return self.get(key, self, version=version) is not self
+
+    def clear(self):
+        self._db.execute('DELETE FROM cache')
+
+    def _count(self):
+        return self._db.execute('SELECT COUNT(*) FROM cache').fetchone()[0]
+
+    def _cull_if_full(self):
+        if self._count() >= self._max_entries:
+            self.cull()
+
+    def cull(self):
+        """Освободить место, как django.core.cache.backends.db.
+
+        Сначала удаляются просроченные записи. Если их не хватило,
+        удаляется каждая cull_frequency-я запись (при 0 — все), начиная
+        с ближайших к истечению; бессрочные счётчики поколений — в
+        последнюю очередь.
+        """
+        db = self._db
+        db.execute('DELETE FROM cache WHERE expires <= ?', (time.time(),))
+        count = self._count()
+        if count < self._max_entries:
+            return
+        if self._cull_frequency == 0:
+            self.clear()
+            return
+        db.execute(
+            'DELETE FROM cache WHERE key IN ('
+            'SELECT key FROM cache ORDER BY expires IS NULL, expires '
+            'LIMIT ?)', (max(count // self._cull_frequency, 1),))
+
+    def close(self, **kwargs):
+        # Соединение живёт в потоке и переиспользуется между запросами
+        pass
@@ -0,0 +1,115 @@
+"""Сжатие ответов: zstd и brotli, если установлены, иначе gzip.
+
+Кодировка выбирается по Accept-Encoding с учётом q-значений, при
+равенстве — в порядке ENCODINGS. Сжимаются только текстовые ответы
+не короче COMPRESSION_MIN_SIZE байт; потоковые ответы (ленты RSS/Atom)
+сжимаются gzip по мере генерации. Как и у GZipMiddleware, сильный ETag
+становится слабым: байты ответа зависят от кодировки.
+"""
+import re
+
+from django.conf import settings
+from django.utils.cache import patch_vary_headers
+from django.utils.text import compress_sequence, compress_string
+
+try:
+    import brotli
+except ImportError:
+    brotli = None
+
+try:
+    import zstandard
+except ImportError:
+    zstandard = None
+
+COMPRESSIBLE_TYPES = re.compile(
+    r'^(text/|application/(json|javascript|xml|rss\+xml|atom\+xml))')
+
+
+def _brotli(data):
+    return brotli.compress(data, quality=settings.COMPRESSION_BROTLI_QUALITY)
+
+
+def _zstd(data):
+    return zstandard.ZstdCompressor(
+        level=settings.COMPRESSION_ZSTD_LEVEL).compress(data)
+
+
+ENCODINGS = [
+    ('zstd', _zstd if zstandard else None),
+    ('br', _brotli if brotli else None),
+    ('gzip', compress_string),
+]
+ENCODINGS = [(name, func) for name, func in ENCODINGS if func]
+
+
+def accepted_encodings(header):
+    """{кодировка: q} из заголовка Accept-Encoding."""
+    accepted = {}
+    for part in header.split(','):
+        name, _, params = part.strip().partition(';')
+        name = name.strip().lower()
+        if not name:
+            continue
+        q = 1.0
+        match = re.search(r'q=([0-9.]+)', params)
+        if match:
+            try:
+                q = float(match.group(1))
+            except ValueError:
+                q = 0.0
+        accepted[name] = q
+    return accepted
+
+
+def choose_encoding(header, available=None):
+    accepted = accepted_encodings(header)
+    best, best_q = None, 0.0
+    for name in available or [name for name, _ in ENCODINGS]:
+        q = accepted.get(name, accepted.get('*', 0.0))
+        if q > best_q:
+            best, best_q = name, q
+    return best
+
+
+class CompressionMiddleware:
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        response = self.get_response(request)
+        # 206 не сжимаем: Content-Range считается по несжатому телу
+        if (response.has_header('Content-Encoding')
+                or response.status_code not in (200, 203, 404)
+                or not COMPRESSIBLE_TYPES.match(
+                    response.get('Content-Type', ''))):
+            return response
+        if not response.streaming and (
+                len(response.content) < settings.COMPRESSION_MIN_SIZE):
+            return response
+
+        patch_vary_headers(response, ('Accept-Encoding',))
+        header = request.META.get('HTTP_ACCEPT_ENCODING', '')
+        if response.streaming:
+            encoding = choose_encoding(header, ['gzip'])
+        else:
+            encoding = choose_encoding(header)
+        if encoding is None:
+            return response
+
+        if response.streaming:
+            response.streaming_content = compress_sequence(
+                response.streaming_content)
+            del response['Content-Length']
+        else:
+            compressed = dict(ENCODINGS)[encoding](response.content)
+            if len(compressed) >= len(response.content):
+                return response
+            response.content = compressed
+            response['Content-Length'] = str(len(compressed))
+
+        etag = response.get('ETag')
+        if etag and etag.startswith('"'):
+            response['ETag'] = 'W/' + etag
+        response['Content-Encoding'] = encoding
+        return response
@@ -0,0 +1,358 @@
+"""Профилирование запросов и эндпоинт /metrics в формате Prometheus.
+
+MetricsMiddleware считает все запросы, а для доли METRICS_SAMPLE_RATE
+из них замеряет время ответа, число и время SQL-запросов, время
+рендеринга шаблонов и размер ответа. Замеры складываются в гистограммы
+процесса; раз в METRICS_FLUSH_INTERVAL секунд каждый воркер сохраняет
+их в METRICS_DIR/<pid>-<время запуска>.json, а /metrics суммирует файлы
+всех воркеров.
+
+Время запуска в имени отличает воркер от процесса, которому позже
+достался тот же pid. Файлы завершившихся воркеров /metrics переносит
+в METRICS_DIR/archive.json, так что счётчики не убывают после
+перезапуска воркеров, а каталог не растёт.
+"""
+import fcntl
+import json
+import os
+import random
+import threading
+import time
+from contextlib import ExitStack
+
+from django.conf import settings
+from django.db import connections
+from django.http import HttpResponse, HttpResponseForbidden
+from django.template import TemplateDoesNotExist
+from django.template.backends.django import (
+    DjangoTemplates, Template, reraise)
+
+DURATION_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10)
+QUERY_BUCKETS = (0, 1, 2, 3, 5, 10, 20, 50, 100)
+SIZE_BUCKETS = (1024, 4096, 16384, 65536, 262144, 1048576)
+
+HISTOGRAMS = {
+    'yatube_request_duration_seconds': (
+        'Время обработки запроса', DURATION_BUCKETS),
+    'yatube_db_queries': (
+        'Число SQL-запросов на запрос', QUERY_BUCKETS),
+    'yatube_db_duration_seconds': (
+        'Время SQL-запросов на запрос', DURATION_BUCKETS),
+    'yatube_template_duration_seconds': (
+        'Время рендеринга шаблонов', DURATION_BUCKETS),
+    'yatube_response_size_bytes': (
+        'Размер ответа', SIZE_BUCKETS),
+}
+REQUESTS_TOTAL = 'yatube_requests_total'
+ARCHIVE = 'archive.json'
+
+_local = threading.local()
+# Запасное «время запуска» для систем без /proc
+_imported = str(int(time.time()))
+
+
+def sample_rate():
+    return getattr(settings, 'METRICS_SAMPLE_RATE', 0.1)
+
+
+def metrics_dir():
+    return getattr(settings, 'METRICS_DIR',
+                   os.path.join(settings.BASE_DIR, 'metrics'))
+
+
+class Registry:
+    """Гистограммы и счётчики одного процесса.
+
+    Гистограмма хранится как {'buckets': [...], 'sum': ..., 'count': ...}
+    с некумулятивными корзинами, последняя — для значений выше всех границ.
+    """
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.histograms = {}
+        self.counters = {}
+        self.last_flush = time.monotonic()
+
+    def observe(self, name, view, value):
+        bounds = HISTOGRAMS[name][1]
+        key = '%s\t%s' % (name, view)
+        with self.lock:
+            histogram = self.histograms.get(key)
+            if histogram is None:
+                histogram = self.histograms[key] = {
+                    'buckets': [0] * (len(bounds) + 1), 'sum': 0, 'count': 0}
+            index = len(bounds)
+            for i, bound in enumerate(bounds):
+                if value <= bound:
+                    index = i
+                    break
+            histogram['buckets'][index] += 1
+            histogram['sum'] += value
+            histogram['count'] += 1
+
+    def inc(self, view, status):
+        key = '%s\t%s\t%s' % (REQUESTS_TOTAL, view, status)
+        with self.lock:
+            self.counters[key] = self.counters.get(key, 0) + 1
+
+    def snapshot(self):
+        with self.lock:
+            return json.loads(json.dumps({
+                'histograms': self.histograms, 'counters': self.counters}))
+
+    def flush(self, force=False):
+        """Сохранить снимок процесса, если прошло достаточно времени."""
+        now = time.monotonic()
+        interval = getattr(settings, 'METRICS_FLUSH_INTERVAL', 10)
+        if not force and now - self.last_flush < interval:
+            return
+        self.last_flush = now
+        directory = metrics_dir()
+        os.makedirs(directory, exist_ok=True)
+        _write(os.path.join(directory, worker_file()), self.snapshot())
+
+
+registry = Registry()
+
+
+def _process_start(pid):
+    """Время запуска процесса из /proc в тиках или None."""
+    try:
+        with open('/proc/%d/stat' % pid) as f:
+            stat = f.read()
+    except OSError:
+        return None
+    # Имя процесса в скобках может содержать пробелы; starttime —
+    # двадцатое поле после него
+    return stat.rsplit(')', 1)[1].split()[19]
+
+
+def worker_file(pid=None):
+    pid = os.getpid() if pid is None else pid
+    return '%d-%s.json' % (pid, _process_start(pid) or _imported)
+
+
+def _alive(name):
+    """Жив ли воркер, записавший файл name."""
+    pid, _, start = name[:-len('.json')].partition('-')
+    if not pid.isdigit() or not start:
+        return False
+    if os.path.isdir('/proc'):
+        return _process_start(int(pid)) == start
+    try:
+        os.kill(int(pid), 0)
+    except ProcessLookupError:
+        return False
+    except PermissionError:
+        pass
+    return True
+
+
+def _read(path):
+    try:
+        with open(path) as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return None
+
+
+def _write(path, snapshot):
+    tmp_path = '%s.tmp' % path
+    with open(tmp_path, 'w') as f:
+        json.dump(snapshot, f)
+    os.replace(tmp_path, path)
+
+
+def archive_dead(directory):
+    """Перенести снимки завершившихся воркеров в archive.json."""
+    dead = [name for name in os.listdir(directory)
+            if name.endswith('.json') and name != ARCHIVE
+            and not _alive(name)]
+    if not dead:
+        return
+    # Несколько воркеров могут отдавать /metrics одновременно: без
+    # блокировки один снимок попал бы в архив дважды
+    with open(os.path.join(directory, 'archive.lock'), 'w') as lock:
+        fcntl.flock(lock, fcntl.LOCK_EX)
+        archive = os.path.join(directory, ARCHIVE)
+        snapshots = [_read(archive) or {'histograms': {}, 'counters': {}}]
+        folded = []
+        for name in dead:
+            snapshot = _read(os.path.join(directory, name))
+            if snapshot is not None:
+                snapshots.append(snapshot)
+                folded.append(name)
+        if not folded:
+            return
+        histograms, counters = _merge(snapshots)
+        _write(archive, {'histograms': histograms, 'counters': counters})
+        for name in folded:
+            os.remove(os.path.join(directory, name))
+
+
+def merged_snapshot():
+    """Сумма снимков всех воркеров; свой процесс берётся из памяти."""
+    snapshots = [registry.snapshot()]
+    own = worker_file()
+    directory = metrics_dir()
+    if os.path.isdir(directory):
+        archive_dead(directory)
+        for name in os.listdir(directory):
+            if not name.endswith('.json') or name == own:
+                continue
+            snapshot = _read(os.path.join(directory, name))
+            if snapshot is not None:
+                snapshots.append(snapshot)
+    return _merge(snapshots)
+
+
+def _merge(snapshots):
+    histograms = {}
+    counters = {}
+    for snapshot in snapshots:
+        for key, histogram in snapshot['histograms'].items():
+            total = histograms.setdefault(key, {
+                'buckets': [0] * len(histogram['buckets']),
+                'sum': 0, 'count': 0})
+            for i, value in enumerate(histogram['buckets']):
+                total['buckets'][i] += value
+            total['sum'] += histogram['sum']
+            total['count'] += histogram['count']
+        for key, value in snapshot['counters'].items():
+            counters[key] = counters.get(key, 0) + value
+    return histograms, counters
+
+
+def _label(value):
+    return str(value).replace('\\', '\\\\').replace('"', '\\"')
+
+
+def render_prometheus(histograms, counters):
+    lines = []
+    for name, (help_text, bounds) in HISTOGRAMS.items():
+        lines.append('# HELP %s %s' % (name, help_text))
+        lines.append('# TYPE %s histogram' % name)
+        for key in sorted(histograms):
+            metric, view = key.split('\t')
+            if metric != name:
+                continue
+            histogram = histograms[key]
+            view = _label(view)
+            cumulative = 0
+            for bound, value in zip(bounds, histogram['buckets']):
+                cumulative += value
+                lines.append('%s_bucket{view="%s",le="%s"} %d'
+                             % (name, view, bound, cumulative))
+            lines.append('%s_bucket{view="%s",le="+Inf"} %d'
+                         % (name, view, histogram['count']))
+            lines.append('%s_sum{view="%s"} %r'
+                         % (name, view, histogram['sum']))
+            lines.append('%s_count{view="%s"} %d'
+                         % (name, view, histogram['count']))
+    lines.append('# HELP %s Число запросов' % REQUESTS_TOTAL)
+    lines.append('# TYPE %s counter' % REQUESTS_TOTAL)
+    for key in sorted(counters):
+        _, view, status = key.split('\t')
+        lines.append('%s{view="%s",status="%s"} %d'
+                     % (REQUESTS_TOTAL, _label(view), status, counters[key]))
+    return '\n'.join(lines) + '\n'
+
+
+class Sample:
+    def __init__(self):
+        self.queries = 0
+        self.query_time = 0
+        self.template_time = 0
+
+    def __call__(self, execute, sql, params, many, context):
+        start = time.perf_counter()
+        try:
+            return execute(sql, params, many, context)
+        finally:
+            self.query_time += time.perf_counter() - start
+            self.queries += 1
+
+
+class TimedTemplate(Template):
+    def render(self, context=None, request=None):
+        sample = getattr(_local, 'sample', None)
+        if sample is None:
+            return super().render(context, request)
+        start = time.perf_counter()
+        try:
+            return super().render(context, request)
+        finally:
+            sample.template_time += time.perf_counter() - start
+
+
+class TimedTemplates(DjangoTemplates):
+    """Бэкенд шаблонов, замеряющий рендеринг в профилируемых запросах.
+
+    Вложенные {% include %} рендерятся внутри движка и отдельно
+    не считаются, поэтому время не задваивается.
+    """
+
+    def from_string(self, template_code):
+        return TimedTemplate(self.engine.from_string(template_code), self)
+
+    def get_template(self, template_name):
+        try:
+            return TimedTemplate(
+                self.engine.get_template(template_name), self)
+        except TemplateDoesNotExist as exc:
+            reraise(exc, self)
+
+
+def _view_name(request):
+    match = getattr(request, 'resolver_match', None)
+    if match is None:
+        return 'unresolved'
+    return match.view_name
+
+
+class MetricsMiddleware:
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        if random.random() >= sample_rate():
+            response = self.get_response(request)
+            registry.inc(_view_name(request), response.status_code)
+            return response
+        sample = _local.sample = Sample()
+        start = time.perf_counter()
+        try:
+            with ExitStack() as stack:
+                for connection in connections.all():
+                    stack.enter_context(connection.execute_wrapper(sample))
+                response = self.get_response(request)
+        finally:
+            _local.sample = None
+        duration = time.perf_counter() - start
+        view = _view_name(request)
+        registry.inc(view, response.status_code)
+        registry.observe('yatube_request_duration_seconds', view, duration)
+        registry.observe('yatube_db_queries', view, sample.queries)
+        registry.observe('yatube_db_duration_seconds', view,
+                         sample.query_time)
+        registry.observe('yatube_template_duration_seconds', view,
+                         sample.template_time)
+        if not response.streaming:
+            registry.observe('yatube_response_size_bytes', view,
+                             len(response.content))
+        registry.flush()
+        return response
+
+
+def metrics(request):
+    """Метрики всех воркеров для Prometheus.
+
+    Доступны с адресов из METRICS_ALLOWED_IPS и сотрудникам сайта.
+    """
+    allowed = getattr(settings, 'METRICS_ALLOWED_IPS', ('127.0.0.1', '::1'))
+    if (request.META.get('REMOTE_ADDR') not in allowed
+            and not request.user.is_staff):
+        return HttpResponseForbidden()
+    registry.flush(force=True)
+    return HttpResponse(render_prometheus(*merged_snapshot()),
+                        content_type='text/plain; version=0.0.4')
@@ -0,0 +1,104 @@
+"""Чтение ленты с реплик и «прилипание» к основной базе после записи.
+
+Реплики перечислены в settings.DATABASE_REPLICAS. Читать с них могут
+только представления, обёрнутые в replica_reads, остальной код всегда
+работает с основной базой. Запрос, который что-то записал, ставит cookie,
+и следующие REPLICA_PIN_SECONDS секунд пользователь читает основную базу,
+так что после new_posts или add_comment он сразу видит свою запись.
+
+Реплика может отставать от основной базы, а поколения кеша страниц
+(posts/cache.py) уже сдвинуты записью. Поэтому промахи кеша страниц
+заполняются с основной базы (primary_reads), а ответ, собранный с
+чтением реплики, помечается атрибутом replica_read: ETag по поколениям
+он получает, только если поколения сдвинуты раньше, чем за
+REPLICA_PIN_SECONDS — дольше реплика не отстаёт.
+"""
+import contextlib
+import functools
+import random
+import threading
+
+from django.conf import settings
+
+PIN_COOKIE = 'primary_pin'
+SAFE_METHODS = ('GET', 'HEAD')
+
+_state = threading.local()
+
+
+def replicas():
+    return getattr(settings, 'DATABASE_REPLICAS', [])
+
+
+class ReplicaRouter:
+    def db_for_read(self, model, **hints):
+        if getattr(_state, 'use_replica', False) and replicas():
+            _state.replica_read = True
+            return random.choice(replicas())
+        return 'default'
+
+    def db_for_write(self, model, **hints):
+        _state.wrote = True
+        _state.use_replica = False
+        return 'default'
+
+    def allow_relation(self, obj1, obj2, **hints):
+        # Реплики содержат те же данные, что и основная база
+        return True
+
+    def allow_migrate(self, db, app_label, model_name=None, **hints):
+        return db not in replicas()
+
+
+@contextlib.contextmanager
+def primary_reads():
+    """Читать основную базу даже в представлениях с replica_reads."""
+    previous = getattr(_state, 'primary_only', False)
+    _state.primary_only = True
+    try:
+        yield
+    finally:
+        _state.primary_only = previous
+
+
+def replica_reads(view):
+    """Разрешить представлению читать с реплики.
+
+    Не действует для изменяющих запросов и для пользователей, которые
+    недавно что-то записали.
+    """
+    @functools.wraps(view)
+    def wrapper(request, *args, **kwargs):
+        if (request.method not in SAFE_METHODS
+                or PIN_COOKIE in request.COOKIES
+                or getattr(_state, 'primary_only', False)):
+            return view(request, *args, **kwargs)
+        # Сессию и пользователя читаем с основной базы: на реплику они
+        # могли ещё не попасть сразу после входа
+        if hasattr(request, 'user'):
+            request.user.is_authenticated
+        _state.use_replica = True
+        _state.replica_read = False
+        try:
+            response = view(request, *args, **kwargs)
+        finally:
+            _state.use_replica = False
+        response.replica_read = _state.replica_read
+        return response
+    return wrapper
+
+
+class PrimaryPinMiddleware:
+    """Ставит cookie PIN_COOKIE запросам, которые писали в базу."""
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        _state.wrote = False
+        response = self.get_response(request)
+        if _state.wrote:
+            response.set_cookie(
+                PIN_COOKIE, '1', httponly=True,
+                max_age=getattr(settings, 'REPLICA_PIN_SECONDS', 15))
+        return response
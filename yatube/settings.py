@@ -49,11 +49,16 @@ INSTALLED_APPS = [
 ]
 
 MIDDLEWARE = [
+    'yatube.metrics.MetricsMiddleware',
+    'yatube.compression.CompressionMiddleware',
+    'django.middleware.http.ConditionalGetMiddleware',
+    'yatube.sqlite.writer.WriteQueueMiddleware',
+    'yatube.routers.PrimaryPinMiddleware',
     'django.middleware.security.SecurityMiddleware',
     'django.contrib.sessions.middleware.SessionMiddleware',
     'django.middleware.common.CommonMiddleware',
     'django.middleware.csrf.CsrfViewMiddleware',
-    'django.contrib.auth.middleware.AuthenticationMiddleware',
+    'users.auth.CachedAuthenticationMiddleware',
     'django.contrib.messages.middleware.MessageMiddleware',
     'django.middleware.clickjacking.XFrameOptionsMiddleware',
 ]
@@ -63,7 +68,7 @@ TEMPLATES_DIR = os.path.join(BASE_DIR, "templates")
 
 TEMPLATES = [
     {
-        'BACKEND': 'django.template.backends.django.DjangoTemplates',
+        'BACKEND': 'yatube.metrics.TimedTemplates',
         'DIRS': [TEMPLATES_DIR],
         'APP_DIRS': True,
         'OPTIONS': {
@@ -73,6 +78,7 @@ TEMPLATES = [
                 'django.contrib.auth.context_processors.auth',
                 'django.contrib.messages.context_processors.messages',
                 'posts.context_processors.year',
+                'posts.context_processors.post_card_timeout',
             ],
         },
     },
@@ -84,17 +90,61 @@ WSGI_APPLICATION = 'yatube.wsgi.application'
 # Database
 # https://docs.djangoproject.com/en/2.2/ref/settings/#databases
 
+# yatube.sqlite включает WAL и настройки соединения (yatube/sqlite/base.py),
+# соединение переиспользуется между запросами CONN_MAX_AGE секунд
 DATABASES = {
     'default': {
-        'ENGINE': 'django.db.backends.sqlite3',
+        'ENGINE': 'yatube.sqlite',
         'NAME': os.path.join(BASE_DIR, 'db.sqlite3'),
+        'CONN_MAX_AGE': 600,
     }
 }
 
+# Реплики для чтения ленты (yatube/routers.py). Переменная окружения
+# YATUBE_DB_REPLICAS — пути к копиям SQLite через запятую; копии делает
+# команда snapshot_db. Другие базы можно добавить в DATABASES и вписать
+# их псевдонимы в DATABASE_REPLICAS.
+DATABASE_REPLICAS = []
+for number, path in enumerate(
+        filter(None, os.environ.get('YATUBE_DB_REPLICAS', '').split(','))):
+    alias = f'replica{number}'
+    DATABASES[alias] = {
+        'ENGINE': 'yatube.sqlite',
+        # immutable=1: копия не меняется, блокировки не нужны
+        'NAME': f'file:{path}?mode=ro&immutable=1',
+        'CONN_MAX_AGE': 600,
+        'OPTIONS': {'uri': True},
+        'TEST': {'MIRROR': 'default'},
+    }
+    DATABASE_REPLICAS.append(alias)
+DATABASE_ROUTERS = ['yatube.routers.ReplicaRouter']
+
+# Сколько секунд после записи пользователь читает только основную базу
+REPLICA_PIN_SECONDS = 15
+
+# Файл блокировки очереди писателей (yatube/sqlite/writer.py);
+# None отключает очередь
+SQLITE_WRITE_LOCK = os.path.join(BASE_DIR, 'db.sqlite3.lock')
+
 
 # Password validation
 # https://docs.djangoproject.com/en/2.2/ref/settings/#auth-password-validators
 
+# Сессии: cached_db читает сессию из кеша и пишет в базу только при
+# изменении, signed_cookies хранит её в подписанной cookie
+SESSION_ENGINES = {
+    'db': 'django.contrib.sessions.backends.db',
+    'cached_db': 'django.contrib.sessions.backends.cached_db',
+    'signed_cookies': 'django.contrib.sessions.backends.signed_cookies',
+}
+SESSION_ENGINE = SESSION_ENGINES[
+    os.environ.get('YATUBE_SESSIONS', 'cached_db')]
+
+# Кеш request.user (users/auth.py), секунды; пользователь сверяется
+# с базой и срок сессии продлевается раз в AUTH_TOUCH_INTERVAL секунд
+AUTH_USER_CACHE_TIMEOUT = 60 * 60
+AUTH_TOUCH_INTERVAL = 60 * 15
+
 AUTH_PASSWORD_VALIDATORS = [
     {
         'NAME': 'django.contrib.auth.password_validation.UserAttributeSimilarityValidator',
@@ -130,10 +180,25 @@ USE_TZ = True
 
 STATIC_URL = '/static/'
 STATIC_ROOT = os.path.join(BASE_DIR, "static")
+# В бою collectstatic добавляет к именам хеши и кладёт рядом .gz/.br,
+# а yatube.wsgi отдаёт их сам (yatube/staticfiles.py). При разработке
+# manifest ещё не собран, поэтому используется обычное хранилище
+STATICFILES_STORAGE = (
+    'django.contrib.staticfiles.storage.StaticFilesStorage' if DEBUG
+    else 'yatube.staticfiles.CompressedManifestStorage')
+# Время кеширования статики без хеша в имени, секунды
+STATIC_MAX_AGE = 60 * 60
 
 MEDIA_URL = '/media/'
 MEDIA_ROOT = os.path.join(BASE_DIR, 'media')
 
+# Загруженные картинки постов (posts/images.py): наибольшая сторона,
+# формат пересохранения ('JPEG', 'WEBP' или None — оставить как есть)
+# и качество сжатия
+IMAGE_MAX_SIZE = 1920
+IMAGE_FORMAT = 'JPEG'
+IMAGE_QUALITY = 85
+
 # login
 LOGIN_URL = "/auth/login/"
 LOGIN_REDIRECT_URL = "index"
@@ -145,8 +210,74 @@ EMAIL_FILE_PATH = os.path.join(BASE_DIR, "sent_emails")
 
 PAGE_SIZE = 10
 
-CACHES = {
-    'default': {
+# Комментариев на странице поста и в одной подгрузке
+COMMENTS_PAGE_SIZE = 20
+
+# Авторы с таким числом подписчиков не раскладываются по лентам при
+# публикации, их посты подмешиваются в ленту подписок при чтении
+FEED_CELEBRITY_FOLLOWERS = 1000
+
+# Рекомендации «Кого почитать» (posts/recommendations.py): сколько
+# авторов хранится для пользователя и сколько показывается на странице
+RECOMMENDATIONS_TOP_K = 20
+RECOMMENDATIONS_SHOWN = 5
+
+# Время жизни массивов графа подписок (posts/graph.py) в кеше, секунды
+FOLLOW_GRAPH_TIMEOUT = 60 * 60 * 24
+
+# Время жизни закешированной карточки поста, секунды
+POST_CARD_CACHE_TIMEOUT = 60 * 60 * 24
+
+# Кеш выбирается переменной окружения YATUBE_CACHE. LocMemCache у каждого
+# воркера свой, поэтому в продакшене нужен общий кеш: sqlite или file
+# на одном сервере, redis (нужен пакет django-redis) на нескольких.
+CACHE_BACKENDS = {
+    'locmem': {
         'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
-    }
+    },
+    'sqlite': {
+        'BACKEND': 'yatube.cache.SQLiteCache',
+        'LOCATION': os.path.join(BASE_DIR, 'cache.sqlite3'),
+    },
+    'file': {
+        'BACKEND': 'django.core.cache.backends.filebased.FileBasedCache',
+        'LOCATION': os.path.join(BASE_DIR, 'cache'),
+    },
+    'redis': {
+        'BACKEND': 'django_redis.cache.RedisCache',
+        'LOCATION': os.environ.get('YATUBE_REDIS_URL',
+                                   'redis://127.0.0.1:6379/1'),
+    },
 }
+CACHES = {
+    'default': CACHE_BACKENDS[
+        os.environ.get('YATUBE_CACHE', 'locmem' if DEBUG else 'sqlite')],
+}
+
+# Очередь фоновых заданий (posts/jobs.py). В режиме разработки задания
+# выполняются сразу; в бою их забирает manage.py run_jobs
+JOBS_EAGER = os.environ.get('YATUBE_JOBS_EAGER', '1' if DEBUG else '0') == '1'
+JOB_MAX_ATTEMPTS = 5
+# Пауза перед повтором, секунды; удваивается с каждой попыткой
+JOB_RETRY_DELAY = 10
+# Сколько секунд задание числится за воркером, прежде чем его заберёт другой
+JOB_LEASE = 300
+
+# Сжатие ответов (yatube/compression.py): ответы короче порога не
+# сжимаются; уровни brotli и zstd используются, если модули установлены
+COMPRESSION_MIN_SIZE = 200
+COMPRESSION_BROTLI_QUALITY = 5
+COMPRESSION_ZSTD_LEVEL = 3
+
+# Время жизни страниц, закешированных для анонимных читателей, секунды
+PAGE_CACHE_TIMEOUT = 60 * 10
+
+# Профилирование запросов (yatube/metrics.py): доля замеряемых запросов,
+# каталог для снимков воркеров и как часто их сохранять, секунды
+METRICS_SAMPLE_RATE = 0.1
+METRICS_DIR = os.path.join(BASE_DIR, 'metrics')
+METRICS_FLUSH_INTERVAL = 10
+METRICS_ALLOWED_IPS = ('127.0.0.1', '::1')
+
+# Сколько секунд хранится число записей для номеров страниц
+PAGINATOR_COUNT_TIMEOUT = 60 * 5
@@ -0,0 +1,38 @@
+"""SQLite для продакшена: WAL, настройки соединения и BEGIN IMMEDIATE.
+
+Подключается как ENGINE 'yatube.sqlite'. Значения PRAGMA можно
+переопределить в DATABASES[...]['OPTIONS']['pragmas'].
+"""
+from django.db.backends.sqlite3 import base
+
+PRAGMAS = {
+    # Читатели не блокируют писателя и наоборот
+    'journal_mode': 'WAL',
+    # В режиме WAL fsync при каждом коммите не нужен
+    'synchronous': 'NORMAL',
+    'mmap_size': 256 * 1024 * 1024,
+    # Отрицательное значение — размер в килобайтах
+    'cache_size': -64 * 1024,
+    # Сколько миллисекунд ждать освободившейся блокировки
+    'busy_timeout': 5000,
+    'temp_store': 'MEMORY',
+}
+
+
+class DatabaseWrapper(base.DatabaseWrapper):
+    def get_connection_params(self):
+        params = super().get_connection_params()
+        self.pragmas = {**PRAGMAS, **params.pop('pragmas', {})}
+        return params
+
+    def get_new_connection(self, conn_params):
+        conn = super().get_new_connection(conn_params)
+        for name, value in self.pragmas.items():
+            conn.execute('PRAGMA %s = %s' % (name, value))
+        return conn
+
+    def _start_transaction_under_autocommit(self):
+        # Обычный BEGIN берёт блокировку на запись только при первой
+        # записи, и если к этому моменту пишет другое соединение, SQLite
+        # сразу возвращает «database is locked», не дожидаясь busy_timeout
+        self.cursor().execute('BEGIN IMMEDIATE')
@@ -0,0 +1,69 @@
+"""Очередь писателей SQLite, общая для всех воркеров.
+
+SQLite допускает одного писателя; остальные ждут в busy handler, который
+опрашивает блокировку с паузами и под нагрузкой отдаёт её случайному
+соединению. Запросы, изменяющие данные, сначала встают в очередь
+на flock() файла SQLITE_WRITE_LOCK, и ядро пропускает их по одному.
+"""
+import functools
+from contextlib import contextmanager
+
+from django.conf import settings
+
+try:
+    import fcntl
+except ImportError:  # Windows
+    fcntl = None
+
+SAFE_METHODS = ('GET', 'HEAD', 'OPTIONS', 'TRACE')
+
+
+def lock_path():
+    return getattr(settings, 'SQLITE_WRITE_LOCK', None)
+
+
+@contextmanager
+def write_lock(blocking=True):
+    """Захватить блокировку писателя; при blocking=False — или вернуть False.
+
+    Файл открывается заново при каждом захвате: flock() привязан
+    к открытому файлу, поэтому так очередь работает и между потоками
+    одного процесса.
+    """
+    path = lock_path()
+    if not path or fcntl is None:
+        yield True
+        return
+    with open(path, 'a') as f:
+        flags = fcntl.LOCK_EX if blocking else fcntl.LOCK_EX | fcntl.LOCK_NB
+        try:
+            fcntl.flock(f.fileno(), flags)
+        except BlockingIOError:
+            yield False
+            return
+        try:
+            yield True
+        finally:
+            fcntl.flock(f.fileno(), fcntl.LOCK_UN)
+
+
+def serialize_writes(view):
+    """Выполнять view в очереди писателей, даже если это GET."""
+    @functools.wraps(view)
+    def wrapper(request, *args, **kwargs):
+        with write_lock():
+            return view(request, *args, **kwargs)
+    return wrapper
+
+
+class WriteQueueMiddleware:
+    """Ставит в очередь писателей все запросы, кроме безопасных методов."""
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        if request.method in SAFE_METHODS:
+            return self.get_response(request)
+        with write_lock():
+            return self.get_response(request)
@@ -0,0 +1,204 @@
+"""Статика с хешами в именах, заранее сжатая и отдаваемая из WSGI.
+
+CompressedManifestStorage при collectstatic добавляет к именам файлов
+хеш содержимого (ManifestStaticFilesStorage) и рядом с каждым текстовым
+файлом кладёт .gz и, если установлен brotli, .br. {% static %} выдаёт
+имена с хешем, поэтому их можно кешировать в браузере навсегда.
+
+StaticFilesApp оборачивает WSGI-приложение Django и отдаёт файлы из
+STATIC_ROOT до того, как запрос попадёт в middleware и URLconf: с
+выбором сжатой копии по Accept-Encoding, ETag, 304 и Range.
+"""
+import gzip
+import mimetypes
+import os
+import re
+from email.utils import formatdate, parsedate_to_datetime
+from wsgiref.util import FileWrapper
+
+from django.conf import settings
+from django.contrib.staticfiles.storage import ManifestStaticFilesStorage
+
+from .compression import choose_encoding
+
+try:
+    import brotli
+except ImportError:
+    brotli = None
+
+COMPRESSIBLE_EXTENSIONS = ('.css', '.js', '.svg', '.map', '.txt', '.html',
+                           '.json', '.xml', '.ico', '.eot', '.ttf', '.otf')
+# Имя с хешем от ManifestStaticFilesStorage: name.0123456789ab.css
+HASHED_NAME = re.compile(r'\.[0-9a-f]{12}\.\w+$')
+FOREVER = 60 * 60 * 24 * 365
+RANGE = re.compile(r'^bytes=(\d*)-(\d*)$')
+
+
+def compress_file(path):
+    """Положить рядом с файлом .gz и .br, если они меньше оригинала."""
+    with open(path, 'rb') as f:
+        data = f.read()
+    variants = [('.gz', gzip.compress(data, compresslevel=9, mtime=0))]
+    if brotli is not None:
+        variants.append(('.br', brotli.compress(data)))
+    for suffix, compressed in variants:
+        if len(compressed) < len(data):
+            with open(path + suffix, 'wb') as f:
+                f.write(compressed)
+
+
+class CompressedManifestStorage(ManifestStaticFilesStorage):
+    def post_process(self, paths, dry_run=False, **options):
+        yield from super().post_process(paths, dry_run=dry_run, **options)
+        if dry_run:
+            return
+        for hashed_name in set(self.hashed_files.values()):
+            if hashed_name.endswith(COMPRESSIBLE_EXTENSIONS):
+                compress_file(self.path(hashed_name))
+
+
+class StaticFilesApp:
+    ENCODINGS = (('br', '.br'), ('gzip', '.gz'))
+
+    def __init__(self, application, root=None, prefix=None):
+        self.application = application
+        self.root = root
+        self.prefix = prefix
+
+    def __call__(self, environ, start_response):
+        prefix = self.prefix or settings.STATIC_URL
+        path = environ.get('PATH_INFO', '')
+        if (not prefix.startswith('/') or not path.startswith(prefix)
+                or environ['REQUEST_METHOD'] not in ('GET', 'HEAD')):
+            return self.application(environ, start_response)
+        found = self.find(path[len(prefix):])
+        if found is None:
+            return self.application(environ, start_response)
+        return self.serve(found, environ, start_response)
+
+    def find(self, name):
+        root = os.path.realpath(self.root or settings.STATIC_ROOT)
+        path = os.path.realpath(os.path.join(root, name))
+        if not path.startswith(root + os.sep) or not os.path.isfile(path):
+            return None
+        return path
+
+    def serve(self, path, environ, start_response):
+        stat = os.stat(path)
+        size = stat.st_size
+        byte_range = self.byte_range(environ.get('HTTP_RANGE'), size)
+        encoding, served = None, path
+        if byte_range is None:
+            encoding, served = self.encoded(path, environ)
+        # У каждой копии свой ETag: сильный валидатор обещает
+        # побайтно одинаковое тело
+        etag = '"%x-%x%s"' % (
+            int(stat.st_mtime), size,
+            '-' + served.rsplit('.', 1)[1] if encoding else '')
+        content_type, _ = mimetypes.guess_type(path)
+        headers = [
+            ('Content-Type', content_type or 'application/octet-stream'),
+            ('Cache-Control', self.cache_control(path)),
+            ('Last-Modified', formatdate(stat.st_mtime, usegmt=True)),
+            ('ETag', etag),
+            ('Accept-Ranges', 'bytes'),
+        ]
+        if path.endswith(COMPRESSIBLE_EXTENSIONS):
+            headers.append(('Vary', 'Accept-Encoding'))
+
+        if self.not_modified(environ, etag, stat.st_mtime):
+            start_response('304 Not Modified', headers)
+            return []
+
+        if byte_range is not None:
+            return self.serve_range(path, size, byte_range, environ,
+                                    headers, start_response)
+        if encoding:
+            headers.append(('Content-Encoding', encoding))
+            size = os.path.getsize(served)
+        headers.append(('Content-Length', str(size)))
+        start_response('200 OK', headers)
+        if environ['REQUEST_METHOD'] == 'HEAD':
+            return []
+        return self.file(environ, open(served, 'rb'))
+
+    def byte_range(self, value, size):
+        """(start, end) из заголовка Range или None — отдать весь файл.
+
+        Несколько диапазонов не поддерживаем, а неверный заголовок,
+        например bytes=5-3, по RFC 7233 (2.1, 3.1) игнорируется.
+        """
+        match = RANGE.match((value or '').strip())
+        if match is None or match.groups() == ('', ''):
+            return None
+        first, last = match.groups()
+        if not first:
+            return max(size - int(last), 0), size - 1
+        if last and int(last) < int(first):
+            return None
+        return int(first), min(int(last), size - 1) if last else size - 1
+
+    def serve_range(self, path, size, byte_range, environ, headers,
+                    start_response):
+        start, end = byte_range
+        if start > end or start >= size:
+            headers.append(('Content-Range', 'bytes */%d' % size))
+            start_response('416 Range Not Satisfiable', headers)
+            return []
+        headers.append(('Content-Range',
+                        'bytes %d-%d/%d' % (start, end, size)))
+        length = end - start + 1
+        headers.append(('Content-Length', str(length)))
+        start_response('206 Partial Content', headers)
+        if environ['REQUEST_METHOD'] == 'HEAD':
+            return []
+        f = open(path, 'rb')
+        f.seek(start)
+        return self.file(environ, f, length)
+
+    def cache_control(self, path):
+        if HASHED_NAME.search(path):
+            return 'public, max-age=%d, immutable' % FOREVER
+        return 'public, max-age=%d' % settings.STATIC_MAX_AGE
+
+    def not_modified(self, environ, etag, mtime):
+        if_none_match = environ.get('HTTP_IF_NONE_MATCH')
+        if if_none_match is not None:
+            return etag in [tag.strip().replace('W/', '', 1)
+                            for tag in if_none_match.split(',')]
+        if_modified_since = environ.get('HTTP_IF_MODIFIED_SINCE')
+        if if_modified_since:
+            try:
+                since = parsedate_to_datetime(if_modified_since).timestamp()
+            except (TypeError, ValueError):
+                return False
+            return int(mtime) <= since
+        return False
+
+    def encoded(self, path, environ):
+        available = {encoding: path + suffix
+                     for encoding, suffix in self.ENCODINGS
+                     if os.path.isfile(path + suffix)}
+        if not available:
+            return None, path
+        encoding = choose_encoding(
+            environ.get('HTTP_ACCEPT_ENCODING', ''), list(available))
+        return encoding, available.get(encoding, path)
+
+    def file(self, environ, f, length=None):
+        if length is not None:
+            return _limited(f, length)
+        wrapper = environ.get('wsgi.file_wrapper', FileWrapper)
+        return wrapper(f)
+
+
+def _limited(f, length, block_size=8192):
+    try:
+        while length > 0:
+            chunk = f.read(min(block_size, length))
+            if not chunk:
+                break
+            length -= len(chunk)
+            yield chunk
+    finally:
+        f.close()
@@ -19,6 +19,8 @@ from django.conf.urls.static import static
 from django.contrib import admin
 from django.urls import include, path
 
+from yatube.metrics import metrics
+
 handler404 = "posts.views.page_not_found" # noqa
 handler500 = "posts.views.server_error" # noqa
 
@@ -33,6 +35,9 @@ urlpatterns = [
     #  раздел администратора
     path("admin/", admin.site.urls),
 
+    #  метрики для Prometheus
+    path("metrics", metrics, name="metrics"),
+
     #  обработчик для главной страницы ищем в urls.py приложения posts
     path("", include("posts.urls")),
 
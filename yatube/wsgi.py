@@ -14,3 +14,8 @@ from django.core.wsgi import get_wsgi_application
 os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'yatube.settings')
 
 application = get_wsgi_application()
+
+# Статика из STATIC_ROOT отдаётся до middleware и URLconf
+from yatube.staticfiles import StaticFilesApp  # noqa: E402
+
+application = StaticFilesApp(application)